@@ -0,0 +1,7 @@
+import os
+import sys
+
+#modules import each other by name from the package folder, and pygame needs no display or sound card under the dummy drivers
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'traffic_flow_simulator'))
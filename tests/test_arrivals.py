@@ -0,0 +1,42 @@
+import pytest
+from arrivals import *
+
+
+def test_arrival_process_is_abstract():
+    with pytest.raises(TypeError):
+        ArrivalProcess()
+
+
+def test_poisson_batches_are_seeded_and_ascending():
+    times = PoissonArrivals(2.0, seed='7:1').next_batch(10.0, 2000)
+    assert times == PoissonArrivals(2.0, seed='7:1').next_batch(10.0, 2000)
+    assert len(times) == 2000 and times[0] > 10.0
+    assert all(a < b for a, b in zip(times, times[1:]))
+    assert 0.45 < (times[-1] - 10.0) / len(times) < 0.55 #mean gap of 1 / rate
+
+
+def test_fixed_headway():
+    assert FixedHeadway(1.5).next_batch(2.0, 3) == [3.5, 5.0, 6.5]
+    assert FixedHeadway(0).next_batch(2.0, 3) == []
+
+
+def test_profile_only_arrives_while_its_rate_is_positive():
+    process = TimeOfDayArrivals([(0, 0.0), (50, 2.0)], period=100, seed=3)
+    times = process.next_batch(0.0, 500)
+    assert len(times) == 500
+    assert all(time % 100 >= 50 for time in times)
+    assert process.get_rate(-10) == 2.0 and process.get_rate(120) == 0.0
+
+
+def test_state_round_trip_repeats_the_next_batch():
+    process = PoissonArrivals(1.0, seed=5)
+    process.next_batch(0.0, 10)
+    state = process.get_state()
+    expected = process.next_batch(10.0, 10)
+    process.set_state(state)
+    assert process.next_batch(10.0, 10) == expected
+
+
+def test_unknown_process_is_rejected():
+    with pytest.raises(ValueError):
+        arrival_process({'process': 'burst'})
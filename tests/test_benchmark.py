@@ -0,0 +1,26 @@
+import json
+from benchmark import *
+
+
+def test_fill_roads_places_cars_in_path_order():
+    simulation = manhattan_grid(2, 2).build_simulation(seed=0)
+    assert fill_roads(simulation, 0.25) > 0
+    for road in simulation.get_roads():
+        offsets = [car.get_offset() for car in road.get_cars()]
+        assert offsets == sorted(offsets, reverse=True)
+
+
+def test_run_case_reports_every_phase():
+    result = run_case(manhattan_grid(2, 2), 0.2, 20)
+    assert result['steps'] == 20 and result['initial_cars'] > 0
+    assert 'draw' not in result['phase_seconds']
+    assert result['car_steps'] >= result['initial_cars'] and result['counters']['car_moves'] > 0
+    json.dumps(result) #stored as json
+
+
+def test_compare_flags_slowdowns(tmp_path):
+    baseline_path = tmp_path / 'baseline.json'
+    baseline_path.write_text(json.dumps({'results': [{'scenario': 'a', 'density': 0.1, 'car_steps_per_second': 100.0},
+                                                     {'scenario': 'b', 'density': 0.1, 'car_steps_per_second': 100.0}]}))
+    results = [{'scenario': 'a', 'density': 0.1, 'car_steps_per_second': 95.0}, {'scenario': 'b', 'density': 0.1, 'car_steps_per_second': 50.0}]
+    assert [case['scenario'] for case in compare(results, str(baseline_path), 0.1)] == ['b']
@@ -0,0 +1,35 @@
+from car import *
+from clock import *
+
+
+def test_virtual_clock_jumps_through_events_in_order():
+    clock = VirtualClock()
+    for event_time in (3.0, 1.0, 2.0, 1.0):
+        clock.schedule(event_time)
+    clock.schedule(0.0) #not in the future, dropped
+    times = []
+    while clock.advance_to_next_event():
+        times.append(clock.now())
+    assert times == [1.0, 2.0, 3.0]
+    assert clock.next_event_time() is None
+
+
+def test_set_time_drops_passed_events():
+    clock = VirtualClock()
+    clock.set_events([0.5, 1.5, 2.5])
+    clock.set_time(2.0)
+    assert clock.get_events() == [2.5]
+
+
+def test_car_moves_on_injected_clock():
+    clock = VirtualClock()
+    path = [(0, 0), (0, 1), (0, 2)]
+    car = Car(velocity=0.5, path=path, current_pos=path[0], clock=clock)
+    assert not car.move()
+    clock.advance(0.5)
+    assert car.move()
+    assert car.get_current_pos() == (0, 1)
+    assert clock.next_event_time() == 1.0 #next move scheduled one velocity later
+    clock.advance_to_next_event()
+    assert car.move()
+    assert not car.can_move() #end of path
@@ -0,0 +1,31 @@
+from car import *
+from scenarios import *
+
+
+def crossing_simulation():
+    scenario = Scenario(name='crossing', spawn_rate=1000)
+    scenario.add_road('east', [(x, 5) for x in range(11)])
+    scenario.add_road('south', [(5, y) for y in range(11)])
+    return scenario.build_simulation()
+
+
+def test_one_collision_per_block_and_cars_removed():
+    simulation = crossing_simulation()
+    east, south = simulation.get_roads()
+    for road in (east, south):
+        road.add_car(Car(velocity=road.get_speed_limit()), 5)
+    east.add_car(Car(velocity=east.get_speed_limit()), 2)
+    assert simulation.check_for_collisions() == [(5, 5), (5, 5)]
+    assert simulation.get_collisions() == 1
+    assert [car.get_current_pos() for car in east.get_cars()] == [(2, 5)]
+    assert not south.get_cars()
+    assert not simulation.get_occupancy().get_conflicts()
+
+
+def test_no_block_holds_two_cars_after_a_step():
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=9, percentage_of_slowed_cars=1)
+    for _ in range(6000):
+        simulation.step()
+        positions = [car.get_current_pos() for road in simulation.get_roads() for car in road.get_cars()]
+        assert len(positions) == len(set(positions))
+    assert simulation.get_collisions() > 0
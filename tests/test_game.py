@@ -0,0 +1,20 @@
+import pytest
+from game import *
+
+
+@pytest.fixture
+def app():
+    pyg.init()
+    yield App(simulation=load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=1), sound=False)
+    pyg.quit()
+
+
+def test_simulated_time_keeps_pace_with_frames(app):
+    for _ in range(3 * FRAME_RATE):
+        app.advance(1 / FRAME_RATE)
+    assert app.simulation.get_time() == pytest.approx(3.0, abs=2 * app.simulation.get_dt()) #the rest of a step waits for the next frame
+
+
+def test_long_frame_is_capped(app):
+    app.advance(10.0)
+    assert app.simulation.get_time() == pytest.approx(MAX_FRAME_TIME, abs=app.simulation.get_dt())
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import pytest
+from generator import *
+from scenarios import *
+
+
+def run_generator(tmp_path, *args):
+    output = str(tmp_path / 'generated.json')
+    subprocess.run([sys.executable, 'generator.py', *map(str, args), '-o', output], cwd=os.path.dirname(sys.modules['generator'].__file__),
+                   check=True, capture_output=True)
+    return load_scenario(output, use_cache=False)
+
+
+def test_manhattan_grid_stops_streets_before_avenues():
+    scenario = manhattan_grid(3, 4)
+    roads = scenario.get_roads()
+    assert len(roads) == 7
+    avenues = [road for road in roads if road['name'].startswith('Avenue')]
+    streets = [road for road in roads if road['name'].startswith('Street')]
+    assert all(not road['stop_signs'] for road in avenues)
+    assert all(len(road['stop_signs']) == 3 for road in streets)
+    crossings = {pos for road in avenues for pos in road['path']}
+    for road in streets:
+        for sign in road['stop_signs']:
+            assert road['path'][road['path'].index(sign) + 1] in crossings
+
+
+@pytest.mark.parametrize('layout, size, road_count', [('manhattan', [3], 6), ('manhattan', [2, 3], 5), ('arterial', [2], 6), ('random', [5], 5)])
+def test_cli_sizes(tmp_path, layout, size, road_count):
+    assert len(run_generator(tmp_path, layout, *size, '--seed', 1).get_roads()) == road_count
+
+
+def test_cli_rejects_extra_sizes(tmp_path):
+    with pytest.raises(subprocess.CalledProcessError):
+        run_generator(tmp_path, 'random', 5, 6)
@@ -0,0 +1,29 @@
+from instrumentation import *
+from scenarios import *
+
+
+def test_instrumented_run_matches_plain_run():
+    scenario = load_scenario(DEFAULT_SCENARIO, use_cache=False)
+    instrumentation = Instrumentation()
+    timed = scenario.build_simulation(seed=6, instrumentation=instrumentation)
+    plain = scenario.build_simulation(seed=6)
+    timed.run(60)
+    plain.run(60)
+    assert (timed.get_collisions(), timed.get_completed_trips()) == (plain.get_collisions(), plain.get_completed_trips())
+    assert instrumentation.get_frames() == timed.get_ticks()
+    assert instrumentation.get_counters()['collisions'] == timed.get_collisions()
+    assert instrumentation.get_counters()['car_moves'] > 0
+    assert sum(count for _, count in instrumentation.get_histogram()) == instrumentation.get_frames()
+
+
+def test_histogram_buckets_and_exports():
+    instrumentation = Instrumentation(buckets=(0.001, 0.01))
+    for seconds in (0.0005, 0.001, 0.005, 0.5):
+        instrumentation.observe_frame(seconds)
+    instrumentation.count('collisions', 2)
+    assert instrumentation.get_histogram() == [(0.001, 2), (0.01, 1), (float('inf'), 1)]
+    prometheus = instrumentation.to_prometheus()
+    assert 'traffic_frame_seconds_bucket{le="0.01"} 3' in prometheus
+    assert 'traffic_frame_seconds_bucket{le="+Inf"} 4' in prometheus
+    assert 'traffic_collisions_total 2' in prometheus
+    assert 'counter,collisions,2' in instrumentation.to_csv()
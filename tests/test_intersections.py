@@ -0,0 +1,22 @@
+import itertools
+from generator import *
+from intersections import *
+
+
+def test_index_matches_brute_force_pairs():
+    paths = [road['path'] for road in random_planar(12, 30, 30, seed=4).get_roads()]
+    index = IntersectionIndex(paths)
+    for i, j in itertools.combinations(range(len(paths)), 2):
+        expected = sorted(set(paths[i]) & set(paths[j]))
+        assert sorted(pos for pos, _, _ in index.get_shared_cells(i, j)) == expected
+        for pos, offset_i, offset_j in index.get_shared_cells(i, j):
+            assert (paths[i].index(pos), paths[j].index(pos)) == (offset_i, offset_j)
+        assert (j in index.get_neighbours(i)) == bool(expected)
+    assert index.get_conflict_cells() == {pos for i, j in itertools.combinations(range(len(paths)), 2) for pos in set(paths[i]) & set(paths[j])}
+
+
+def test_each_pair_is_listed_once():
+    paths = [[(0, 0), (1, 0), (2, 0)], [(1, 1), (1, 0), (1, -1)], [(1, 2), (1, 0), (1, 3)]]
+    index = IntersectionIndex(paths)
+    assert sorted(index.get_pairs()) == [(0, 1), (0, 2), (1, 2)]
+    assert index.get_roads_at((1, 0)) == [(0, 1), (1, 1), (2, 1)]
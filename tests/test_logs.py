@@ -0,0 +1,52 @@
+import io
+import json
+import logging
+import pytest
+from logs import *
+from scenarios import *
+
+
+@pytest.fixture(autouse=True)
+def reset_logger():
+    yield
+    for handler in list(LOGGER.handlers):
+        LOGGER.removeHandler(handler)
+    LOGGER.setLevel(logging.NOTSET)
+
+
+def run_logged(**options):
+    stream = io.StringIO()
+    listener = configure_logging(stream=stream, **options)
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=9, percentage_of_slowed_cars=1)
+    simulation.run(120)
+    listener.stop() #flushes the queue
+    return simulation, stream.getvalue().splitlines()
+
+
+def test_structured_log_has_one_entry_per_collision_and_removal():
+    simulation, lines = run_logged(level='DEBUG', structured=True)
+    kinds = [json.loads(line).get('kind') for line in lines]
+    assert simulation.get_collisions() > 0
+    assert kinds.count(CollisionEvent.kind) == simulation.get_collisions()
+    assert kinds.count(CarRemovedEvent.kind) >= 2 * simulation.get_collisions()
+
+
+def test_info_level_leaves_out_removals():
+    simulation, lines = run_logged(level='INFO')
+    assert len(lines) == simulation.get_collisions()
+
+
+def test_rate_limit_keeps_a_burst_per_kind_and_counts_the_rest():
+    now = [0.0]
+    limit = RateLimitFilter(2, clock=lambda: now[0])
+    records = [logging.LogRecord('test', logging.INFO, '', 0, CollisionEvent((0, 0)), None, None) for _ in range(5)]
+    assert [limit.filter(record) for record in records] == [True, True, False, False, False]
+    now[0] = 1.0
+    assert limit.filter(records[0]) and records[0].suppressed == 3
+    assert limit.get_suppressed() == 3
+
+
+def test_sampling_keeps_plain_messages():
+    sampling = SamplingFilter(0, seed=1)
+    assert sampling.filter(logging.LogRecord('test', logging.INFO, '', 0, 'plain', None, None))
+    assert not sampling.filter(logging.LogRecord('test', logging.INFO, '', 0, CollisionEvent((0, 0)), None, None))
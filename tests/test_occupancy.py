@@ -0,0 +1,38 @@
+from occupancy import *
+from scenarios import *
+
+
+def test_conflicts_track_shared_blocks():
+    grid = OccupancyGrid()
+    grid.add('a', 'road 1', (0, 0))
+    grid.add('b', 'road 2', (0, 0))
+    assert grid.get_conflicts() == {(0, 0)}
+    grid.move('b', 'road 2', (0, 0), (0, 1))
+    assert not grid.get_conflicts()
+    assert grid.get_occupants((0, 1)) == [('b', 'road 2')]
+    grid.remove('a', 'road 1', (0, 0))
+    assert not grid.is_occupied((0, 0))
+
+
+def test_grid_matches_cars_on_roads():
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=4)
+    for _ in range(20):
+        simulation.run(1)
+        expected = {}
+        for road in simulation.get_roads():
+            for car in road.get_cars():
+                expected.setdefault(car.get_current_pos(), set()).add((car, road))
+        cells = {pos: set(occupants) for pos, occupants in simulation.get_occupancy().get_cells().items() if occupants}
+        assert cells == expected
+
+
+def test_look_ahead_matches_scan_of_every_car():
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=4)
+    simulation.run(15)
+    taken = {car.get_current_pos() for road in simulation.get_roads() for car in road.get_cars()}
+    for road in simulation.get_roads():
+        path = road.get_path()
+        for car in road.get_cars():
+            offset = car.get_offset()
+            ahead = path[offset + 1:offset + 4]
+            assert road.detect_cars(car.get_current_pos(), 2, car=car) == any(pos in taken for pos in ahead)
@@ -0,0 +1,26 @@
+import pytest
+from generator import *
+from partition import *
+
+
+def test_regions_cover_every_road_once():
+    roads = manhattan_grid(4, 4).get_roads()
+    regions = partition_roads(roads, 3)
+    assert sorted(index for region in regions for index in region) == list(range(len(roads)))
+    cells = boundary_cells(roads, regions)
+    region_of = {index: r for r, region in enumerate(regions) for index in region}
+    for cell in cells:
+        owners = {region_of[i] for i, road in enumerate(roads) if cell in road['path']}
+        assert len(owners) > 1
+
+
+def test_every_mode_gives_the_same_results():
+    scenario = manhattan_grid(4, 4, seed=3)
+    results = {}
+    for mode in PARTITION_MODES:
+        with PartitionedSimulation(scenario, 3, mode, seed=5) as simulation:
+            simulation.run(20)
+            results[mode] = (simulation.get_collisions(), simulation.get_completed_trips(), simulation.get_cars(), simulation.get_time())
+    assert len(set(results.values())) == 1
+    assert results['serial'][1] > 0
+    assert results['serial'][3] == pytest.approx(20)
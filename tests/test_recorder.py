@@ -0,0 +1,83 @@
+import pytest
+from car import *
+from recorder import *
+from replay import *
+from scenarios import *
+
+
+def record(file_path, ticks, **options):
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=2)
+    expected = {}
+    with Recorder(file_path, simulation.get_roads(), **options) as recorder:
+        simulation.set_recorder(recorder)
+        for _ in range(ticks):
+            simulation.step()
+            expected[simulation.get_ticks()] = (simulation.get_collisions(),
+                                                [sorted(car.get_offset() for car in road.get_cars()) for road in simulation.get_roads()])
+    return simulation, expected
+
+
+def test_trace_holds_every_tick(tmp_path):
+    file_path = str(tmp_path / 'run.tfst')
+    simulation, expected = record(file_path, 3000, chunk_ticks=100, block=True)
+    with TraceReader(file_path) as reader:
+        assert reader.get_chunk_count() == 30
+        assert reader.get_tick_range() == (1, 3000)
+        assert [road['path'] for road in reader.get_scenario().get_roads()] == [road.get_path() for road in simulation.get_roads()]
+        for recorded in reader.iter_ticks(0, 3000):
+            assert (recorded['collisions'], recorded['offsets']) == expected[recorded['tick']]
+
+
+def test_spawn_and_end_events_are_recorded(tmp_path):
+    file_path = str(tmp_path / 'run.tfst')
+    simulation, _ = record(file_path, 3000)
+    with TraceReader(file_path) as reader:
+        kinds = [kind for recorded in reader.iter_ticks(0, 3000) for kind, _, _ in recorded['events']]
+    assert kinds.count(EVENT_END) == simulation.get_completed_trips()
+    assert kinds.count(EVENT_SPAWN) >= simulation.get_completed_trips()
+
+
+def test_every_records_every_nth_tick(tmp_path):
+    file_path = str(tmp_path / 'run.tfst')
+    record(file_path, 1000, every=10)
+    with TraceReader(file_path) as reader:
+        assert [recorded['tick'] for recorded in reader.iter_ticks(0, 1000)] == list(range(10, 1001, 10))
+
+
+def test_roads_sharing_a_path_list_keep_their_own_events(tmp_path):
+    file_path = str(tmp_path / 'run.tfst')
+    path = [(x, 5) for x in range(11)]
+    roads = [RoadNetwork(path=path, start=path[0], end=path[-1]), RoadNetwork(path=path, start=path[0], end=path[-1])]
+    simulation = Simulation(roads, spawn_rate=1000)
+    with Recorder(file_path, roads) as recorder:
+        car = Car()
+        roads[1].add_car(car)
+        recorder.event(EVENT_SPAWN, roads[1], car)
+        recorder.record_tick(simulation)
+    with TraceReader(file_path) as reader:
+        [recorded] = reader.iter_ticks(-1, 0)
+    assert recorded['events'] == [(EVENT_SPAWN, 1, 0)]
+    assert recorded['offsets'] == [[], [0]]
+
+
+def full_disk(*args):
+    raise OSError('no space left on device')
+
+
+def test_write_error_stops_recording_without_hanging(tmp_path, monkeypatch):
+    monkeypatch.setattr(zlib, 'compress', full_disk)
+    file_path = str(tmp_path / 'run.tfst')
+    with pytest.raises(OSError):
+        record(file_path, 500, chunk_ticks=10, queue_size=1, block=True)
+
+
+def test_writer_errors_are_counted_as_dropped_ticks(tmp_path, monkeypatch):
+    monkeypatch.setattr(zlib, 'compress', full_disk)
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=2)
+    recorder = Recorder(str(tmp_path / 'run.tfst'), simulation.get_roads(), chunk_ticks=10, queue_size=1)
+    simulation.set_recorder(recorder)
+    simulation.run(5) #500 ticks, the step loop never waits on the failed writer
+    with pytest.raises(OSError):
+        recorder.close()
+    assert isinstance(recorder.get_error(), OSError)
+    assert recorder.get_dropped() == simulation.get_ticks()
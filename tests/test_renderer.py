@@ -0,0 +1,36 @@
+import pytest
+from renderer import *
+from scenarios import *
+
+
+@pytest.fixture
+def renderer():
+    pyg.init()
+    renderer = Renderer(pyg.display.set_mode((WIDTH, HEIGHT)))
+    yield renderer
+    pyg.quit()
+
+
+def test_only_changed_blocks_are_redrawn(renderer):
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=1)
+    roads = simulation.get_roads()
+    renderer.draw_roads(roads)
+    renderer.draw_background()
+    simulation.run(5)
+
+    dirty_rects = renderer.render_frame(roads, [], simulation.get_collisions())
+    cars = [car for road in roads for car in road.get_cars()]
+    assert cars
+    for car in cars:
+        rect = renderer.block_rect(car.get_current_pos())
+        assert rect in dirty_rects
+        assert renderer.screen.get_at(rect.center) == pyg.Color(CAR_COLOR)
+    assert renderer.render_frame(roads, [], simulation.get_collisions()) == [] #nothing moved
+
+
+def test_crash_block_stays_until_a_car_passes(renderer):
+    renderer.draw_background()
+    crash = (3, 3)
+    renderer.render_frame([], [crash], 1)
+    assert renderer.screen.get_at(renderer.block_rect(crash).center) == pyg.Color(CRASH_COLOR)
+    assert renderer.render_frame([], [], 1) == []
@@ -0,0 +1,50 @@
+import pygame as pyg
+import pytest
+from recorder import *
+from replay import *
+from scenarios import *
+
+
+@pytest.fixture
+def trace(tmp_path):
+    file_path = str(tmp_path / 'run.tfst')
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=3)
+    with Recorder(file_path, simulation.get_roads(), chunk_ticks=64) as recorder:
+        simulation.set_recorder(recorder)
+        simulation.run(40)
+    return file_path
+
+
+def test_scanned_index_matches_footer_index(trace):
+    with open(trace, 'rb') as file:
+        data = file.read()
+    unclosed = trace + '.unclosed'
+    with open(unclosed, 'wb') as file: #footer and index lost, last chunk cut off as if the run crashed mid write
+        file.write(data[:data.rindex(INDEX_MAGIC) - 10])
+    with TraceReader(trace) as closed, TraceReader(unclosed) as crashed:
+        assert crashed.get_chunk_count() == closed.get_chunk_count() - 1
+        last_tick = crashed.get_tick_range()[1]
+        assert list(crashed.iter_ticks(0, last_tick)) == list(closed.iter_ticks(0, last_tick))
+
+
+def test_seeking_finds_last_tick_at_or_before(trace):
+    with TraceReader(trace) as reader:
+        assert reader.get_tick(0) is None
+        assert reader.get_tick(1000)['tick'] == 1000
+        assert reader.find_time(10.005)['tick'] == 1000
+        assert reader.get_tick(10 ** 9)['tick'] == reader.get_tick_range()[1]
+        backwards = [reader.get_tick(tick)['tick'] for tick in range(4000, 0, -397)] #scrubbing back through evicted chunks
+        assert backwards == list(range(4000, 0, -397))
+
+
+def test_replay_shows_recorded_cars(trace):
+    pyg.init()
+    try:
+        with TraceReader(trace) as reader:
+            replay = Replay(reader)
+            replay.seek(20)
+            replay.advance_to(30)
+            record = replay.get_current()
+            assert record['tick'] == reader.find_time(30)['tick']
+    finally:
+        pyg.quit()
@@ -0,0 +1,85 @@
+import pytest
+from car import *
+from clock import *
+from reservations import *
+from road_network import *
+from scenarios import *
+
+
+def crossing():
+    clock = VirtualClock()
+    roads = [RoadNetwork(path=[(x, 2) for x in range(6)], start=(0, 2), end=(5, 2), clock=clock),
+             RoadNetwork(path=[(2, y) for y in range(6)], start=(2, 0), end=(2, 5), clock=clock)]
+    return roads, clock, ReservationManager([(2, 2)], clock)
+
+
+def car_before_crossing(road, clock):
+    car = Car(velocity=1.0, clock=clock)
+    road.add_car(car, 1)
+    return car
+
+
+def test_second_car_waits_until_the_booking_clears():
+    roads, clock, manager = crossing()
+    first, second = car_before_crossing(roads[0], clock), car_before_crossing(roads[1], clock)
+    assert manager.request(first, roads[0]) is None
+    assert manager.request(first, roads[0]) is None #already booked
+    assert manager.request(second, roads[1]) == RESERVATION_HOLD
+    clock.set_time(RESERVATION_HOLD)
+    assert manager.request(second, roads[1]) is None
+    assert manager.get_stats() == {'granted': 2, 'refused': 1, 'bookings': 1} #the first booking ran out and was dropped
+    assert [car for _, _, car in manager.get_table((2, 2))] == [second]
+
+
+def test_cars_off_shared_blocks_do_not_book():
+    roads, clock, manager = crossing()
+    car = Car(velocity=1.0, clock=clock)
+    roads[0].add_car(car, 3)
+    assert manager.request(car, roads[0]) is None
+    assert manager.get_stats()['bookings'] == 0
+
+
+
+def test_car_held_up_past_its_slot_does_not_enter_a_block_booked_since():
+    clock = VirtualClock()
+    main = RoadNetwork(path=[(x, 2) for x in range(8)], start=(0, 2), end=(7, 2), clock=clock)
+    side = RoadNetwork(path=[(4, y) for y in range(6)], start=(4, 0), end=(4, 5), clock=clock)
+    manager = ReservationManager([(3, 2), (4, 2), (5, 2)], clock)
+    late, other = Car(velocity=1.0, clock=clock), Car(velocity=1.0, clock=clock)
+    main.add_car(late, 2)
+    side.add_car(other, 1)
+    assert manager.request(late, main) is None #books (3, 2), (4, 2) and (5, 2)
+    late.set_offset(3) #then waits in (3, 2) until its (4, 2) slot ran out, while its (5, 2) slot still runs
+    clock.set_time(3.5)
+    assert manager.request(other, side) is None
+    assert manager.request(late, main) == 5.5
+    assert [car for _, _, car in manager.get_table((4, 2))] == [other]
+
+
+def test_admission_with_many_bookings_on_a_block():
+    clock = VirtualClock()
+    road = RoadNetwork(path=[(x, 0) for x in range(301)], start=(0, 0), end=(300, 0), clock=clock)
+    manager = ReservationManager(road.get_path()[1:], clock, depth=300)
+    for k in range(200): #every car books the whole road two move times after the one before it, right behind its slots
+        clock.set_time(2 * k)
+        car = Car(velocity=1.0, clock=clock)
+        road.add_car(car, 0)
+        assert manager.request(car, road) is None
+    table = manager.get_table((300, 0))
+    assert len(table) == 151 #slots that ended by time 398 were dropped from the front
+    assert all(end <= next_start for (_, end, _), (next_start, _, _) in zip(table, table[1:]))
+    clock.set_time(399)
+    car = Car(velocity=1.0, clock=clock)
+    road.add_car(car, 0)
+    assert manager.request(car, road) == 400 #overlaps the second half of the first slot of the car that asked at 398
+
+
+@pytest.mark.parametrize('jump_to_events', [False, True])
+def test_event_mode_matches_polling_with_reservations(jump_to_events):
+    scenario = load_scenario(DEFAULT_SCENARIO, use_cache=False)
+    polling = scenario.build_simulation(seed=7, reservations=True)
+    event = scenario.build_simulation(seed=7, event_driven=True, reservations=True)
+    polling.run(300, jump_to_events=jump_to_events)
+    event.run(300, jump_to_events=jump_to_events)
+    assert (event.get_collisions(), event.get_completed_trips()) == (polling.get_collisions(), polling.get_completed_trips())
+    assert event.get_reservations().get_stats()['granted'] == polling.get_reservations().get_stats()['granted']
@@ -0,0 +1,53 @@
+from clock import *
+from car import *
+from road_network import *
+from scenarios import *
+
+
+def test_get_offset_uses_first_occurrence():
+    path = [(0, 0), (0, 1), (1, 1), (0, 1), (0, 2)]
+    road = RoadNetwork(path=path, start=path[0], end=path[-1])
+    assert road.get_offset((0, 1)) == 1
+    assert road.get_offset((5, 5)) is None
+
+
+def test_car_offsets_follow_current_position():
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=2)
+    for _ in range(20):
+        simulation.run(1)
+        for road in simulation.get_roads():
+            for car in road.get_cars():
+                assert road.get_path()[car.get_offset()] == car.get_current_pos()
+                assert car.get_offset() == road.get_offset(car.get_current_pos())
+
+
+def straight_road(length=10):
+    path = [(0, i) for i in range(length)]
+    return RoadNetwork(path=path, start=path[0], end=path[-1], clock=VirtualClock())
+
+
+def test_remove_car_from_the_middle_relinks_neighbours():
+    road = straight_road()
+    cars = [Car() for _ in range(3)]
+    for offset, car in zip((6, 4, 2), cars):
+        road.add_car(car, offset)
+    first, middle, last = cars
+    road.remove_car(middle)
+    assert list(road.get_cars()) == [first, last]
+    assert len(road.get_cars()) == 2
+    assert last.get_leader() is first and first.get_follower() is last
+    assert middle.get_leader() is None and middle.get_follower() is None
+    road.remove_car(first)
+    assert last.get_leader() is None and road.get_cars().get_first() is last
+
+
+def test_enter_car_keeps_path_order():
+    road = straight_road()
+    ahead, behind = Car(), Car()
+    road.add_car(ahead, 7)
+    road.add_car(behind, 1)
+    turning = Car()
+    road.enter_car(turning, 4)
+    assert list(road.get_cars()) == [ahead, turning, behind]
+    assert turning.get_leader() is ahead and behind.get_leader() is turning
+    assert road.get_cars().get_last() is behind
@@ -0,0 +1,39 @@
+from generator import *
+from intersections import *
+from routing import *
+
+
+def planner_for(scenario):
+    roads = scenario.build_roads()
+    return roads, RoutePlanner(roads, IntersectionIndex([road.get_path() for road in roads]))
+
+
+def connected_pair(roads, planner):
+    for origin in range(len(roads)):
+        for destination in range(len(roads)):
+            route = planner.get_route(origin, destination)
+            if origin != destination and route and len({leg[0] for leg in route}) > 2:
+                return origin, destination, route
+
+
+def test_routes_are_continuous_and_cached():
+    roads, planner = planner_for(manhattan_grid(3, 3, seed=1))
+    origin, destination, route = connected_pair(roads, planner)
+    assert route[0][0] == origin and route[-1][0] == destination
+    assert route[-1][2] == len(roads[destination].get_path()) - 1
+    for (road, _, exit_offset), (next_road, entry_offset, _) in zip(route, route[1:]):
+        assert roads[road].get_path()[exit_offset] == roads[next_road].get_path()[entry_offset]
+    hits = planner.get_cache_stats()['hits']
+    assert planner.get_route(origin, destination) is route
+    assert planner.get_cache_stats()['hits'] == hits + 1
+
+
+def test_closed_road_is_routed_around():
+    roads, planner = planner_for(manhattan_grid(3, 3, seed=1))
+    origin, destination, route = connected_pair(roads, planner)
+    middle = route[1][0]
+    planner.close_road(middle)
+    detour = planner.get_route(origin, destination)
+    assert detour is None or middle not in {leg[0] for leg in detour}
+    planner.open_road(middle)
+    assert planner.get_route(origin, destination) == route
@@ -0,0 +1,42 @@
+import os
+import struct
+import pytest
+from scenarios import *
+
+
+def routed_scenario():
+    scenario = Scenario(name='routed', seed=5, duration=30)
+    scenario.add_road('east', [(x, 2) for x in range(8)], stop_signs=[(3, 2)], stop_rule='yield', arrivals={'process': 'poisson', 'rate': 0.5})
+    scenario.add_road('south', [(3, y) for y in range(8)], speed_limit=0.2, stop_signs=[(3, 1)])
+    scenario.add_demand(0, 1, 2)
+    return scenario
+
+
+def test_binary_round_trip_keeps_every_field():
+    scenario = routed_scenario()
+    assert decode_binary(encode_binary(scenario)).to_dict() == scenario.to_dict()
+
+
+def test_other_binary_versions_are_rejected():
+    data = bytearray(encode_binary(routed_scenario()))
+    struct.pack_into('<H', data, 4, BINARY_VERSION - 1)
+    with pytest.raises(ValueError):
+        decode_binary(bytes(data))
+
+
+def test_cache_follows_source_and_version(tmp_path):
+    file_path = str(tmp_path / 'routed.json')
+    save_scenario(routed_scenario(), file_path)
+    assert load_scenario(file_path).to_dict() == routed_scenario().to_dict()
+    cache_path = tmp_path / SCENARIO_CACHE_DIR / f"routed.json.v{BINARY_VERSION}.tfsb"
+    assert cache_path.exists()
+
+    edited = routed_scenario()
+    edited.add_demand(1, 0)
+    save_scenario(edited, file_path)
+    os.utime(file_path, ns=(0, 0)) #older than the cached copy, still has to be read again
+    assert load_scenario(file_path).get_demand() == edited.get_demand()
+
+    cache_path.write_bytes(b'TFSB') #damaged copy with a matching name and time
+    os.utime(cache_path, ns=(0, 0))
+    assert load_scenario(file_path).get_demand() == edited.get_demand()
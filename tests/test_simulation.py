@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import pytest
+from scenarios import *
+from simulation import *
+
+
+def results(simulation):
+    return simulation.get_collisions(), simulation.get_completed_trips(), simulation.get_mean_travel_time()
+
+
+def test_simulation_imports_without_pygame():
+    code = "import sys, simulation; assert 'pygame' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(sys.modules['simulation'].__file__), check=True)
+
+
+def test_step_advances_virtual_clock_by_dt():
+    simulation = load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=1)
+    for _ in range(250):
+        simulation.step()
+    assert simulation.get_ticks() == 250
+    assert simulation.get_time() == pytest.approx(250 * simulation.get_dt())
+
+
+def test_seeded_runs_are_reproducible():
+    scenario = load_scenario(DEFAULT_SCENARIO, use_cache=False)
+    first = scenario.build_simulation(seed=3)
+    second = scenario.build_simulation(seed=3)
+    first.run(60)
+    second.run(60)
+    assert results(first) == results(second)
+    assert first.get_completed_trips() > 0
@@ -0,0 +1,74 @@
+import struct
+import pytest
+from generator import *
+from snapshot import *
+
+
+def routed_grid():
+    scenario = manhattan_grid(3, 3, seed=1)
+    random_demand(scenario, 4, 1)
+    poisson_arrivals(scenario, 0.3)
+    for road in scenario.get_roads():
+        road['stop_rule'] = 'yield'
+    return scenario
+
+
+def state(simulation):
+    return (simulation.get_collisions(), simulation.get_completed_trips(), simulation.get_ticks(), simulation.get_time(),
+            [[(car.get_offset(), car.get_stop_state(), car.start_time) for car in road.get_cars()] for road in simulation.get_roads()])
+
+
+@pytest.mark.parametrize('jump_to_events', [False, True])
+@pytest.mark.parametrize('event_driven', [False, True])
+@pytest.mark.parametrize('scenario', [load_scenario(DEFAULT_SCENARIO, use_cache=False), routed_grid()], ids=lambda scenario: scenario.get_name())
+def test_restored_run_continues_like_the_original(scenario, event_driven, jump_to_events):
+    original = scenario.build_simulation(seed=7, event_driven=event_driven)
+    original.run(60, jump_to_events=jump_to_events)
+    restored = decode_snapshot(encode_snapshot(original))
+    assert type(restored) is type(original)
+    assert state(restored) == state(original)
+    original.run(60, jump_to_events=jump_to_events)
+    restored.run(60, jump_to_events=jump_to_events)
+    assert state(restored) == state(original)
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+@pytest.mark.parametrize('scenario', [load_scenario(DEFAULT_SCENARIO, use_cache=False), routed_grid()], ids=lambda scenario: scenario.get_name())
+def test_reservation_bookings_are_restored(scenario, event_driven):
+    original = scenario.build_simulation(seed=7, event_driven=event_driven, reservations=True)
+    original.run(60, jump_to_events=True)
+    assert original.get_reservations().get_stats()['bookings']
+    restored = decode_snapshot(encode_snapshot(original))
+    assert restored.get_reservations().get_stats() == original.get_reservations().get_stats()
+    original.run(120, jump_to_events=True)
+    restored.run(120, jump_to_events=True)
+    assert state(restored) == state(original)
+    assert restored.get_reservations().get_stats() == original.get_reservations().get_stats()
+
+
+def test_forks_repeat_or_branch(tmp_path):
+    original = routed_grid().build_simulation(seed=7)
+    original.run(30)
+    save_snapshot(original, str(tmp_path / 'warm.tfss'))
+    same, branch = fork(original, 2, seeds=None)[0], load_snapshot(str(tmp_path / 'warm.tfss'), seed=99)
+    for simulation in (original, same, branch):
+        simulation.run(60)
+    assert state(same) == state(original)
+    assert state(branch) != state(original)
+
+
+def test_forks_keep_reservations():
+    original = routed_grid().build_simulation(seed=7, reservations=True)
+    original.run(30)
+    copies = fork(original, 2)
+    for simulation in [original] + copies:
+        simulation.run(60)
+    assert all(state(copy) == state(original) for copy in copies)
+    assert all(copy.get_reservations().get_stats() == original.get_reservations().get_stats() for copy in copies)
+
+
+def test_other_versions_are_rejected():
+    data = bytearray(encode_snapshot(load_scenario(DEFAULT_SCENARIO, use_cache=False).build_simulation(seed=1)))
+    struct.pack_into('<H', data, 4, SNAPSHOT_VERSION + 1)
+    with pytest.raises(ValueError):
+        decode_snapshot(bytes(data))
@@ -0,0 +1,29 @@
+import pygame as pyg
+import pytest
+from sound import *
+
+
+@pytest.fixture
+def mixer():
+    yield
+    pyg.mixer.quit()
+
+
+def test_headless_runs_are_silent():
+    sound = CrashSound()
+    assert not sound.is_enabled()
+    sound.play(3)
+    assert sound.get_cues() == 0
+
+
+def test_one_cue_per_call_on_a_channel_pool(mixer):
+    sound = CrashSound(enabled=True, channels=2)
+    assert sound.is_enabled()
+    sound.play(0) #a frame without crashes
+    for crashes in (1, 5, 2, 1):
+        sound.play(crashes)
+    assert sound.get_cues() == 4
+
+
+def test_missing_file_disables_sound(mixer, tmp_path):
+    assert not CrashSound(str(tmp_path / 'missing.mp3'), enabled=True).is_enabled()
@@ -0,0 +1,44 @@
+from clock import *
+from road_network import *
+from spawner import *
+
+
+class FixedRoutes:
+
+    def __init__(self, routes) -> None:
+        self.requested = []
+        self.routes = routes
+
+    def get_route(self, origin, destination):
+        self.requested.append((origin, destination))
+        return self.routes.get((origin, destination))
+
+
+def roads(count, clock):
+    return [RoadNetwork(path=[(i, j) for j in range(5)], start=(i, 0), end=(i, 4), clock=clock) for i in range(count)]
+
+
+def test_arrivals_draw_destinations_of_their_own_origin():
+    clock = VirtualClock()
+    planner = FixedRoutes({(0, 1): ((0, 0, 4),), (0, 2): ((0, 0, 4),)})
+    spawner = Spawner(clock=clock, seed=1, demand=[(1, 2, 5.0), (0, 1, 1.0), (0, 2, 1.0)], route_planner=planner,
+                      arrivals={0: {'process': 'headway', 'headway': 1.0}})
+    network = roads(3, clock)
+    for step in range(1, 30):
+        clock.set_time(step)
+        for car in spawner.spawn_cars(network):
+            network[0].remove_car(car)
+    assert len(planner.requested) == 29
+    assert {pair for pair in planner.requested} == {(0, 1), (0, 2)}
+
+
+def test_unrouted_pair_places_no_car_in_either_mode():
+    demand = [(0, 1, 1.0)]
+    for arrivals in (None, {0: {'process': 'headway', 'headway': 1.0}}):
+        clock = VirtualClock()
+        spawner = Spawner(clock=clock, spawn_rate=1.0, seed=1, demand=demand, route_planner=FixedRoutes({}), arrivals=arrivals)
+        network = roads(2, clock)
+        for step in range(1, 10):
+            clock.set_time(step)
+            assert spawner.spawn_cars(network) == []
+        assert not spawner.get_backlog()
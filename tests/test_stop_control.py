@@ -0,0 +1,93 @@
+import json
+import pytest
+from car import *
+from clock import *
+from intersections import *
+from scenarios import *
+from stop_control import *
+
+
+def junction(rule):
+    scenario = Scenario(name='junction', width=10, height=10)
+    scenario.add_road('main', [(x, 2) for x in range(10)])
+    scenario.add_road('side', [(5, y) for y in range(5)], stop_signs=[(5, 1)], stop_duration=2, stop_rule=rule)
+    clock = VirtualClock()
+    roads = scenario.build_roads()
+    for road in roads:
+        road.set_clock(clock)
+    roads[1].set_occupancy(roads[0].get_occupancy())
+    controller = StopController(roads, IntersectionIndex([road.get_path() for road in roads]), clock)
+    return roads, clock, controller
+
+
+def stop_side_car(roads, clock, controller):
+    car = Car(clock=clock)
+    roads[1].add_car(car, 1)
+    assert controller.stop_cars() == [(car, roads[1])]
+    return car
+
+
+def test_sign_at_the_end_of_a_road_is_a_plain_stop():
+    scenario = Scenario(name='end', width=10, height=10)
+    scenario.add_road('side', [(5, y) for y in range(5)], stop_signs=[(5, 1), (5, 4)], stop_rule='yield')
+    roads = scenario.build_roads()
+    controller = StopController(roads, IntersectionIndex([road.get_path() for road in roads]), VirtualClock())
+    assert controller.get_rule(0, 1) == 'yield' and controller.get_rule(0, 4) == 'stop'
+
+
+def test_stop_waits_for_its_duration():
+    roads, clock, controller = junction('stop')
+    car = stop_side_car(roads, clock, controller)
+    clock.set_time(1.5)
+    assert controller.release_cars() == []
+    clock.set_time(2.0)
+    assert controller.release_cars() == [(car, roads[1])]
+    assert not car.get_stop_state()
+
+
+def test_yield_waits_for_a_gap_on_the_main_road():
+    roads, clock, controller = junction('yield')
+    main_car = Car(clock=clock)
+    roads[0].add_car(main_car, 3) #two blocks before the merge
+    car = stop_side_car(roads, clock, controller)
+    assert controller.release_cars() == []
+    assert controller.get_waiting() == 1
+    roads[0].remove_car(main_car)
+    clock.set_time(0.5)
+    assert controller.release_cars() == [(car, roads[1])]
+
+
+def test_all_way_lets_the_first_arrival_go_once_the_crossing_is_clear():
+    roads, clock, controller = junction('all_way')
+    car = stop_side_car(roads, clock, controller)
+    blocker = Car(clock=clock)
+    roads[0].add_car(blocker, 5) #on the crossing
+    clock.set_time(2.0)
+    assert controller.release_cars() == []
+    roads[0].remove_car(blocker)
+    clock.set_time(2.5)
+    assert controller.release_cars() == [(car, roads[1])]
+
+
+@pytest.mark.parametrize('rule', STOP_RULES)
+def test_rules_survive_binary_and_json_round_trips(rule):
+    scenario = load_scenario(DEFAULT_SCENARIO, use_cache=False)
+    for road in scenario.get_roads():
+        if road['stop_signs']:
+            road['stop_rule'] = rule
+    expected = [road['stop_rule'] for road in scenario.get_roads()]
+    assert [road['stop_rule'] for road in decode_binary(encode_binary(scenario)).get_roads()] == expected
+    assert [road['stop_rule'] for road in scenario_from_dict(json.loads(json.dumps(scenario.to_dict()))).get_roads()] == expected
+
+
+@pytest.mark.parametrize('rule', STOP_RULES)
+def test_event_mode_matches_polling_for_every_rule(rule):
+    scenario = load_scenario(DEFAULT_SCENARIO, use_cache=False)
+    for road in scenario.get_roads():
+        if road['stop_signs']:
+            road['stop_rule'] = rule
+    polling = scenario.build_simulation(seed=7)
+    event = scenario.build_simulation(seed=7, event_driven=True)
+    polling.run(300)
+    event.run(300)
+    assert (event.get_collisions(), event.get_completed_trips()) == (polling.get_collisions(), polling.get_completed_trips())
@@ -0,0 +1,66 @@
+import json
+import os
+import pytest
+from sweep import *
+
+
+def finished_results(output_path):
+    results = []
+    with open(output_path) as file:
+        for line in file:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+def test_sweep_matches_single_runs_and_resumes(tmp_path):
+    output_path = str(tmp_path / 'results.jsonl')
+    parameters = {'spawn_rate': [0.5, 1.0]}
+    summary = run_sweep(DEFAULT_SCENARIO, parameters, range(2), 20, output_path, workers=2)
+    results = finished_results(output_path)
+    assert len(results) == 4 and [row['runs'] for row in summary] == [2, 2]
+    for result in results:
+        simulation = load_scenario(DEFAULT_SCENARIO).build_simulation(seed=result['seed'], **result['params'])
+        simulation.run(20, jump_to_events=True)
+        assert (result['collisions'], result['completed_trips']) == (simulation.get_collisions(), simulation.get_completed_trips())
+
+    with open(output_path) as file:
+        kept = file.readlines()[:3]
+    with open(output_path, 'w') as file: #crashed halfway through writing the last run
+        file.writelines(kept)
+        file.write('{"params": ')
+    run_sweep(DEFAULT_SCENARIO, parameters, range(2), 20, output_path, workers=2)
+    resumed = finished_results(output_path)
+    assert len(resumed) == 4
+    assert {run_key(result['params'], result['seed']) for result in resumed} == {run_key(result['params'], result['seed']) for result in results}
+
+
+def test_warm_up_branches_count_only_after_warm_up(tmp_path):
+    output_path = str(tmp_path / 'results.jsonl')
+    snapshot = warm_up(DEFAULT_SCENARIO, 30, seed=1)
+    run_sweep(DEFAULT_SCENARIO, {'spawn_rate': [1.0]}, range(2), 20, output_path, workers=1, snapshot=snapshot)
+    results = finished_results(output_path)
+    assert len(results) == 2
+    assert all(result['completed_trips'] < 40 for result in results) #20 s of trips, not 50 s
+
+
+def test_warm_up_keeps_reservations(tmp_path):
+    output_path = str(tmp_path / 'results.jsonl')
+    snapshot = warm_up(DEFAULT_SCENARIO, 30, seed=1, reservations=True)
+    run_sweep(DEFAULT_SCENARIO, {'spawn_rate': [1.0]}, range(2), 20, output_path, workers=1, snapshot=snapshot)
+    for result in finished_results(output_path):
+        simulation = decode_snapshot(snapshot, seed=result['seed'], spawn_rate=1.0)
+        assert simulation.get_reservations() is not None
+        collisions, trips = simulation.get_collisions(), simulation.get_completed_trips()
+        simulation.run(20, jump_to_events=True)
+        assert (result['collisions'], result['completed_trips']) == (simulation.get_collisions() - collisions, simulation.get_completed_trips() - trips)
+
+
+def test_warm_up_rejects_parameters_it_cannot_branch(tmp_path):
+    output_path = str(tmp_path / 'results.jsonl')
+    snapshot = warm_up(DEFAULT_SCENARIO, 5, seed=1)
+    with pytest.raises(ValueError):
+        run_sweep(DEFAULT_SCENARIO, {'stop_duration': [1.0]}, range(1), 5, output_path, workers=1, snapshot=snapshot)
+    assert not os.path.exists(output_path)
@@ -0,0 +1,59 @@
+import pytest
+from generator import *
+from scenarios import *
+
+np = pytest.importorskip('numpy')
+from vectorized import *
+
+
+def crossing():
+    scenario = Scenario(name='crossing', spawn_rate=0.5, seed=1)
+    scenario.add_road('east', [(x, 5) for x in range(11)], speed_limit=0.1)
+    scenario.add_road('south', [(5, y) for y in range(11)], speed_limit=0.1)
+    return scenario
+
+
+def collisions(scenario, percentage_of_slowed_cars, duration=60):
+    vectorized = VectorizedSimulation(scenario.build_roads(), dt=scenario.get_dt(), spawn_rate=scenario.get_spawn_rate(),
+                                      percentage_of_slowed_cars=percentage_of_slowed_cars, seed=1)
+    vectorized.run(duration)
+    simulation = scenario.build_simulation(seed=1, percentage_of_slowed_cars=percentage_of_slowed_cars)
+    simulation.run(duration)
+    return vectorized.get_collisions(), simulation.get_collisions()
+
+
+@pytest.mark.parametrize('scenario', [crossing(), manhattan_grid(4, 4, seed=1, spawn_rate=0.2), arterial_feeder(2, 3, length=60, seed=1, spawn_rate=0.2)],
+                         ids=lambda scenario: scenario.get_name())
+def test_cars_keeping_distance_never_crash(scenario):
+    assert collisions(scenario, 0) == (0, 0)
+
+
+def place_at_crossing(following_distance):
+    scenario = crossing()
+    vectorized = VectorizedSimulation(scenario.build_roads(), spawn_rate=1000)
+    vectorized.add_cars([0, 1], following_distance)
+    vectorized.get_array('offset')[:] = 4 #both one block before the crossing at (5, 5)
+    vectorized.run(0.15)
+    return vectorized
+
+
+def test_same_block_movers_go_in_road_order():
+    vectorized = place_at_crossing(2)
+    assert [car.get_current_pos() for car in vectorized.get_cars()] == [(5, 5), (5, 4)]
+    assert vectorized.get_collisions() == 0
+
+
+def test_cars_without_following_distance_still_crash():
+    assert place_at_crossing(NO_FOLLOWING_DISTANCE).get_collisions() == 1
+
+
+def test_spawning_waits_for_the_start_block_to_clear():
+    scenario = Scenario(name='single', seed=1)
+    scenario.add_road('east', [(x, 5) for x in range(11)], speed_limit=0.1)
+    vectorized = VectorizedSimulation(scenario.build_roads(), spawn_rate=0.05, percentage_of_slowed_cars=0, seed=1)
+    vectorized.run(0.12)
+    assert vectorized.get_car_count() == 1 #the spawn at 0.1 s found the first car still on the start block
+    vectorized.run(3)
+    assert list(vectorized.get_array('offset')).count(0) <= 1
+    assert vectorized.get_array('car_id').max() >= 8 #later cars keep coming as each one leaves the start block
+    assert vectorized.get_collisions() == 0
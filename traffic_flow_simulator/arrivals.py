@@ -0,0 +1,254 @@
+import random
+from abc import ABC, abstractmethod
+
+try:
+    import numpy as np
+except ImportError: #numpy is only needed for per road arrival processes
+    np = None
+
+ARRIVAL_PROCESSES = ('poisson', 'headway', 'profile')
+ARRIVAL_BATCH = 256 #arrival times drawn at once for a road
+
+
+class ArrivalProcess(ABC):
+
+    def __init__(self, seed=None) -> None:
+        if np is None:
+            raise ImportError("arrival processes require numpy")
+        self.__rng = np.random.default_rng(None if seed is None else random.Random(seed).getrandbits(128)) #str seeds like "7:3" hash the same every run
+
+    def get_rng(self):
+
+        """
+        Function: returns seeded random number generator the batches are drawn from
+
+        Parameters: None
+
+        Returns:
+
+            rng:
+                type: numpy.random.Generator
+        """
+        return self.__rng
+
+    def get_state(self):
+
+        """
+        Function: returns state of the random number generator as plain dicts and ints, for snapshots
+
+        Parameters: None
+
+        Returns:
+
+            state:
+                type: dict
+        """
+        return self.__rng.bit_generator.state
+
+    def set_state(self, state):
+
+        """
+        Function: puts the random number generator back where get_state found it
+
+        Parameters:
+
+            state:
+                type: dict
+
+        Returns: None
+        """
+        self.__rng.bit_generator.state = state
+
+    @abstractmethod
+    def next_batch(self, start, count):
+
+        """
+        Function: returns the next count arrival times after start
+
+        Parameters:
+
+            start:
+                type: float
+
+            count:
+                type: int
+
+        Returns:
+
+            times:
+                type: list[float] ascending
+        """
+
+
+class PoissonArrivals(ArrivalProcess):
+
+    def __init__(self, rate, seed=None) -> None:
+        super().__init__(seed)
+        self.__rate = rate #vehicles per second
+
+    def next_batch(self, start, count):
+
+        """
+        Function: returns count arrival times after start with exponential gaps, drawn as one array and summed
+
+        Parameters:
+
+            start:
+                type: float
+
+            count:
+                type: int
+
+        Returns:
+
+            times:
+                type: list[float]
+        """
+        if self.__rate <= 0:
+            return []
+        return (start + np.cumsum(self.get_rng().exponential(1 / self.__rate, count))).tolist()
+
+
+class FixedHeadway(ArrivalProcess):
+
+    def __init__(self, headway, seed=None) -> None:
+        super().__init__(seed)
+        self.__headway = headway #seconds between vehicles
+
+    def next_batch(self, start, count):
+
+        """
+        Function: returns count arrival times after start, headway seconds apart
+
+        Parameters:
+
+            start:
+                type: float
+
+            count:
+                type: int
+
+        Returns:
+
+            times:
+                type: list[float]
+        """
+        if self.__headway <= 0:
+            return []
+        return (start + self.__headway * np.arange(1, count + 1)).tolist()
+
+
+class TimeOfDayArrivals(ArrivalProcess):
+
+    def __init__(self, profile, period=86400, seed=None) -> None:
+        super().__init__(seed)
+        profile = sorted(profile)
+        self.__starts = np.array([second for second, _ in profile], dtype=float) #second of the period each rate starts at
+        self.__rates = np.array([rate for _, rate in profile], dtype=float)
+        self.__period = period
+        self.__max_rate = self.__rates.max(initial=0)
+
+    def get_rate(self, time):
+
+        """
+        Function: returns vehicles per second at time, repeating the profile every period seconds
+
+        Parameters:
+
+            time:
+                type: float
+
+        Returns:
+
+            rate:
+                type: float
+        """
+        return float(self.get_rates(np.array([time]))[0])
+
+    def get_rates(self, times):
+
+        """
+        Function: returns vehicles per second at every time of an array at once
+
+        Parameters:
+
+            times:
+                type: numpy.ndarray[float]
+
+        Returns:
+
+            rates:
+                type: numpy.ndarray[float]
+        """
+        positions = np.searchsorted(self.__starts, times % self.__period, side='right') - 1
+        return self.__rates[positions] #before the first entry position is -1, so the last one carries over
+
+    def next_batch(self, start, count):
+
+        """
+        Function: returns count arrival times after start of a Poisson process whose rate follows the profile,
+                  by thinning arrays of arrivals drawn at the highest rate
+
+        Parameters:
+
+            start:
+                type: float
+
+            count:
+                type: int
+
+        Returns:
+
+            times:
+                type: list[float]
+        """
+
+        if self.__max_rate <= 0:
+            return []
+        rng = self.get_rng()
+        max_rate = self.__max_rate
+        batches = []
+        found = 0
+        time = start
+        while found < count:
+            candidates = time + np.cumsum(rng.exponential(1 / max_rate, count))
+            kept = candidates[rng.random(count) * max_rate < self.get_rates(candidates)]
+            batches.append(kept)
+            found += len(kept)
+            time = candidates[-1]
+        return np.concatenate(batches)[:count].tolist()
+
+
+def arrival_process(spec, seed=None):
+
+    """
+    Function: builds an arrival process from a scenario road's arrivals entry
+
+    Parameters:
+
+        spec:
+            type: dict with key process, one of ARRIVAL_PROCESSES, and rate (poisson), headway (headway)
+                  or profile as [second, rate] pairs and period (profile)
+
+        seed:
+            default: None
+            type: int or str
+
+    Returns:
+
+        process:
+            type: ArrivalProcess
+    """
+
+    kind = spec.get('process')
+    if kind == 'poisson':
+        return PoissonArrivals(spec['rate'], seed)
+    if kind == 'headway':
+        return FixedHeadway(spec['headway'], seed)
+    if kind == 'profile':
+        return TimeOfDayArrivals([tuple(entry) for entry in spec['profile']], spec.get('period', 86400), seed)
+    raise ValueError(f"arrival process must be one of {', '.join(ARRIVAL_PROCESSES)}, not {kind}")
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
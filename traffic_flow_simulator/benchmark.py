@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from generator import *
+from instrumentation import *
+
+RESULTS_DIR = 'benchmark_results'
+
+
+def fill_roads(simulation, density):
+
+    """
+    Function: places cars on every road so about density of its blocks hold a car, leaders first so list order matches path order
+
+    Parameters:
+
+        simulation:
+            type: Simulation
+
+        density:
+            type: float (0 to 1)
+
+    Returns:
+
+        cars:
+            type: int (number of cars placed)
+    """
+
+    if density <= 0:
+        return 0
+
+    spacing = max(1, int(round(1 / density)))
+    occupancy = simulation.get_occupancy()
+    placed = 0
+    for road in simulation.get_roads():
+        path = road.get_path()
+        for offset in range(len(path) - 2, 0, -spacing):
+            if not occupancy.is_occupied(path[offset]):
+                road.add_car(Car(velocity=road.get_speed_limit()), offset)
+                placed += 1
+    return placed
+
+
+def run_case(scenario, density, steps, seed=0, render=False):
+
+    """
+    Function: times every phase of the step loop on one scenario and car density
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        density:
+            type: float
+
+        steps:
+            type: int
+
+        seed:
+            default: 0
+            type: int
+
+        render:
+            default: False
+            type: boolean (also time Renderer.render_frame on a dummy display)
+
+    Returns:
+
+        result:
+            type: dict
+    """
+
+    instrumentation = Instrumentation()
+    build_start = time.perf_counter()
+    simulation = scenario.build_simulation(seed=seed, instrumentation=instrumentation) #includes building the intersection index
+    build_seconds = time.perf_counter() - build_start
+    cars = fill_roads(simulation, density)
+
+    roads = simulation.get_roads()
+    renderer = make_renderer(scenario, roads) if render else None
+
+    car_steps = 0
+    for _ in range(steps):
+        car_steps += sum(len(road.get_cars()) for road in roads)
+        blocks_to_color = simulation.step()[1]
+        if renderer:
+            start = time.perf_counter()
+            renderer.render_frame(roads, blocks_to_color, simulation.get_collisions())
+            instrumentation.add_time('draw', time.perf_counter() - start)
+
+    phase_seconds = {phase: seconds for phase, seconds in instrumentation.get_phase_seconds().items() if render or phase != 'draw'}
+    total_seconds = sum(phase_seconds.values())
+    return {'scenario': scenario.get_name(), 'roads': len(roads), 'blocks': sum(len(road['path']) for road in scenario.get_roads()),
+            'density': density, 'initial_cars': cars, 'steps': steps, 'car_steps': car_steps, 'collisions': simulation.get_collisions(),
+            'build_seconds': build_seconds, 'phase_seconds': phase_seconds, 'total_seconds': total_seconds, 'counters': dict(instrumentation.get_counters()),
+            'frame_seconds_histogram': [[bound if bound != float('inf') else None, count] for bound, count in instrumentation.get_histogram()],
+            'car_steps_per_second': car_steps / total_seconds if total_seconds else 0.0}
+
+
+def measure_peak_memory(scenario, density, steps, seed=0):
+
+    """
+    Function: returns peak traced memory of building and stepping a scenario, kept apart from run_case since tracing slows the loop
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        density:
+            type: float
+
+        steps:
+            type: int
+
+        seed:
+            default: 0
+            type: int
+
+    Returns:
+
+        peak:
+            type: int (bytes)
+    """
+
+    tracemalloc.start()
+    try:
+        simulation = scenario.build_simulation(seed=seed)
+        fill_roads(simulation, density)
+        for _ in range(steps):
+            simulation.step()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def make_renderer(scenario, roads):
+
+    """
+    Function: builds a Renderer on a display sized to the scenario, using SDL's dummy driver when no display is set
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        roads:
+            type: list[RoadNetwork]
+
+    Returns:
+
+        renderer:
+            type: Renderer
+    """
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame as pyg
+    from renderer import Renderer
+
+    pyg.init()
+    width, height = scenario.get_size()
+    renderer = Renderer(pyg.display.set_mode((max(width*BLOCK_SIZE, WIDTH), max(height*BLOCK_SIZE, HEIGHT))))
+    renderer.draw_grid()
+    renderer.draw_legend()
+    renderer.draw_roads(roads)
+    renderer.draw_background()
+    return renderer
+
+
+def build_matrix(sizes, layouts):
+
+    """
+    Function: generates one scenario per layout and size
+
+    Parameters:
+
+        sizes:
+            type: list[int]
+
+        layouts:
+            type: list[str] (manhattan, arterial or random)
+
+    Returns:
+
+        scenarios:
+            type: list[Scenario]
+    """
+
+    scenarios = []
+    for size in sizes:
+        for layout in layouts:
+            if layout == 'manhattan':
+                scenarios.append(manhattan_grid(size, size))
+            elif layout == 'arterial':
+                scenarios.append(arterial_feeder(size, size))
+            elif layout == 'random':
+                scenarios.append(random_planar(size * size, size * 4, size * 4, seed=size))
+    return scenarios
+
+
+def git_revision():
+
+    """
+    Function: returns current git commit so stored results can be matched to code
+
+    Parameters: None
+
+    Returns:
+
+        revision:
+            type: str or None outside a git checkout
+    """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+
+    """
+    Function: prints car steps per second against a stored run and returns cases that slowed down by more than tolerance
+
+    Parameters:
+
+        results:
+            type: list[dict]
+
+        baseline_path:
+            type: str
+
+        tolerance:
+            type: float (0.1 allows a 10% slowdown)
+
+    Returns:
+
+        regressions:
+            type: list[dict]
+    """
+
+    with open(baseline_path) as file:
+        baseline = {(case['scenario'], case['density']): case for case in json.load(file)['results']}
+
+    regressions = []
+    for case in results:
+        old = baseline.get((case['scenario'], case['density']))
+        if not old or not old['car_steps_per_second']:
+            continue
+        ratio = case['car_steps_per_second'] / old['car_steps_per_second']
+        print(f"{case['scenario']:>20} density {case['density']:<5} {ratio:6.2f}x")
+        if ratio < 1 - tolerance:
+            regressions.append(case)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the headless step loop across network sizes and car densities')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 20])
+    parser.add_argument('--layouts', nargs='+', default=['manhattan', 'arterial', 'random'], choices=['manhattan', 'arterial', 'random'])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.05, 0.2])
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--memory-steps', type=int, default=20, help='steps of the traced run used for peak memory, 0 to skip')
+    parser.add_argument('--render', action='store_true', help='also time the dirty rectangle renderer')
+    parser.add_argument('--output', default=None, help=f'json file to write, defaults to {RESULTS_DIR}/<timestamp>.json')
+    parser.add_argument('--compare', default=None, help='earlier results json to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = []
+    for scenario in build_matrix(args.sizes, args.layouts):
+        for density in args.densities:
+            result = run_case(scenario, density, args.steps, render=args.render)
+            if args.memory_steps:
+                result['peak_memory_bytes'] = measure_peak_memory(scenario, density, args.memory_steps)
+            results.append(result)
+            print(f"{result['scenario']:>20} density {density:<5} {result['car_steps_per_second']:>12.0f} car-steps/s "
+                  + ' '.join(f"{name}={seconds*1000/args.steps:.3f}ms" for name, seconds in result['phase_seconds'].items()))
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump({'timestamp': time.time(), 'revision': git_revision(), 'python': sys.version, 'platform': platform.platform(),
+                   'steps': args.steps, 'results': results}, file, indent=2)
+    print(f"Wrote {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
@@ -1,15 +1,23 @@
-import time
+from clock import *
 
 class Car:
 
-    def __init__(self, velocity=1, path=None, current_pos=None, stopped=False, following_distance=2) -> None:
+    def __init__(self, velocity=1, path=None, current_pos=None, stopped=False, following_distance=2, clock=None) -> None:
 
         self.__velocity = velocity #seconds to move one grid square
         self.__path = path
         self.__current_pos = current_pos
-        self.start_time = time.time()
+        self.__offset = path.index(current_pos) if path and current_pos in path else 0 #index of current_pos within path
+        self.__clock = clock or WallClock()
+        self.start_time = self.__clock.now()
+        self.__spawn_time = self.start_time
         self.__stopped = stopped
         self.__following_distance = following_distance
+        self.__leader = None #car directly ahead on the same road, kept by RoadNetwork
+        self.__follower = None #car directly behind on the same road, kept by RoadNetwork
+        self.__route = None #legs of (road index, entry offset, exit offset) for cars that change roads
+        self.__leg = 0
+        self.__turn_offset = None #offset at which to move onto the next leg's road
     
     def get_velocity(self):
 
@@ -53,6 +61,20 @@ class Car:
         """
         return self.__current_pos
     
+    def get_offset(self):
+
+        """
+        Function: returns index of Car object's current position within its path
+
+        Parameters: None
+
+        Returns:
+
+            offset:
+                type: int
+        """
+        return self.__offset
+
     def get_stop_state(self):
 
         """
@@ -80,6 +102,104 @@ class Car:
         """
         return self.__following_distance
 
+    def get_spawn_time(self):
+
+        """
+        Function: returns time at which Car object entered the network
+
+        Parameters: None
+
+        Returns:
+
+            spawn_time:
+                type: float
+        """
+        return self.__spawn_time
+
+    def get_leader(self):
+
+        """
+        Function: returns Car object directly ahead on the same road
+
+        Parameters: None
+
+        Returns:
+
+            leader:
+                type: Car object or None if Car is first on its road
+        """
+        return self.__leader
+
+    def get_follower(self):
+
+        """
+        Function: returns Car object directly behind on the same road
+
+        Parameters: None
+
+        Returns:
+
+            follower:
+                type: Car object or None if Car is last on its road
+        """
+        return self.__follower
+
+    def get_route(self):
+
+        """
+        Function: returns route of Car object across roads
+
+        Parameters: None
+
+        Returns:
+
+            route:
+                type: tuple[tuple(int, int, int)] or None if Car stays on the road it spawned on
+        """
+        return self.__route
+
+    def get_leg(self):
+
+        """
+        Function: returns position of the leg Car object is driving within its route
+
+        Parameters: None
+
+        Returns:
+
+            leg:
+                type: int
+        """
+        return self.__leg
+
+    def get_turn_offset(self):
+
+        """
+        Function: returns offset on the current road where Car object turns onto its next road
+
+        Parameters: None
+
+        Returns:
+
+            turn_offset:
+                type: int or None on the last leg or without a route
+        """
+        return self.__turn_offset
+
+    def get_clock(self):
+
+        """
+        Function: returns clock that Car object reads time from
+
+        Parameters: None
+
+        Returns:
+
+            clock:
+                type: WallClock or VirtualClock
+        """
+        return self.__clock
+
     def set_velocity(self, vel):
 
         """
@@ -121,6 +241,23 @@ class Car:
         Returns: None
         """
         self.__current_pos = pos
+        if self.__path and pos in self.__path: #keep offset in sync, prefer set_offset on hot paths
+            self.__offset = self.__path.index(pos)
+
+    def set_offset(self, offset):
+
+        """
+        Function: moves Car object to index offset of its path
+
+        Parameters:
+
+            offset:
+                type: int
+
+        Returns: None
+        """
+        self.__offset = offset
+        self.__current_pos = self.__path[offset]
 
     def set_stop_state(self, bool):
 
@@ -137,6 +274,97 @@ class Car:
         self.__stopped = bool
 
     
+    def set_spawn_time(self, spawn_time):
+
+        """
+        Function: assigns time at which Car object entered the network to spawn_time
+
+        Parameters:
+
+            spawn_time:
+                type: float
+
+        Returns: None
+        """
+        self.__spawn_time = spawn_time
+
+    def set_route(self, route, leg=0):
+
+        """
+        Function: assigns route of Car object and the leg it is on
+
+        Parameters:
+
+            route:
+                type: tuple[tuple(int, int, int)] or None
+
+            leg:
+                default: 0
+                type: int
+
+        Returns: None
+        """
+        self.__route = route
+        self.__leg = leg
+        self.__turn_offset = route[leg][2] if route and leg < len(route) - 1 else None
+
+    def next_leg(self):
+
+        """
+        Function: moves Car object on to the next leg of its route
+
+        Parameters: None
+
+        Returns:
+
+            leg:
+                type: tuple(int, int, int) road index, entry offset and exit offset
+        """
+        self.set_route(self.__route, self.__leg + 1)
+        return self.__route[self.__leg]
+
+    def set_leader(self, leader):
+
+        """
+        Function: assigns Car object directly ahead on the same road to leader
+
+        Parameters:
+
+            leader:
+                type: Car object or None
+
+        Returns: None
+        """
+        self.__leader = leader
+
+    def set_follower(self, follower):
+
+        """
+        Function: assigns Car object directly behind on the same road to follower
+
+        Parameters:
+
+            follower:
+                type: Car object or None
+
+        Returns: None
+        """
+        self.__follower = follower
+
+    def set_clock(self, clock):
+
+        """
+        Function: assigns clock of Car object to clock
+
+        Parameters:
+
+            clock:
+                type: WallClock or VirtualClock
+
+        Returns: None
+        """
+        self.__clock = clock
+
     def can_move(self):
 
         """
@@ -153,57 +381,33 @@ class Car:
                 if at least one of conditions is False
         """
 
-        end_time = time.time()
-        elapsed_time = end_time - self.start_time
-        current_pos = self.get_current_pos()
-        path = self.get_path()
-        current_pos_ind = path.index(current_pos)
+        # compare against the due time instead of elapsed time so a clock jumping to start_time + velocity always moves the car
+        return self.__current_pos and self.__offset < len(self.__path)-1 and self.__clock.now() >= self.start_time + self.__velocity
 
-        return self.get_current_pos() and current_pos_ind < len(path)-1 and elapsed_time >= self.__velocity
-
-    def move(self, stop_duration=None):
+    def move(self):
 
         """
-        Function: moves Car by one grid position within path if able or if Car's wait time == stop duration. 
-
-        Parameters:
+        Function: moves Car by one grid position within path if able. Stop signs hold a car through its stop state, see StopController
 
-            stop_duration:
-
-                type: float
+        Parameters: None
         
         Returns:
 
             True:
                 if Car moved
             
-            False or None:
+            False:
                 if Car did not move
                 
         """
 
         if self.can_move():
-
-            end_time = time.time()
-            elapsed_time = end_time - self.start_time
-            current_pos = self.get_current_pos()
-            path = self.get_path()
-            current_pos_ind = path.index(current_pos)
-            
-            if self.get_stop_state() and stop_duration:
-                if elapsed_time >= stop_duration: # if car waited long enough at stop sign
-                    self.start_time = time.time()
-                    new_pos_ind = current_pos_ind + 1
-                    self.set_current_pos(path[new_pos_ind])
-                    self.set_stop_state(False)
-                    return True
-            else:
-                self.start_time = time.time()
-                new_pos_ind = current_pos_ind + 1
-                self.set_current_pos(path[new_pos_ind])
-                return True
-        else:
-            return False
+            end_time = self.__clock.now()
+            self.start_time = end_time
+            self.__clock.schedule(end_time + self.__velocity)
+            self.set_offset(self.__offset + 1)
+            return True
+        return False
         
         
 
@@ -0,0 +1,169 @@
+import heapq
+import time
+
+class WallClock:
+
+    def now(self):
+
+        """
+        Function: returns current wall clock time
+
+        Parameters: None
+
+        Returns:
+
+            now:
+                type: float
+        """
+        return time.time()
+
+    def schedule(self, event_time):
+
+        """
+        Function: does nothing, wall clock time can not jump to scheduled events
+
+        Parameters:
+
+            event_time:
+                type: float
+
+        Returns: None
+        """
+        pass
+
+
+class VirtualClock:
+
+    def __init__(self, start_time=0.0) -> None:
+        self.__time = start_time
+        self.__events = [] # min heap of scheduled event times
+
+    def now(self):
+
+        """
+        Function: returns current simulated time
+
+        Parameters: None
+
+        Returns:
+
+            now:
+                type: float
+        """
+        return self.__time
+
+    def set_time(self, new_time):
+
+        """
+        Function: assigns current simulated time to new_time and drops events that have passed
+
+        Parameters:
+
+            new_time:
+                type: float
+
+        Returns: None
+        """
+        self.__time = new_time
+        events = self.__events
+        while events and events[0] <= new_time:
+            heapq.heappop(events)
+
+    def advance(self, dt):
+
+        """
+        Function: moves simulated time forward by dt seconds
+
+        Parameters:
+
+            dt:
+                type: float
+
+        Returns: None
+        """
+        self.set_time(self.__time + dt)
+
+    def schedule(self, event_time):
+
+        """
+        Function: records a future time at which something in the simulation is due to happen
+
+        Parameters:
+
+            event_time:
+                type: float
+
+        Returns: None
+        """
+        if event_time > self.__time:
+            heapq.heappush(self.__events, event_time)
+
+    def get_events(self):
+
+        """
+        Function: returns scheduled event times as a min heap
+
+        Parameters: None
+
+        Returns:
+
+            events:
+                type: list[float]
+        """
+        return self.__events
+
+    def set_events(self, events):
+
+        """
+        Function: replaces scheduled event times, used when restoring a snapshot
+
+        Parameters:
+
+            events:
+                type: iterable[float]
+
+        Returns: None
+        """
+        self.__events = [event_time for event_time in events if event_time > self.__time]
+        heapq.heapify(self.__events)
+
+    def next_event_time(self):
+
+        """
+        Function: returns time of the next scheduled event
+
+        Parameters: None
+
+        Returns:
+
+            event_time:
+                type: float or None if nothing is scheduled
+        """
+        if self.__events:
+            return self.__events[0]
+        return None
+
+    def advance_to_next_event(self):
+
+        """
+        Function: jumps simulated time straight to the next scheduled event
+
+        Parameters: None
+
+        Returns:
+
+            True:
+                if an event was scheduled and time moved to it
+
+            False:
+                if no event is scheduled
+        """
+        event_time = self.next_event_time()
+        if event_time is None:
+            return False
+        self.set_time(event_time)
+        return True
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
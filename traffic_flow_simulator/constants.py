@@ -12,6 +12,8 @@ BORDER_SIZE = 1
 
 FRAME_RATE = 30
 CAR_SPAWN_RATE = 1
+SIMULATION_DT = 0.01 # seconds of simulated time advanced per step
+MAX_FRAME_TIME = 0.25 # most real seconds the viewer simulates in one frame, after a pause or a slow frame
 
 FONT_SIZE = 34
 FONT_COLOR = 'darkred'
@@ -19,6 +21,14 @@ FONT_COLOR_BG = 'white'
 
 NO_FOLLOWING_DISTANCE = -1
 
+EVENT_SPAWN = 1 # kinds of car events passed to a recorder
+EVENT_STOP = 2
+EVENT_END = 3
+EVENT_COLLISION = 4
+
+STOP_RULES = ('stop', 'all_way', 'yield') # how the first car at a stop sign is let go, see StopController
+YIELD_DISTANCE = 4 # blocks of another road before a merge that have to be empty for a yielding car to go
+
 
 LEGEND_BOX_WIDTH = 150
 LEGEND_BOX_HEIGHT = 150
@@ -0,0 +1,418 @@
+import heapq
+import time
+from simulation import *
+
+class EventSimulation(Simulation):
+
+    def __init__(self, roads=None, *args, **kwargs) -> None:
+        super().__init__(roads, *args, **kwargs)
+        self.__road_index = {road: i for i, road in enumerate(self.get_roads())}
+        self.__queue = [] #min heap of (due time, road index, car number, Car, RoadNetwork)
+        self.__due = {} #Car -> time of its live queue entry, older entries are skipped
+        self.__numbers = {} #Car -> number of its live queue entries, renewed when it turns onto another road
+        self.__next_number = 0
+        self.__waiters = {} #grid block -> list of (Car, RoadNetwork) blocked by the car in it
+        self.__entered = [] #(Car, RoadNetwork) that moved or spawned this step
+
+        for road in self.get_roads():
+            for car in road.get_cars():
+                self.schedule_car(car, road, car.start_time + car.get_velocity())
+
+    def get_waiters(self):
+
+        """
+        Function: returns cars waiting for each occupied block to free
+
+        Parameters: None
+
+        Returns:
+
+            waiters:
+                type: dict{tuple: list[tuple(Car, RoadNetwork)]}
+        """
+        return self.__waiters
+
+    def get_queue_size(self):
+
+        """
+        Function: returns number of entries in the event queue, including ones left behind by rescheduled cars
+
+        Parameters: None
+
+        Returns:
+
+            size:
+                type: int
+        """
+        return len(self.__queue)
+
+    def add_car(self, road, car, offset=None):
+
+        """
+        Function: adds Car object to road and schedules its first move. Cars added straight through road.add_car are not seen by the event queue
+
+        Parameters:
+
+            road:
+                type: RoadNetwork
+
+            car:
+                type: Car object
+
+            offset:
+                default: None (start of road)
+                type: int
+
+        Returns: None
+        """
+
+        road.add_car(car, offset)
+        self.schedule_car(car, road, car.start_time + car.get_velocity())
+        self.__entered.append((car, road))
+
+    def schedule_car(self, car, road, due_time):
+
+        """
+        Function: queues car to be looked at by move_cars at due_time, unless it is already queued for an earlier time
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork
+
+            due_time:
+                type: float
+
+        Returns: None
+        """
+
+        due = self.__due.get(car)
+        if due is not None and due <= due_time:
+            return
+        number = self.__numbers.get(car)
+        if number is None:
+            number = self.__numbers[car] = self.__next_number
+            self.__next_number += 1
+        self.__due[car] = due_time
+        heapq.heappush(self.__queue, (due_time, self.__road_index[road], number, car, road))
+
+    def __is_on_road(self, car, road):
+
+        """
+        Function: returns whether car is still on road, since removed cars keep their queue entries and waiter records
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork
+
+        Returns:
+
+            True:
+                if car is still on road
+
+            False:
+                if car was removed
+        """
+        return (car, road) in road.get_occupancy().get_occupants(car.get_current_pos())
+
+    def __next_due_time(self, car, road):
+
+        """
+        Function: returns time at which a car that could not move is next able to. Stopped cars are queued again when StopController lets them go
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork
+
+        Returns:
+
+            due_time:
+                type: float or None if the car is at the end of its road or stopped
+        """
+
+        if car.get_offset() >= len(car.get_path()) - 1 or car.get_stop_state():
+            return None
+        return car.start_time + car.get_velocity()
+
+    def __wake(self, pos, current, batch, now):
+
+        """
+        Function: wakes cars waiting on block pos. Waiters after the current car in road order are looked at again this step,
+                  like the polling loop does, and the rest on the next step
+
+        Parameters:
+
+            pos:
+                type: tuple
+
+            current:
+                type: tuple(int, int, int) road index, negated offset and number of the car being moved, or None after the move phase
+
+            batch:
+                type: list (heap of cars being looked at this step)
+
+            now:
+                type: float
+
+        Returns: None
+        """
+
+        waiters = self.__waiters.pop(pos, None)
+        if not waiters:
+            return
+        for car, road in waiters:
+            if not self.__is_on_road(car, road): #turned onto another road or removed since it started waiting, its live entry is left alone
+                continue
+            key = (self.__road_index[road], -car.get_offset(), self.__numbers[car])
+            if current is not None and key > current and car not in self.__due:
+                self.__due[car] = now
+                heapq.heappush(batch, key + (car, road))
+            else:
+                self.schedule_car(car, road, now)
+
+    def spawn_cars(self):
+
+        """
+        Function: lets the spawner place cars onto the roads and schedules their first move
+
+        Parameters: None
+
+        Returns:
+
+            cars:
+                type: list[Car] placed this step
+        """
+
+        cars = super().spawn_cars()
+        for car in cars:
+            road = self._road_of(car)
+            self.schedule_car(car, road, car.start_time + car.get_velocity())
+            self.__entered.append((car, road))
+        return cars
+
+    def move_cars(self):
+
+        """
+        Function: moves every car that is due at the current time in the same road and car order as the polling loop.
+                  A blocked car waits on the block in front of it instead of being looked at every step
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+        """
+
+        return self.__move_due_cars()[0]
+
+    def _move_cars_instrumented(self):
+
+        """
+        Function: move_cars that times movement and counts moved and blocked cars
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+        """
+
+        instrumentation = self.get_instrumentation()
+        start = time.perf_counter()
+        vacated_blocks, blocked = self.__move_due_cars()
+        instrumentation.add_time('movement', time.perf_counter() - start)
+        instrumentation.count('car_moves', len(vacated_blocks))
+        instrumentation.count('blocked_moves', blocked)
+        return vacated_blocks
+
+    def __move_due_cars(self):
+
+        """
+        Function: does the work of move_cars
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+
+            blocked:
+                type: int (due cars that were blocked)
+        """
+
+        now = self.get_time()
+        queue = self.__queue
+        due = self.__due
+        batch = []
+        numbers = self.__numbers
+        while queue and queue[0][0] <= now:
+            due_time, road_index, number, car, road = heapq.heappop(queue)
+            if due.get(car) == due_time and numbers.get(car) == number: #entries from before a car turned carry its old number
+                heapq.heappush(batch, (road_index, -car.get_offset(), number, car, road)) #cars furthest along go first, as in road.get_cars()
+
+        vacated_blocks = []
+        blocked = 0
+        reservations = self.get_reservations()
+        while batch:
+            road_index, negated_offset, number, car, road = heapq.heappop(batch)
+            if due.pop(car, None) is None: #a car let go at a stop sign can meet its older entry again at the same time
+                continue
+            if not self.__is_on_road(car, road) or car.get_stop_state(): #stopped cars are queued again when let go
+                continue
+
+            pos = car.get_current_pos()
+            blocking_pos = road.get_blocking_pos(pos, car.get_following_distance(), car)
+            if blocking_pos is not None:
+                if car.can_move():
+                    blocked += 1
+                self.__waiters.setdefault(blocking_pos, []).append((car, road))
+                continue
+            if reservations is not None and car.get_following_distance() != NO_FOLLOWING_DISTANCE and car.can_move():
+                retry_time = reservations.request(car, road)
+                if retry_time is not None: #looked at again once the booking in its way runs out
+                    blocked += 1
+                    self.schedule_car(car, road, retry_time)
+                    continue
+
+            if road.move_car(car):
+                vacated_blocks.append((pos, road))
+                self.__entered.append((car, road))
+                self.__wake(pos, (road_index, negated_offset, number), batch, now)
+
+            due_time = self.__next_due_time(car, road)
+            if due_time is not None:
+                self.schedule_car(car, road, due_time)
+
+        return vacated_blocks, blocked
+
+    def turn_cars(self):
+
+        """
+        Function: turns routed cars like Simulation.turn_cars and queues them on their new road under a new number,
+                  so entries queued for their old road are skipped
+
+        Parameters: None
+
+        Returns:
+
+            turned:
+                type: list[tuple(Car, RoadNetwork)]
+        """
+
+        turned = super().turn_cars()
+        for car, road in turned:
+            self.__numbers[car] = self.__next_number
+            self.__next_number += 1
+            self.__due.pop(car, None)
+            self.__entered.append((car, road))
+            due_time = self.__next_due_time(car, road)
+            if due_time is not None:
+                self.schedule_car(car, road, due_time)
+        return turned
+
+    def check_for_collisions(self):
+
+        """
+        Function: removes collided cars like Simulation.check_for_collisions and wakes cars waiting on the freed blocks
+
+        Parameters: None
+
+        Returns:
+
+            blocks_to_color:
+                type: list[tuple]
+        """
+
+        occupancy = self.get_occupancy()
+        crashed = [car for pos in occupancy.get_conflicts() for car, _ in occupancy.get_occupants(pos)]
+        blocks_to_color = super().check_for_collisions()
+        for car in crashed:
+            self.__forget(car)
+        now = self.get_time()
+        for pos in dict.fromkeys(blocks_to_color):
+            self.__wake(pos, None, None, now)
+        return blocks_to_color
+
+    def remove_end_cars(self):
+
+        """
+        Function: removes cars that moved onto the end of their road and records their travel time
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        for car, road in self.__entered:
+            if car.get_current_pos() == road.get_end() and self.__is_on_road(car, road):
+                road.remove_car(car)
+                self.__forget(car)
+                self._record_trip(car)
+                if self.get_recorder() is not None:
+                    self.get_recorder().event(EVENT_END, road, car)
+                self.__wake(road.get_end(), None, None, self.get_time())
+
+    def __forget(self, car):
+
+        """
+        Function: drops the queue records of a car that left the network, its queue entries and waiter records are skipped once reached
+
+        Parameters:
+
+            car:
+                type: Car object
+
+        Returns: None
+        """
+        self.__due.pop(car, None)
+        self.__numbers.pop(car, None)
+
+    def stop_cars(self):
+
+        """
+        Function: stops cars that moved or spawned onto a stop sign this step, then forgets this step's moves
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        super().stop_cars()
+        self.__entered = []
+
+    def release_cars(self):
+
+        """
+        Function: lets go of cars at stop signs like Simulation.release_cars and queues them to move this step
+
+        Parameters: None
+
+        Returns:
+
+            released:
+                type: list[tuple(Car, RoadNetwork)]
+        """
+
+        released = super().release_cars()
+        now = self.get_time()
+        for car, road in released:
+            self.schedule_car(car, road, now)
+        return released
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
@@ -0,0 +1,317 @@
+import argparse
+import random
+from scenarios import *
+
+def place_stop_signs(scenario, major_roads=()):
+
+    """
+    Function: adds a stop sign on the block before every crossing where a minor road meets a road of higher priority.
+              Roads in major_roads never stop, other roads yield to major roads and to roads added before them
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        major_roads:
+            default: ()
+            type: collection[str] of road names
+
+    Returns: None
+    """
+
+    cell_owner = {} #block -> index of highest priority road through it
+    roads = scenario.get_roads()
+    order = sorted(range(len(roads)), key=lambda i: (roads[i]['name'] not in major_roads, i))
+    for i in order:
+        for pos in roads[i]['path']:
+            cell_owner.setdefault(pos, i)
+
+    for i in order:
+        road = roads[i]
+        if road['name'] in major_roads:
+            continue
+        path = road['path']
+        stop_signs = set(road['stop_signs'])
+        for j in range(1, len(path)):
+            owner = cell_owner[path[j]]
+            previous_owner = cell_owner[path[j-1]]
+            # stop once before entering a stretch owned by another road, not on every block of it
+            if owner != i and previous_owner == i and path[j-1] not in stop_signs:
+                stop_signs.add(path[j-1])
+                road['stop_signs'].append(path[j-1])
+
+
+def random_demand(scenario, pairs, seed=None):
+
+    """
+    Function: adds pairs origin-destination pairs with random weights, only between roads a route connects
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        pairs:
+            type: int
+
+        seed:
+            default: None
+            type: int
+
+    Returns: None
+    """
+
+    rng = random.Random(seed)
+    roads = scenario.build_roads()
+    planner = RoutePlanner(roads, IntersectionIndex([road.get_path() for road in roads]))
+    for _ in range(pairs * 20): #give up on networks with few connected pairs
+        if len(scenario.get_demand()) >= pairs:
+            break
+        origin, destination = rng.randrange(len(roads)), rng.randrange(len(roads))
+        if origin != destination and planner.get_route(origin, destination):
+            scenario.add_demand(origin, destination, round(rng.uniform(0.5, 2), 2))
+
+
+def poisson_arrivals(scenario, rate):
+
+    """
+    Function: gives every road of the scenario its own Poisson arrivals instead of the shared spawn rate
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        rate:
+            type: float (vehicles per second on each road)
+
+    Returns: None
+    """
+    for road in scenario.get_roads():
+        road['arrivals'] = {'process': 'poisson', 'rate': rate}
+
+
+def manhattan_grid(rows, cols, spacing=4, speed_limit=0.1, minor_speed_limit=0.2, stop_duration=3, **settings):
+
+    """
+    Function: generates a grid of one way avenues (rows, east/west alternating) crossed by one way streets (cols, north/south alternating).
+              Streets stop before every avenue they cross
+
+    Parameters:
+
+        rows:
+            type: int
+
+        cols:
+            type: int
+
+        spacing:
+            default: 4
+            type: int (blocks between parallel roads)
+
+        speed_limit:
+            default: 0.1
+            type: float (avenues)
+
+        minor_speed_limit:
+            default: 0.2
+            type: float (streets)
+
+        stop_duration:
+            default: 3
+            type: float
+
+        settings:
+            type: keyword arguments passed to Scenario
+
+    Returns:
+
+        scenario:
+            type: Scenario
+    """
+
+    width = cols * spacing + 1
+    height = rows * spacing + 1
+    scenario = Scenario(name=f'manhattan_{rows}x{cols}', width=width, height=height, **settings)
+
+    avenues = []
+    for r in range(rows):
+        y = r * spacing + spacing // 2
+        xs = range(width) if r % 2 == 0 else range(width - 1, -1, -1)
+        name = f'Avenue {r}'
+        scenario.add_road(name, [(x, y) for x in xs], speed_limit, stop_duration=stop_duration)
+        avenues.append(name)
+
+    for c in range(cols):
+        x = c * spacing + spacing // 2
+        ys = range(height) if c % 2 == 0 else range(height - 1, -1, -1)
+        scenario.add_road(f'Street {c}', [(x, y) for y in ys], minor_speed_limit, stop_duration=stop_duration)
+
+    place_stop_signs(scenario, major_roads=set(avenues))
+    return scenario
+
+
+def arterial_feeder(arterials, feeders_per_arterial, length=200, feeder_length=10, speed_limit=0.1, feeder_speed_limit=0.3, stop_duration=3, **settings):
+
+    """
+    Function: generates long arterial roads with short feeder roads that merge into them like Yielding_road 1 merges into Highway 1.
+              Feeders stop before merging
+
+    Parameters:
+
+        arterials:
+            type: int
+
+        feeders_per_arterial:
+            type: int
+
+        length:
+            default: 200
+            type: int (blocks per arterial)
+
+        feeder_length:
+            default: 10
+            type: int (blocks before a feeder merges)
+
+        speed_limit:
+            default: 0.1
+            type: float (arterials)
+
+        feeder_speed_limit:
+            default: 0.3
+            type: float (feeders)
+
+        stop_duration:
+            default: 3
+            type: float
+
+        settings:
+            type: keyword arguments passed to Scenario
+
+    Returns:
+
+        scenario:
+            type: Scenario
+    """
+
+    band = feeder_length + 2
+    scenario = Scenario(name=f'arterial_{arterials}x{feeders_per_arterial}', width=length, height=arterials * band, **settings)
+
+    names = []
+    for a in range(arterials):
+        y = a * band + feeder_length + 1
+        name = f'Arterial {a}'
+        scenario.add_road(name, [(x, y) for x in range(length)], speed_limit, stop_duration=stop_duration)
+        names.append(name)
+
+        gap = max(1, length // (feeders_per_arterial + 1))
+        for f in range(feeders_per_arterial):
+            merge_x = (f + 1) * gap
+            path = [(merge_x, y - feeder_length + k) for k in range(feeder_length)] #come down to the arterial
+            path += [(x, y) for x in range(merge_x, length)] #then follow it to its end
+            scenario.add_road(f'Feeder {a}.{f}', path, feeder_speed_limit, stop_duration=stop_duration)
+
+    place_stop_signs(scenario, major_roads=set(names))
+    return scenario
+
+
+def random_planar(road_count, width=100, height=100, speed_limit=0.1, stop_duration=3, seed=None, **settings):
+
+    """
+    Function: generates random monotone staircase roads from the top or left edge to the bottom or right edge.
+              Roads on the grid only meet at shared blocks, which become the crossings, and later roads stop before earlier ones
+
+    Parameters:
+
+        road_count:
+            type: int
+
+        width:
+            default: 100
+            type: int
+
+        height:
+            default: 100
+            type: int
+
+        speed_limit:
+            default: 0.1
+            type: float
+
+        stop_duration:
+            default: 3
+            type: float
+
+        seed:
+            default: None
+            type: int (also used as the scenario seed)
+
+        settings:
+            type: keyword arguments passed to Scenario
+
+    Returns:
+
+        scenario:
+            type: Scenario
+    """
+
+    rng = random.Random(seed)
+    scenario = Scenario(name=f'random_{road_count}', width=width, height=height, seed=seed, **settings)
+
+    for r in range(road_count):
+        if rng.random() < 0.5:
+            x, y = 0, rng.randrange(height)
+        else:
+            x, y = rng.randrange(width), 0
+        path = [(x, y)]
+        while x < width - 1 or y < height - 1:
+            horizontal = y == height - 1 or (x < width - 1 and rng.random() < 0.5)
+            run = rng.randint(1, max(1, (width if horizontal else height) // 8))
+            for _ in range(run):
+                if horizontal and x < width - 1:
+                    x += 1
+                elif not horizontal and y < height - 1:
+                    y += 1
+                else:
+                    break
+                path.append((x, y))
+            if len(path) > 1 and (x == width - 1 or y == height - 1) and rng.random() < 0.2:
+                break #leave through the edge early so road lengths vary
+        scenario.add_road(f'Road {r}', path, speed_limit * rng.choice((1, 1, 2, 3)), stop_duration=stop_duration)
+
+    place_stop_signs(scenario)
+    return scenario
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate large scenarios for scale testing')
+    parser.add_argument('layout', choices=['manhattan', 'arterial', 'random'])
+    parser.add_argument('size', type=int, nargs='+', help='rows cols for manhattan, arterials feeders for arterial (one value for both), road count for random')
+    parser.add_argument('-o', '--output', required=True, help='.json or .tfsb file to write')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--demand', type=int, default=0, help='origin-destination pairs of routed cars to add')
+    parser.add_argument('--poisson', type=float, default=None, help='vehicles per second arriving on each road, replaces the spawn rate')
+    parser.add_argument('--stop-rule', choices=STOP_RULES, default='stop', help='how cars are let go at every stop sign')
+    args = parser.parse_args()
+    size = args.size
+    if args.layout != 'random' and len(size) == 1:
+        size = size * 2 #one value gives a square grid
+    if len(size) != (1 if args.layout == 'random' else 2):
+        parser.error(f"{args.layout} takes {'one size value' if args.layout == 'random' else 'one or two size values'}")
+
+    if args.layout == 'manhattan':
+        scenario = manhattan_grid(*size, seed=args.seed)
+    elif args.layout == 'arterial':
+        scenario = arterial_feeder(*size, seed=args.seed)
+    else:
+        scenario = random_planar(size[0], seed=args.seed)
+    if args.demand:
+        random_demand(scenario, args.demand, args.seed)
+    if args.poisson:
+        poisson_arrivals(scenario, args.poisson)
+    for road in scenario.get_roads():
+        road['stop_rule'] = args.stop_rule
+
+    save_scenario(scenario, args.output)
+    print(f"Wrote {len(scenario.get_roads())} roads to {args.output}")
@@ -0,0 +1,222 @@
+import bisect
+
+PHASE_NAMES = ('spawn', 'look_ahead', 'movement', 'collisions', 'end_of_road', 'stop_signs', 'draw')
+COUNTER_NAMES = ('car_moves', 'blocked_moves', 'collisions')
+FRAME_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25) #upper bounds in seconds
+
+class Instrumentation:
+
+    def __init__(self, buckets=FRAME_TIME_BUCKETS) -> None:
+        self.__buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self):
+
+        """
+        Function: clears every timer, counter and histogram
+
+        Parameters: None
+
+        Returns: None
+        """
+        self.__phase_seconds = dict.fromkeys(PHASE_NAMES, 0.0)
+        self.__counters = dict.fromkeys(COUNTER_NAMES, 0)
+        self.__bucket_counts = [0] * (len(self.__buckets) + 1) #last bucket is +Inf
+        self.__frame_seconds = 0.0
+        self.__frames = 0
+
+    def add_time(self, phase, seconds):
+
+        """
+        Function: adds seconds to the total time spent in phase
+
+        Parameters:
+
+            phase:
+                type: str
+
+            seconds:
+                type: float
+
+        Returns: None
+        """
+        self.__phase_seconds[phase] = self.__phase_seconds.get(phase, 0.0) + seconds
+
+    def count(self, name, amount=1):
+
+        """
+        Function: increases counter name by amount
+
+        Parameters:
+
+            name:
+                type: str
+
+            amount:
+                default: 1
+                type: int
+
+        Returns: None
+        """
+        self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def observe_frame(self, seconds):
+
+        """
+        Function: records how long one frame (simulation step) took in the frame time histogram
+
+        Parameters:
+
+            seconds:
+                type: float
+
+        Returns: None
+        """
+        self.__bucket_counts[bisect.bisect_left(self.__buckets, seconds)] += 1
+        self.__frame_seconds += seconds
+        self.__frames += 1
+
+    def get_phase_seconds(self):
+
+        """
+        Function: returns total seconds spent in each phase
+
+        Parameters: None
+
+        Returns:
+
+            phase_seconds:
+                type: dict{str: float}
+        """
+        return self.__phase_seconds
+
+    def get_counters(self):
+
+        """
+        Function: returns counters of car moves, blocked moves and collisions
+
+        Parameters: None
+
+        Returns:
+
+            counters:
+                type: dict{str: int}
+        """
+        return self.__counters
+
+    def get_frames(self):
+
+        """
+        Function: returns number of frames observed
+
+        Parameters: None
+
+        Returns:
+
+            frames:
+                type: int
+        """
+        return self.__frames
+
+    def get_histogram(self):
+
+        """
+        Function: returns frame time histogram as (upper bound, count) pairs, the last bound being infinity
+
+        Parameters: None
+
+        Returns:
+
+            histogram:
+                type: list[tuple(float, int)]
+        """
+        return list(zip(self.__buckets + (float('inf'),), self.__bucket_counts))
+
+    def to_csv(self):
+
+        """
+        Function: returns every metric as csv text with columns metric, label, value
+
+        Parameters: None
+
+        Returns:
+
+            csv:
+                type: str
+        """
+        lines = ['metric,label,value']
+        for phase, seconds in self.__phase_seconds.items():
+            lines.append(f'phase_seconds,{phase},{seconds!r}')
+        for name, value in self.__counters.items():
+            lines.append(f'counter,{name},{value}')
+        for bound, count in self.get_histogram():
+            lines.append(f'frame_seconds_bucket,{bound!r},{count}')
+        lines.append(f'frame_seconds_sum,,{self.__frame_seconds!r}')
+        lines.append(f'frame_seconds_count,,{self.__frames}')
+        return '\n'.join(lines) + '\n'
+
+    def to_prometheus(self):
+
+        """
+        Function: returns every metric in the Prometheus text exposition format
+
+        Parameters: None
+
+        Returns:
+
+            text:
+                type: str
+        """
+        lines = ['# HELP traffic_phase_seconds_total Seconds spent in each step phase.', '# TYPE traffic_phase_seconds_total counter']
+        for phase, seconds in self.__phase_seconds.items():
+            lines.append(f'traffic_phase_seconds_total{{phase="{phase}"}} {seconds!r}')
+        for name, value in self.__counters.items():
+            lines.append(f'# TYPE traffic_{name}_total counter')
+            lines.append(f'traffic_{name}_total {value}')
+
+        lines.append('# HELP traffic_frame_seconds Time taken by one frame.')
+        lines.append('# TYPE traffic_frame_seconds histogram')
+        cumulative = 0
+        for bound, count in self.get_histogram():
+            cumulative += count
+            label = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'traffic_frame_seconds_bucket{{le="{label}"}} {cumulative}')
+        lines.append(f'traffic_frame_seconds_sum {self.__frame_seconds!r}')
+        lines.append(f'traffic_frame_seconds_count {self.__frames}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file_path):
+
+        """
+        Function: writes metrics to file_path, as Prometheus text for .prom files and csv otherwise
+
+        Parameters:
+
+            file_path:
+                type: str
+
+        Returns: None
+        """
+        with open(file_path, 'w') as file:
+            file.write(self.to_prometheus() if file_path.endswith('.prom') else self.to_csv())
+
+    def summary_lines(self):
+
+        """
+        Function: returns short text lines of mean milliseconds per frame for each phase and the counters, used by the overlay
+
+        Parameters: None
+
+        Returns:
+
+            lines:
+                type: list[str]
+        """
+        frames = max(self.__frames, 1)
+        lines = [f'{phase}: {seconds * 1000 / frames:.2f} ms' for phase, seconds in self.__phase_seconds.items()]
+        lines += [f'{name}: {value}' for name, value in self.__counters.items()]
+        return lines
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
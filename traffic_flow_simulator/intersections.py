@@ -0,0 +1,134 @@
+class IntersectionIndex:
+
+    def __init__(self, paths=None) -> None:
+        self.__roads_at = {} #grid position -> list of (road index, offset) of every road through it
+        self.__pairs = {} #(road index, road index) with the lower index first -> list of (pos, offset on first, offset on second)
+        self.__neighbours = {} #road index -> sorted indices of roads it shares a block with
+
+        for road_index, path in enumerate(paths or []):
+            seen = set()
+            for offset, pos in enumerate(path):
+                if pos in seen: #a road crossing itself keeps the first offset like RoadNetwork.get_offset
+                    continue
+                seen.add(pos)
+                self.__roads_at.setdefault(pos, []).append((road_index, offset))
+
+        for pos, roads in self.__roads_at.items():
+            for a in range(len(roads)):
+                for b in range(a + 1, len(roads)):
+                    (i, offset_i), (j, offset_j) = roads[a], roads[b]
+                    self.__pairs.setdefault((i, j), []).append((pos, offset_i, offset_j))
+
+        for i, j in self.__pairs:
+            self.__neighbours.setdefault(i, []).append(j)
+            self.__neighbours.setdefault(j, []).append(i)
+        for neighbours in self.__neighbours.values():
+            neighbours.sort()
+
+    def get_pairs(self):
+
+        """
+        Function: returns every pair of roads that share at least one block, each pair once with the lower road index first
+
+        Parameters: None
+
+        Returns:
+
+            pairs:
+                type: list[tuple(int, int)]
+        """
+        return sorted(self.__pairs)
+
+    def get_shared_cells(self, road_a, road_b):
+
+        """
+        Function: returns blocks shared by two roads with their offsets on each path, in the order of road_a and road_b
+
+        Parameters:
+
+            road_a:
+                type: int (road index)
+
+            road_b:
+                type: int (road index)
+
+        Returns:
+
+            shared_cells:
+                type: list[tuple(tuple, int, int)] of (pos, offset on road_a, offset on road_b)
+        """
+        if road_a > road_b:
+            return [(pos, offset_a, offset_b) for pos, offset_b, offset_a in self.__pairs.get((road_b, road_a), [])]
+        return list(self.__pairs.get((road_a, road_b), []))
+
+    def get_neighbours(self, road):
+
+        """
+        Function: returns roads that share a block with road, each once
+
+        Parameters:
+
+            road:
+                type: int (road index)
+
+        Returns:
+
+            neighbours:
+                type: list[int]
+        """
+        return self.__neighbours.get(road, [])
+
+    def get_roads_at(self, pos):
+
+        """
+        Function: returns every road through block pos and its offset there
+
+        Parameters:
+
+            pos:
+                type: tuple
+
+        Returns:
+
+            roads:
+                type: list[tuple(int, int)] of (road index, offset)
+        """
+        return self.__roads_at.get(pos, [])
+
+    def get_conflict_cells(self):
+
+        """
+        Function: returns every block used by more than one road, the only blocks where cars of different roads can meet
+
+        Parameters: None
+
+        Returns:
+
+            conflict_cells:
+                type: set[tuple]
+        """
+        return {pos for pos, roads in self.__roads_at.items() if len(roads) > 1}
+
+    def get_shared_offsets(self, road):
+
+        """
+        Function: returns offsets along road's path of the blocks it shares with other roads
+
+        Parameters:
+
+            road:
+                type: int (road index)
+
+        Returns:
+
+            offsets:
+                type: list[int] sorted
+        """
+        offsets = set()
+        for neighbour in self.get_neighbours(road):
+            offsets.update(offset for _, offset, _ in self.get_shared_cells(road, neighbour))
+        return sorted(offsets)
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
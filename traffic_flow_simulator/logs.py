@@ -0,0 +1,355 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+
+LOGGER = logging.getLogger('traffic_flow_simulator')
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+LOG_QUEUE_SIZE = 10000 #records waiting for the listener thread before new ones are dropped
+
+
+class SimulationEvent:
+
+    kind = 'event'
+    level = logging.INFO
+
+    def __init__(self, **fields) -> None:
+        self.__fields = fields
+
+    def get_kind(self):
+
+        """
+        Function: returns name of the event type
+
+        Parameters: None
+
+        Returns:
+
+            kind:
+                type: str
+        """
+        return self.kind
+
+    def get_fields(self):
+
+        """
+        Function: returns the values the event carries
+
+        Parameters: None
+
+        Returns:
+
+            fields:
+                type: dict
+        """
+        return self.__fields
+
+    def message(self):
+
+        """
+        Function: returns human readable text of the event, only built when a handler formats it
+
+        Parameters: None
+
+        Returns:
+
+            message:
+                type: str
+        """
+        return f"{self.kind} {self.__fields}"
+
+    def __str__(self):
+        return self.message()
+
+
+class CollisionEvent(SimulationEvent):
+
+    kind = 'collision'
+    level = logging.INFO
+
+    def __init__(self, pos) -> None:
+        super().__init__(pos=pos)
+
+    def message(self):
+        return f"Collision at {self.get_fields()['pos']}"
+
+
+class CarRemovedEvent(SimulationEvent):
+
+    kind = 'car_removed'
+    level = logging.DEBUG
+
+    def __init__(self, pos, road) -> None:
+        super().__init__(pos=pos, road=road)
+
+    def message(self):
+        fields = self.get_fields()
+        return f"Removing car at pos {fields['pos']} on road {fields['road']}"
+
+
+def emit(event_class, *args):
+
+    """
+    Function: logs an event of event_class, building it only if a handler listens at its level
+
+    Parameters:
+
+        event_class:
+            type: subclass of SimulationEvent
+
+        args:
+            type: arguments of event_class
+
+    Returns: None
+    """
+    if LOGGER.isEnabledFor(event_class.level):
+        LOGGER.log(event_class.level, event_class(*args))
+
+
+class SamplingFilter(logging.Filter):
+
+    def __init__(self, rate, kinds=None, seed=None) -> None:
+        super().__init__()
+        self.__rate = rate
+        self.__kinds = set(kinds) if kinds else None
+        self.__rng = random.Random(seed)
+
+    def filter(self, record):
+
+        """
+        Function: keeps a rate share of simulation events (of kinds, if given). Plain log messages always pass
+
+        Parameters:
+
+            record:
+                type: logging.LogRecord
+
+        Returns:
+
+            keep:
+                type: boolean
+        """
+        event = record.msg
+        if not isinstance(event, SimulationEvent) or (self.__kinds and event.kind not in self.__kinds):
+            return True
+        return self.__rng.random() < self.__rate
+
+
+class RateLimitFilter(logging.Filter):
+
+    def __init__(self, per_second, burst=None, clock=time.monotonic) -> None:
+        super().__init__()
+        self.__per_second = per_second
+        self.__burst = burst or per_second
+        self.__clock = clock
+        self.__buckets = {} #event kind -> [tokens, last refill time, suppressed since last kept]
+        self.__suppressed = 0
+
+    def get_suppressed(self):
+
+        """
+        Function: returns number of records dropped by the limit
+
+        Parameters: None
+
+        Returns:
+
+            suppressed:
+                type: int
+        """
+        return self.__suppressed
+
+    def filter(self, record):
+
+        """
+        Function: lets through at most per_second records of each event kind (or log level for plain messages), with bursts of up to burst.
+                  A kept record carries how many of its kind were dropped before it in record.suppressed
+
+        Parameters:
+
+            record:
+                type: logging.LogRecord
+
+        Returns:
+
+            keep:
+                type: boolean
+        """
+
+        event = record.msg
+        key = event.kind if isinstance(event, SimulationEvent) else record.levelno
+        now = self.__clock()
+        bucket = self.__buckets.get(key)
+        if bucket is None:
+            bucket = self.__buckets[key] = [self.__burst, now, 0]
+        else:
+            bucket[0] = min(self.__burst, bucket[0] + (now - bucket[1]) * self.__per_second)
+            bucket[1] = now
+
+        if bucket[0] < 1:
+            bucket[2] += 1
+            self.__suppressed += 1
+            return False
+        bucket[0] -= 1
+        record.suppressed = bucket[2]
+        bucket[2] = 0
+        return True
+
+
+class EventFormatter(logging.Formatter):
+
+    def __init__(self, structured=False) -> None:
+        super().__init__('%(levelname)s %(message)s')
+        self.__structured = structured
+
+    def format(self, record):
+
+        """
+        Function: formats record as text, or as one JSON object per line with the event's fields when structured
+
+        Parameters:
+
+            record:
+                type: logging.LogRecord
+
+        Returns:
+
+            line:
+                type: str
+        """
+
+        suppressed = getattr(record, 'suppressed', 0)
+        if not self.__structured:
+            line = super().format(record)
+            return f"{line} ({suppressed} similar suppressed)" if suppressed else line
+
+        event = record.msg
+        entry = {'time': record.created, 'level': record.levelname}
+        if isinstance(event, SimulationEvent):
+            entry['kind'] = event.kind
+            entry.update(event.get_fields())
+        entry['message'] = record.getMessage()
+        if suppressed:
+            entry['suppressed'] = suppressed
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, log_queue) -> None:
+        super().__init__(log_queue)
+        self.__dropped = 0
+
+    def get_dropped(self):
+
+        """
+        Function: returns number of records dropped because the listener fell behind
+
+        Parameters: None
+
+        Returns:
+
+            dropped:
+                type: int
+        """
+        return self.__dropped
+
+    def prepare(self, record):
+
+        """
+        Function: passes record on untouched, so formatting happens on the listener thread instead of the simulation's
+
+        Parameters:
+
+            record:
+                type: logging.LogRecord
+
+        Returns:
+
+            record:
+                type: logging.LogRecord
+        """
+        return record
+
+    def enqueue(self, record):
+
+        """
+        Function: queues record without ever blocking the simulation, dropping it if the queue is full
+
+        Parameters:
+
+            record:
+                type: logging.LogRecord
+
+        Returns: None
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.__dropped += 1
+
+
+def configure_logging(level='INFO', stream=None, structured=False, sample=None, rate_limit=None, queue_size=LOG_QUEUE_SIZE):
+
+    """
+    Function: sends simulator logs through a non-blocking queue to a listener thread that writes them to stream.
+              Without this (or another handler) events below WARNING are never built
+
+    Parameters:
+
+        level:
+            default: 'INFO'
+            type: str or int
+
+        stream:
+            default: None (stdout)
+            type: file object
+
+        structured:
+            default: False
+            type: boolean (JSON lines instead of text)
+
+        sample:
+            default: None
+            type: float (share of simulation events kept)
+
+        rate_limit:
+            default: None
+            type: float (records per second kept of each event kind)
+
+        queue_size:
+            default: LOG_QUEUE_SIZE
+            type: int
+
+    Returns:
+
+        listener:
+            type: logging.handlers.QueueListener (call stop() to flush and end it)
+    """
+
+    for handler in list(LOGGER.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            LOGGER.removeHandler(handler)
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(EventFormatter(structured))
+    log_queue = queue.Queue(queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    if sample is not None:
+        handler.addFilter(SamplingFilter(sample))
+    if rate_limit is not None:
+        handler.addFilter(RateLimitFilter(rate_limit))
+
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+    return listener
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
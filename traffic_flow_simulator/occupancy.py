@@ -0,0 +1,181 @@
+class OccupancyGrid:
+
+    def __init__(self) -> None:
+        self.__cells = {} #grid position -> list of (Car, RoadNetwork) in that block
+        self.__ghosts = frozenset() #blocks held by cars simulated elsewhere, see set_ghosts
+        self.__conflicts = set() #blocks holding more than one car, kept up to date by add and remove
+
+    def get_cells(self):
+
+        """
+        Function: returns every occupied grid position and the cars in it
+
+        Parameters: None
+
+        Returns:
+
+            cells:
+                type: dict{tuple: list[tuple(Car, RoadNetwork)]}
+        """
+        return self.__cells
+
+    def get_occupants(self, pos):
+
+        """
+        Function: returns cars occupying grid position pos
+
+        Parameters:
+
+            pos:
+                type: tuple
+
+        Returns:
+
+            occupants:
+                type: list[tuple(Car, RoadNetwork)]
+        """
+        return self.__cells.get(pos, [])
+
+    def is_occupied(self, pos):
+
+        """
+        Function: returns whether any car occupies grid position pos
+
+        Parameters:
+
+            pos:
+                type: tuple
+
+        Returns:
+
+            True:
+                if at least one car is at pos
+
+            False:
+                if pos is empty
+        """
+        return pos in self.__cells or pos in self.__ghosts
+
+    def get_conflicts(self):
+
+        """
+        Function: returns blocks occupied by more than one car, so collisions are found without looking at every car
+
+        Parameters: None
+
+        Returns:
+
+            conflicts:
+                type: set[tuple]
+        """
+        return self.__conflicts
+
+    def get_ghosts(self):
+
+        """
+        Function: returns blocks marked occupied by cars that are not in this grid
+
+        Parameters: None
+
+        Returns:
+
+            ghosts:
+                type: frozenset[tuple]
+        """
+        return self.__ghosts
+
+    def set_ghosts(self, ghosts):
+
+        """
+        Function: marks blocks as occupied by cars simulated in another region, so look ahead stops for them.
+                  Ghosts have no occupants, so they never take part in collision checks
+
+        Parameters:
+
+            ghosts:
+                type: iterable[tuple]
+
+        Returns: None
+        """
+        self.__ghosts = frozenset(ghosts)
+
+    def add(self, car, road, pos):
+
+        """
+        Function: records that car on road occupies grid position pos
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork object
+
+            pos:
+                type: tuple
+
+        Returns: None
+        """
+        occupants = self.__cells.get(pos)
+        if occupants is None:
+            self.__cells[pos] = [(car, road)]
+        else:
+            occupants.append((car, road))
+            self.__conflicts.add(pos)
+
+    def remove(self, car, road, pos):
+
+        """
+        Function: removes record of car on road occupying grid position pos
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork object
+
+            pos:
+                type: tuple
+
+        Returns: None
+        """
+        occupants = self.__cells.get(pos)
+        if occupants is None:
+            return
+        if (car, road) in occupants:
+            occupants.remove((car, road))
+        if len(occupants) < 2:
+            self.__conflicts.discard(pos)
+        if not occupants:
+            del self.__cells[pos]
+
+    def move(self, car, road, old_pos, new_pos):
+
+        """
+        Function: updates occupancy after car on road moved from old_pos to new_pos
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork object
+
+            old_pos:
+                type: tuple
+
+            new_pos:
+                type: tuple
+
+        Returns: None
+        """
+        self.remove(car, road, old_pos)
+        self.add(car, road, new_pos)
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
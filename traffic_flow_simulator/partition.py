@@ -0,0 +1,472 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from scenarios import *
+
+PARTITION_MODES = ('serial', 'thread', 'process')
+
+
+def traffic_weight(road_a, road_b, shared_cells):
+
+    """
+    Function: estimates how much traffic two roads exchange through their shared blocks. Speed limits are seconds per block,
+              so faster roads push more cars through a crossing and make it more expensive to cut
+
+    Parameters:
+
+        road_a:
+            type: dict (road definition)
+
+        road_b:
+            type: dict (road definition)
+
+        shared_cells:
+            type: int
+
+    Returns:
+
+        weight:
+            type: float
+    """
+    return shared_cells * (1 / max(road_a['speed_limit'], 1e-9) + 1 / max(road_b['speed_limit'], 1e-9))
+
+
+def partition_roads(road_definitions, region_count):
+
+    """
+    Function: splits roads into at most region_count regions of similar size (blocks of path), keeping the busiest crossings
+              inside a region so the boundaries fall on low traffic crossings. The result only depends on the input order
+
+    Parameters:
+
+        road_definitions:
+            type: list[dict]
+
+        region_count:
+            type: int
+
+    Returns:
+
+        regions:
+            type: list[list[int]] of road indices
+    """
+
+    index = IntersectionIndex([road['path'] for road in road_definitions])
+    shared = {pair: len(index.get_shared_cells(*pair)) for pair in index.get_pairs()} #(i, j) -> number of shared blocks
+    edges = sorted(shared, key=lambda pair: (-traffic_weight(road_definitions[pair[0]], road_definitions[pair[1]], shared[pair]), pair))
+
+    sizes = [len(road['path']) for road in road_definitions]
+    capacity = math.ceil(sum(sizes) / max(region_count, 1))
+    parent = list(range(len(road_definitions)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    #merge roads across their busiest crossings first while the group still fits in one region
+    group_size = list(sizes)
+    for i, j in edges:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j and group_size[root_i] + group_size[root_j] <= capacity:
+            parent[root_j] = root_i
+            group_size[root_i] += group_size[root_j]
+
+    groups = {}
+    for i in range(len(road_definitions)):
+        groups.setdefault(find(i), []).append(i)
+
+    #pack groups into regions, largest first into the lightest region
+    regions = [[] for _ in range(max(region_count, 1))]
+    loads = [0] * len(regions)
+    for group in sorted(groups.values(), key=lambda group: (-group_size[find(group[0])], group[0])):
+        lightest = loads.index(min(loads))
+        regions[lightest].extend(group)
+        loads[lightest] += group_size[find(group[0])]
+
+    return [sorted(region) for region in regions if region]
+
+
+def boundary_cells(road_definitions, regions):
+
+    """
+    Function: returns blocks shared by roads of more than one region and the regions that share them
+
+    Parameters:
+
+        road_definitions:
+            type: list[dict]
+
+        regions:
+            type: list[list[int]]
+
+    Returns:
+
+        boundary:
+            type: dict{tuple: set[int]} block -> region indices
+    """
+
+    regions_at = {}
+    for region_index, region in enumerate(regions):
+        for i in region:
+            for pos in road_definitions[i]['path']:
+                regions_at.setdefault(pos, set()).add(region_index)
+    return {pos: indices for pos, indices in regions_at.items() if len(indices) > 1}
+
+
+class RegionWorker:
+
+    def __init__(self, scenario_data, road_indices, boundary, seed=None, **overrides) -> None:
+        scenario = scenario_from_dict(scenario_data)
+        road_definitions = scenario.get_roads()
+        width, height = scenario.get_size()
+        region_scenario = Scenario([road_definitions[i] for i in road_indices], scenario.get_name(), width, height, scenario.get_spawn_rate(),
+                                   scenario.get_percentage_of_slowed_cars(), scenario.get_duration(), scenario.get_dt(), seed)
+
+        #keep the spawn rate of each road the same as in the whole network
+        overrides['spawn_rate'] = overrides.get('spawn_rate', scenario.get_spawn_rate()) * len(road_definitions) / len(road_indices)
+        self.__simulation = region_scenario.build_simulation(seed=seed, **overrides)
+        self.__roads = dict(zip(road_indices, self.__simulation.get_roads())) #global road index -> RoadNetwork
+        self.__road_indices = {road: i for i, road in self.__roads.items()}
+        self.__boundary = list(boundary) #blocks this region shares with others
+        shared_cells = self.__simulation.get_intersection_index().get_conflict_cells() | set(self.__boundary) #ghosts appear on boundary blocks
+        for road in self.__simulation.get_roads():
+            road.set_shared_cells(shared_cells)
+
+    def get_simulation(self):
+
+        """
+        Function: returns Simulation stepping the roads of the region
+
+        Parameters: None
+
+        Returns:
+
+            simulation:
+                type: Simulation
+        """
+        return self.__simulation
+
+    def exchange(self, ghosts, removals, steps):
+
+        """
+        Function: removes cars the coordinator found in boundary collisions, marks blocks held by other regions as ghosts,
+                  steps the region and reports which boundary blocks its cars hold
+
+        Parameters:
+
+            ghosts:
+                type: list[tuple]
+
+            removals:
+                type: list[tuple(int, tuple)] of (global road index, block)
+
+            steps:
+                type: int
+
+        Returns:
+
+            report:
+                type: dict
+        """
+
+        for road_index, pos in removals:
+            road = self.__roads[road_index]
+            for car in list(road.get_cars()):
+                if car.get_current_pos() == pos:
+                    emit(CarRemovedEvent, pos, road.get_name())
+                    road.remove_car(car)
+
+        simulation = self.__simulation
+        simulation.get_occupancy().set_ghosts(ghosts)
+        for _ in range(steps):
+            simulation.step()
+
+        occupancy = simulation.get_occupancy()
+        occupants = []
+        for pos in self.__boundary:
+            for car, road in occupancy.get_occupants(pos):
+                occupants.append((pos, self.__road_indices[road]))
+
+        trips = simulation.get_completed_trips()
+        return {'time': simulation.get_time(), 'occupants': occupants, 'collisions': simulation.get_collisions(),
+                'completed_trips': trips, 'total_travel_time': simulation.get_total_travel_time(),
+                'cars': sum(len(road.get_cars()) for road in self.__roads.values())}
+
+
+def _region_process(connection, *args, **kwargs):
+
+    """
+    Function: runs a RegionWorker in a worker process, answering one exchange per message until it receives None
+
+    Parameters:
+
+        connection:
+            type: multiprocessing Connection
+
+        args, kwargs:
+            type: arguments of RegionWorker
+
+    Returns: None
+    """
+
+    worker = RegionWorker(*args, **kwargs)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        connection.send(worker.exchange(*message))
+    connection.close()
+
+
+class PartitionedSimulation:
+
+    def __init__(self, scenario, region_count=None, mode='process', seed=None, exchange_interval=1, **overrides) -> None:
+        if mode not in PARTITION_MODES:
+            raise ValueError(f"mode must be one of {', '.join(PARTITION_MODES)}")
+        if scenario.get_demand():
+            raise ValueError("routed demand cannot be partitioned, cars would have to cross between regions")
+
+        road_definitions = scenario.get_roads()
+        self.__regions = partition_roads(road_definitions, region_count or os.cpu_count())
+        self.__boundary = boundary_cells(road_definitions, self.__regions)
+        self.__mode = mode
+        self.__exchange_interval = exchange_interval
+        self.__dt = overrides.get('dt', scenario.get_dt())
+        self.__ghosts = [[] for _ in self.__regions]
+        self.__removals = [[] for _ in self.__regions]
+        self.__boundary_collisions = 0
+        self.__reports = []
+
+        seed = scenario.get_seed() if seed is None else seed
+        data = scenario.to_dict()
+        self.__workers = []
+        self.__connections = []
+        self.__processes = []
+        for index, region in enumerate(self.__regions):
+            #each region draws from its own generator so results do not depend on how regions are scheduled
+            region_seed = None if seed is None else random.Random(f'{seed}:{index}').randrange(2**32)
+            region_boundary = [pos for pos, indices in self.__boundary.items() if index in indices]
+            if mode == 'process':
+                parent_connection, child_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_region_process, args=(child_connection, data, region, region_boundary, region_seed),
+                                                  kwargs=overrides, daemon=True)
+                process.start()
+                child_connection.close()
+                self.__connections.append(parent_connection)
+                self.__processes.append(process)
+            else:
+                self.__workers.append(RegionWorker(data, region, region_boundary, region_seed, **overrides))
+        self.__threads = ThreadPoolExecutor(len(self.__workers)) if mode == 'thread' else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_regions(self):
+
+        """
+        Function: returns road indices of every region
+
+        Parameters: None
+
+        Returns:
+
+            regions:
+                type: list[list[int]]
+        """
+        return self.__regions
+
+    def get_boundary_cells(self):
+
+        """
+        Function: returns blocks shared between regions and the regions sharing them
+
+        Parameters: None
+
+        Returns:
+
+            boundary:
+                type: dict{tuple: set[int]}
+        """
+        return self.__boundary
+
+    def get_time(self):
+
+        """
+        Function: returns simulated time reached by every region
+
+        Parameters: None
+
+        Returns:
+
+            time:
+                type: float
+        """
+        return self.__reports[0]['time'] if self.__reports else 0.0
+
+    def get_collisions(self):
+
+        """
+        Function: returns collisions inside regions plus collisions on boundary blocks found by the coordinator
+
+        Parameters: None
+
+        Returns:
+
+            collisions:
+                type: int
+        """
+        return sum(report['collisions'] for report in self.__reports) + self.__boundary_collisions
+
+    def get_completed_trips(self):
+
+        """
+        Function: returns number of cars that reached the end of their road in any region
+
+        Parameters: None
+
+        Returns:
+
+            completed_trips:
+                type: int
+        """
+        return sum(report['completed_trips'] for report in self.__reports)
+
+    def get_mean_travel_time(self):
+
+        """
+        Function: returns mean travel time over every region
+
+        Parameters: None
+
+        Returns:
+
+            mean_travel_time:
+                type: float or None if no car finished yet
+        """
+        trips = self.get_completed_trips()
+        if not trips:
+            return None
+        return sum(report['total_travel_time'] for report in self.__reports) / trips
+
+    def get_cars(self):
+
+        """
+        Function: returns number of cars on the network
+
+        Parameters: None
+
+        Returns:
+
+            cars:
+                type: int
+        """
+        return sum(report['cars'] for report in self.__reports)
+
+    def step(self):
+
+        """
+        Function: steps every region by exchange_interval timesteps, then resolves boundary blocks.
+                  Regions only see each other through the blocks reported at the last exchange, and reports are handled in region
+                  order, so a run gives the same result in every mode
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        messages = [(self.__ghosts[i], self.__removals[i], self.__exchange_interval) for i in range(len(self.__regions))]
+        if self.__mode == 'process':
+            for connection, message in zip(self.__connections, messages):
+                connection.send(message)
+            self.__reports = [connection.recv() for connection in self.__connections]
+        elif self.__mode == 'thread':
+            self.__reports = list(self.__threads.map(lambda worker, message: worker.exchange(*message), self.__workers, messages))
+        else:
+            self.__reports = [worker.exchange(*message) for worker, message in zip(self.__workers, messages)]
+
+        holders = {} #boundary block -> list of (region, global road index)
+        for region_index, report in enumerate(self.__reports):
+            for pos, road_index in report['occupants']:
+                holders.setdefault(pos, []).append((region_index, road_index))
+
+        self.__ghosts = [[] for _ in self.__regions]
+        self.__removals = [[] for _ in self.__regions]
+        for pos in sorted(holders):
+            cars = holders[pos]
+            regions = {region_index for region_index, _ in cars}
+            if len(regions) > 1: #cars of different regions in one block crashed, regions remove their own cars next exchange
+                emit(CollisionEvent, pos)
+                self.__boundary_collisions += 1
+                for region_index, road_index in cars:
+                    self.__removals[region_index].append((road_index, pos))
+                continue
+            for region_index in self.__boundary[pos] - regions:
+                self.__ghosts[region_index].append(pos)
+
+    def run(self, duration):
+
+        """
+        Function: steps the regions until duration seconds of simulated time have passed
+
+        Parameters:
+
+            duration:
+                type: float
+
+        Returns: None
+        """
+
+        for _ in range(int(round(duration / (self.__dt * self.__exchange_interval)))):
+            self.step()
+
+    def close(self):
+
+        """
+        Function: stops worker processes and threads
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        for connection in self.__connections:
+            connection.send(None)
+            connection.close()
+        for process in self.__processes:
+            process.join()
+        if self.__threads:
+            self.__threads.shutdown()
+        self.__connections = []
+        self.__processes = []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Step one large scenario split into regions on several cores')
+    parser.add_argument('scenario')
+    parser.add_argument('--regions', type=int, default=None, help='defaults to one per core')
+    parser.add_argument('--mode', choices=PARTITION_MODES, default='process')
+    parser.add_argument('--duration', type=float, default=None, help='simulated seconds, defaults to the scenario duration')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--exchange-interval', type=int, default=1, help='timesteps each region takes between boundary exchanges')
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    duration = args.duration or scenario.get_duration()
+    if not duration:
+        parser.error('the scenario has no duration, pass --duration')
+
+    start = time.perf_counter()
+    with PartitionedSimulation(scenario, args.regions, args.mode, args.seed, args.exchange_interval) as simulation:
+        print(f"{len(simulation.get_regions())} regions, {len(simulation.get_boundary_cells())} boundary blocks")
+        simulation.run(duration)
+        print(f"{simulation.get_collisions()} collisions, {simulation.get_completed_trips()} completed trips, "
+              f"{simulation.get_cars()} cars on the network, {time.perf_counter() - start:.2f}s")
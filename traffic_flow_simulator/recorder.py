@@ -0,0 +1,446 @@
+import argparse
+import array
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from scenarios import *
+
+TRACE_MAGIC = b'TFSR'
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct('<4sHI') #magic, version, length of the binary scenario that follows
+TRACE_CHUNK = struct.Struct('<4sIIIqqdd') #magic, compressed size, raw size, tick count, first tick, last tick, first time, last time
+TRACE_TICK = struct.Struct('<qdII') #tick, time, collisions so far, event count
+TRACE_INDEX_ENTRY = struct.Struct('<qqqd') #file offset of chunk, first tick, last tick, first time
+TRACE_FOOTER = struct.Struct('<4sqI') #magic, file offset of index, chunk count
+CHUNK_MAGIC = b'CHNK'
+INDEX_MAGIC = b'TIDX'
+FOOTER_MAGIC = b'TEND'
+
+EVENT_NAMES = {EVENT_SPAWN: 'spawn', EVENT_STOP: 'stop', EVENT_END: 'end', EVENT_COLLISION: 'collision'}
+
+_STOP_WRITER = object() #tells the writer thread to finish
+
+
+def _little_endian(values):
+
+    """
+    Function: returns bytes of an array in the trace's little endian byte order
+
+    Parameters:
+
+        values:
+            type: array.array
+
+    Returns:
+
+        data:
+            type: bytes
+    """
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+
+    """
+    Function: returns array of typecode read from little endian bytes
+
+    Parameters:
+
+        typecode:
+            type: str
+
+        data:
+            type: bytes or memoryview
+
+    Returns:
+
+        values:
+            type: array.array
+    """
+    values = array.array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def encode_tick(tick, time, collisions, events, offsets):
+
+    """
+    Function: encodes one tick. Car offsets of each road are sorted and stored as gaps from the previous car, so a queue of cars
+              becomes a run of small numbers that zlib packs tightly
+
+    Parameters:
+
+        tick:
+            type: int
+
+        time:
+            type: float
+
+        collisions:
+            type: int
+
+        events:
+            type: list[tuple(int, int, int)] of (event kind, road index, offset)
+
+        offsets:
+            type: list[list[int]] car offsets of every road
+
+    Returns:
+
+        data:
+            type: bytes
+    """
+
+    counts = array.array('I', map(len, offsets))
+    gaps = array.array('I')
+    for road_offsets in offsets:
+        if road_offsets:
+            road_offsets.sort() #the recorder's own copy
+            gaps.extend([b - a for a, b in zip([0] + road_offsets, road_offsets)])
+    flat_events = array.array('I', [value for event in events for value in event])
+    return TRACE_TICK.pack(tick, time, collisions, len(events)) + _little_endian(flat_events) + _little_endian(counts) + _little_endian(gaps)
+
+
+def decode_chunk(data, road_count):
+
+    """
+    Function: decodes the uncompressed body of a chunk into ticks
+
+    Parameters:
+
+        data:
+            type: bytes
+
+        road_count:
+            type: int
+
+    Returns:
+
+        ticks:
+            type: list[dict] with keys tick, time, collisions, events and offsets (sorted car offsets of every road)
+    """
+
+    ticks = []
+    position = 0
+    while position < len(data):
+        tick, time, collisions, event_count = TRACE_TICK.unpack_from(data, position)
+        position += TRACE_TICK.size
+        flat_events = _from_little_endian('I', data[position:position + 12*event_count])
+        position += 12*event_count
+        counts = _from_little_endian('I', data[position:position + 4*road_count])
+        position += 4*road_count
+        gaps = _from_little_endian('I', data[position:position + 4*sum(counts)])
+        position += 4*sum(counts)
+
+        offsets = []
+        start = 0
+        for count in counts:
+            road_offsets = []
+            current = 0
+            for gap in gaps[start:start + count]:
+                current += gap
+                road_offsets.append(current)
+            offsets.append(road_offsets)
+            start += count
+
+        events = [tuple(flat_events[i:i + 3]) for i in range(0, len(flat_events), 3)]
+        ticks.append({'tick': tick, 'time': time, 'collisions': collisions, 'events': events, 'offsets': offsets})
+    return ticks
+
+
+def read_trace_header(data):
+
+    """
+    Function: returns the roads stored at the start of a trace and where the first chunk begins
+
+    Parameters:
+
+        data:
+            type: bytes or mmap
+
+    Returns:
+
+        scenario:
+            type: Scenario (roads only)
+
+        first_chunk:
+            type: int (file offset)
+    """
+    magic, version, length = TRACE_HEADER.unpack_from(data, 0)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"not a version {TRACE_VERSION} trace")
+    return decode_binary(bytes(data[TRACE_HEADER.size:TRACE_HEADER.size + length]), 'trace header'), TRACE_HEADER.size + length
+
+
+class Recorder:
+
+    def __init__(self, file_path, roads, chunk_ticks=256, queue_size=16, every=1, block=False, max_bytes=None, compression=6) -> None:
+        self.__file_path = file_path
+        self.__roads = roads
+        self.__road_indices = {road: i for i, road in enumerate(roads)}
+        self.__chunk_ticks = chunk_ticks
+        self.__every = every
+        self.__block = block #False drops and counts ticks when the writer falls behind, so the step loop never waits on the disk
+        self.__max_bytes = max_bytes
+        self.__compression = compression
+        self.__events = [] #events since the last recorded tick
+        self.__chunk = [] #ticks not yet handed to the writer thread
+        self.__dropped = 0 #ticks dropped by the step thread, only ever written by it
+        self.__writer_dropped = 0 #ticks dropped by the writer thread, only ever written by it
+        self.__stopped = threading.Event() #set by the writer once the trace reached max_bytes or writing failed
+        self.__error = None #exception that stopped the writer, raised by close
+        self.__index = [] #(file offset, first tick, last tick, first time) of every chunk
+        self.__queue = queue.Queue(queue_size) #bounded number of chunks so a slow disk holds back or drops ticks instead of filling memory
+
+        scenario = Scenario([{'name': road.get_name() or '', 'speed_limit': road.get_speed_limit(), 'stop_duration': road.get_stop_duration(),
+                              'path': road.get_path(), 'stop_signs': list(road.get_stop_sign_pos()),
+                              'stop_rule': road.get_stop_rule()} for road in roads])
+        header = encode_binary(scenario)
+        self.__file = open(file_path, 'wb')
+        self.__file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, len(header)) + header)
+        self.__bytes_written = self.__file.tell()
+
+        self.__writer = threading.Thread(target=self.__write_loop, name='trace-writer', daemon=True)
+        self.__writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_file_path(self):
+
+        """
+        Function: returns path of the trace file
+
+        Parameters: None
+
+        Returns:
+
+            file_path:
+                type: str
+        """
+        return self.__file_path
+
+    def get_dropped(self):
+
+        """
+        Function: returns number of ticks left out because the buffer was full, the trace reached max_bytes or writing failed
+
+        Parameters: None
+
+        Returns:
+
+            dropped:
+                type: int
+        """
+        return self.__dropped + self.__writer_dropped
+
+    def get_error(self):
+
+        """
+        Function: returns exception that stopped the writer thread, for example an OSError of a full disk
+
+        Parameters: None
+
+        Returns:
+
+            error:
+                type: Exception or None while writing works
+        """
+        return self.__error
+
+    def get_bytes_written(self):
+
+        """
+        Function: returns size of the trace file so far
+
+        Parameters: None
+
+        Returns:
+
+            bytes_written:
+                type: int
+        """
+        return self.__bytes_written
+
+    def event(self, kind, road, car):
+
+        """
+        Function: records that something happened to car on road this tick, kept until the next recorded tick
+
+        Parameters:
+
+            kind:
+                type: int (EVENT_SPAWN, EVENT_STOP, EVENT_END or EVENT_COLLISION)
+
+            road:
+                type: RoadNetwork (one of the recorded roads)
+
+            car:
+                type: Car object
+
+        Returns: None
+        """
+        self.__events.append((kind, self.__road_indices[road], car.get_offset()))
+
+    def record_tick(self, simulation):
+
+        """
+        Function: copies car offsets of every road, every every ticks, and hands them to the writer thread a chunk at a time
+
+        Parameters:
+
+            simulation:
+                type: Simulation
+
+        Returns: None
+        """
+
+        tick = simulation.get_ticks()
+        if tick % self.__every:
+            return
+
+        self.__chunk.append((tick, simulation.get_time(), simulation.get_collisions(), self.__events,
+                             [[car.get_offset() for car in road.get_cars()] for road in self.__roads]))
+        self.__events = []
+        if len(self.__chunk) >= self.__chunk_ticks:
+            self.__hand_over()
+
+    def __hand_over(self):
+
+        """
+        Function: passes the ticks collected so far to the writer thread, dropping them if the buffer is full and block is False,
+                  or if the writer has stopped
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        chunk = self.__chunk
+        self.__chunk = []
+        if self.__stopped.is_set() or not self.__writer.is_alive():
+            self.__dropped += len(chunk)
+            return
+        try:
+            self.__queue.put(chunk, block=self.__block)
+        except queue.Full:
+            self.__dropped += len(chunk)
+
+    def __write_loop(self):
+
+        """
+        Function: encodes, compresses and appends chunks from the buffer until close. After writing failed, chunks are still taken off
+                  the buffer and dropped, so neither record_tick nor close ever waits on a full buffer
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        while True:
+            chunk = self.__queue.get()
+            if chunk is _STOP_WRITER:
+                break
+            if self.__stopped.is_set():
+                self.__writer_dropped += len(chunk)
+                continue
+            try:
+                self.__write_chunk(chunk)
+            except Exception as error: #a full disk for example, kept for close to raise
+                self.__error = error
+                self.__writer_dropped += len(chunk)
+                self.__stopped.set()
+
+    def __write_chunk(self, records):
+
+        """
+        Function: appends records to the file as one compressed chunk, unless that would pass max_bytes
+
+        Parameters:
+
+            records:
+                type: list[tuple]
+
+        Returns: None
+        """
+
+        raw = b''.join(encode_tick(*record) for record in records)
+        body = zlib.compress(raw, self.__compression)
+        size = TRACE_CHUNK.size + len(body)
+        if self.__max_bytes is not None and self.__bytes_written + size > self.__max_bytes:
+            self.__writer_dropped += len(records)
+            self.__stopped.set()
+            return
+
+        first, last = records[0], records[-1]
+        self.__index.append((self.__bytes_written, first[0], last[0], first[1]))
+        self.__file.write(TRACE_CHUNK.pack(CHUNK_MAGIC, len(body), len(raw), len(records), first[0], last[0], first[1], last[1]) + body)
+        self.__file.flush() #a crashed run keeps every finished chunk
+        self.__bytes_written += size
+
+    def close(self):
+
+        """
+        Function: writes the ticks still buffered, then the chunk index and footer used by replay for random access.
+                  Raises the error that stopped the writer thread, if any, after closing the file
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        if self.__file.closed:
+            return
+        if self.__chunk:
+            self.__block = True #the last ticks are worth waiting for
+            self.__hand_over()
+        if self.__writer.is_alive():
+            self.__queue.put(_STOP_WRITER) #the writer keeps taking chunks off the buffer even after an error, so this cannot hang
+            self.__writer.join()
+        if self.__error is not None:
+            self.__file.close()
+            raise self.__error
+
+        index = INDEX_MAGIC + struct.pack('<I', len(self.__index)) + b''.join(TRACE_INDEX_ENTRY.pack(*entry) for entry in self.__index)
+        self.__file.write(index + TRACE_FOOTER.pack(FOOTER_MAGIC, self.__bytes_written, len(self.__index)))
+        self.__bytes_written += len(index) + TRACE_FOOTER.size
+        self.__file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a scenario headless and record a trace of every tick')
+    parser.add_argument('scenario')
+    parser.add_argument('-o', '--output', required=True, help='trace file to write')
+    parser.add_argument('--duration', type=float, default=None, help='simulated seconds, defaults to the scenario duration')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--every', type=int, default=1, help='record car positions every n ticks')
+    parser.add_argument('--max-bytes', type=int, default=None, help='stop writing chunks once the trace reaches this size')
+    parser.add_argument('--event-driven', action='store_true')
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    duration = args.duration or scenario.get_duration()
+    if not duration:
+        parser.error('the scenario has no duration, pass --duration')
+
+    overrides = {'event_driven': args.event_driven}
+    if args.seed is not None:
+        overrides['seed'] = args.seed
+    simulation = scenario.build_simulation(**overrides)
+    start = time.perf_counter()
+    with Recorder(args.output, simulation.get_roads(), every=args.every, max_bytes=args.max_bytes) as recorder:
+        simulation.set_recorder(recorder)
+        simulation.run(duration)
+    print(f"Recorded {simulation.get_ticks()} ticks to {args.output} ({recorder.get_bytes_written()} bytes, {recorder.get_dropped()} dropped) "
+          f"in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,266 @@
+import pygame as pyg
+from constants import *
+from logs import *
+
+class Renderer:
+
+    def __init__(self, screen) -> None:
+        self.screen = screen
+        self.__static = pyg.Surface(screen.get_size()) #pre-rendered grid, roads, stop signs and legend
+        self.__font = pyg.font.SysFont(None, FONT_SIZE)
+        self.__legend_font = pyg.font.SysFont(None, 20)
+        self.__occupied = set() #blocks holding a car in the last rendered frame
+        self.__crash_blocks = set() #blocks still showing a crash
+        self.__collisions = None
+        self.__collision_rect = None
+
+    def get_static_surface(self):
+
+        """
+        Function: returns surface holding the pre-rendered grid, roads, stop signs and legend
+
+        Parameters: None
+
+        Returns:
+
+            static:
+                type: pygame.Surface
+        """
+        return self.__static
+
+    def block_rect(self, pos):
+
+        """
+        Function: returns screen rectangle of a grid block
+
+        Parameters:
+
+            pos:
+                type: tuple
+
+        Returns:
+
+            rect:
+                type: pygame.Rect
+        """
+        return pyg.Rect(pos[0]*BLOCK_SIZE+BORDER_SIZE, pos[1]*BLOCK_SIZE+BORDER_SIZE, BLOCK_SIZE-BORDER_SIZE, BLOCK_SIZE-BORDER_SIZE)
+
+    def draw_grid(self):
+
+        """
+        Function: draws grid based structure onto the static layer given width and height
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        width, height = self.__static.get_size()
+        self.__static.fill(BLOCK_COLOR)
+
+        # border lines between blocks instead of one rect per block
+        for x in range(0, width, BLOCK_SIZE):
+            pyg.draw.rect(self.__static, BG_COLOR, (x, 0, BORDER_SIZE, height))
+        for y in range(0, height, BLOCK_SIZE):
+            pyg.draw.rect(self.__static, BG_COLOR, (0, y, width, BORDER_SIZE))
+
+    def draw_legend(self):
+
+        """
+        Function: draws legend onto the static layer
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        pyg.draw.rect(self.__static, BLOCK_COLOR, (LEGEND_BOX_X, LEGEND_BOX_Y, LEGEND_BOX_WIDTH, LEGEND_BOX_HEIGHT))
+        for color, label, y_pos in [(STOP_SIGN_COLOR, 'Stop Sign', 10), (CAR_COLOR, 'Car', 40), (CRASH_COLOR, 'Car Crash', 70), (ROAD_COLOR, 'Road', 100)]:
+            pyg.draw.rect(self.__static, color, (LEGEND_BOX_X + 5, y_pos + 5, 20, 20))
+            text_surface = self.__legend_font.render(label, True, color)
+            self.__static.blit(text_surface, (LEGEND_BOX_X + 30, y_pos))
+
+        text_surface = self.__legend_font.render('Toggle Pause with p', True, ROAD_COLOR)
+        self.__static.blit(text_surface, (LEGEND_BOX_X + 5, 130))
+
+    def draw_stop_sign(self, column, row):
+
+        """
+        Function: draws stop signs onto the static layer
+
+        Parameters:
+
+            column:
+                type: int
+            row:
+                type: int
+
+        Returns: None
+        """
+
+        if column and row:
+            pyg.draw.rect(self.__static, STOP_SIGN_COLOR, self.block_rect((column, row)))
+
+    def draw_roads(self, list_of_roads=[]):
+
+        """
+        Function: draws road networks onto the static layer
+
+        Parameters:
+
+            list_of_roads:
+                type: list[RoadNetwork]
+
+        Returns: None
+        """
+
+        for Path in list_of_roads:
+            if Path.get_path():
+                for pos in Path.get_path():
+                    pyg.draw.rect(self.__static, ROAD_COLOR, self.block_rect(pos))
+
+                if Path.has_stop_sign():
+                    for stop_sign in Path.get_stop_sign_pos():
+                        x, y = stop_sign[0], stop_sign[1]
+                        self.draw_stop_sign(x, y)
+            else:
+                LOGGER.warning("Path not provided for %s", Path.get_name())
+
+    def draw_background(self):
+
+        """
+        Function: copies the whole static layer onto the screen and clears per frame state
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        self.screen.blit(self.__static, (0, 0))
+        self.__occupied = set()
+        self.__crash_blocks = set()
+        self.__collisions = None
+        pyg.display.flip()
+
+    def draw_cars(self, list_of_roads=[]):
+
+        """
+        Function: draws cars onto the screen
+
+        Parameters:
+
+            list_of_roads:
+                type: list[RoadNetwork]
+
+        Returns:
+
+            rects:
+                type: list[pygame.Rect]
+        """
+
+        rects = []
+        for road in list_of_roads:
+            for car in road.get_cars():
+                rect = self.block_rect(car.get_current_pos())
+                pyg.draw.rect(self.screen, CAR_COLOR, rect)
+                rects.append(rect)
+        return rects
+
+    def draw_font_for_collisions(self, collisions):
+
+        """
+        Function: draws font object onto the screen that displays the number of collisions
+
+        Parameters:
+
+            collisions:
+                type: int
+
+        Returns:
+
+            rect:
+                type: pygame.Rect
+        """
+
+        text_surface = self.__font.render(f'Number of Collisions: {collisions}', True, FONT_COLOR, FONT_COLOR_BG)
+        self.__collisions = collisions
+        self.__collision_rect = self.screen.blit(text_surface, (0, 0))
+        return self.__collision_rect
+
+    def draw_instrumentation(self, instrumentation):
+
+        """
+        Function: draws mean phase times and counters in a box under the legend
+
+        Parameters:
+
+            instrumentation:
+                type: Instrumentation
+
+        Returns:
+
+            rect:
+                type: pygame.Rect
+        """
+
+        lines = instrumentation.summary_lines()
+        rect = pyg.Rect(LEGEND_BOX_X, LEGEND_BOX_Y + LEGEND_BOX_HEIGHT, LEGEND_BOX_WIDTH, 10 + 16*len(lines))
+        pyg.draw.rect(self.screen, BLOCK_COLOR, rect)
+        for i, line in enumerate(lines):
+            text_surface = self.__legend_font.render(line, True, ROAD_COLOR)
+            self.screen.blit(text_surface, (rect.x + 5, rect.y + 5 + 16*i))
+        return rect
+
+    def render_frame(self, list_of_roads, blocks_to_color, collisions):
+
+        """
+        Function: redraws only blocks whose occupancy changed or that crashed, then pushes them to the display once
+
+        Parameters:
+
+            list_of_roads:
+                type: list[RoadNetwork]
+
+            blocks_to_color:
+                type: list[tuple]
+
+            collisions:
+                type: int
+
+        Returns:
+
+            dirty_rects:
+                type: list[pygame.Rect]
+        """
+
+        occupied = set()
+        for road in list_of_roads:
+            for car in road.get_cars():
+                occupied.add(car.get_current_pos())
+
+        changed = occupied ^ self.__occupied
+        self.__crash_blocks -= changed #a car passing over a crash clears it like the old redraw did
+        self.__crash_blocks.update(blocks_to_color)
+        changed.update(blocks_to_color)
+        self.__occupied = occupied
+
+        dirty_rects = []
+        for pos in changed:
+            rect = self.block_rect(pos)
+            self.screen.blit(self.__static, rect, rect)
+            if pos in occupied:
+                pyg.draw.rect(self.screen, CAR_COLOR, rect)
+            elif pos in self.__crash_blocks:
+                pyg.draw.rect(self.screen, CRASH_COLOR, rect)
+            dirty_rects.append(rect)
+
+        if collisions != self.__collisions or (dirty_rects and self.__collision_rect.collidelist(dirty_rects) != -1):
+            dirty_rects.append(self.draw_font_for_collisions(collisions))
+
+        if dirty_rects:
+            pyg.display.update(dirty_rects)
+        return dirty_rects
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
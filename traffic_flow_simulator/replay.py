@@ -0,0 +1,459 @@
+import argparse
+import bisect
+import mmap
+import zlib
+from recorder import *
+
+CHUNK_CACHE_SIZE = 4 #decoded chunks kept for scrubbing back and forth
+
+
+class TraceReader:
+
+    def __init__(self, file_path) -> None:
+        self.__file = open(file_path, 'rb')
+        self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) #pages are only read when a chunk is decoded
+        self.__scenario, first_chunk = read_trace_header(self.__data)
+        self.__road_count = len(self.__scenario.get_roads())
+        self.__cache = {} #chunk number -> decoded ticks, in least recently used order
+
+        index = self.__read_index() or self.__scan_chunks(first_chunk)
+        self.__chunk_offsets = [entry[0] for entry in index]
+        self.__first_ticks = [entry[1] for entry in index]
+        self.__last_ticks = [entry[2] for entry in index]
+        self.__first_times = [entry[3] for entry in index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __read_index(self):
+
+        """
+        Function: returns the chunk index written by Recorder.close, read from the footer without touching the chunks
+
+        Parameters: None
+
+        Returns:
+
+            index:
+                type: list[tuple(int, int, int, float)] or None if the trace has no footer
+        """
+
+        data = self.__data
+        if len(data) < TRACE_FOOTER.size:
+            return None
+        magic, index_offset, count = TRACE_FOOTER.unpack_from(data, len(data) - TRACE_FOOTER.size)
+        if magic != FOOTER_MAGIC or data[index_offset:index_offset + 4] != INDEX_MAGIC:
+            return None
+        start = index_offset + 8
+        return [TRACE_INDEX_ENTRY.unpack_from(data, start + i*TRACE_INDEX_ENTRY.size) for i in range(count)]
+
+    def __scan_chunks(self, offset):
+
+        """
+        Function: rebuilds the chunk index by hopping from chunk header to chunk header, for traces of runs that never closed their recorder
+
+        Parameters:
+
+            offset:
+                type: int (file offset of the first chunk)
+
+        Returns:
+
+            index:
+                type: list[tuple(int, int, int, float)]
+        """
+
+        data = self.__data
+        index = []
+        while offset + TRACE_CHUNK.size <= len(data) and data[offset:offset + 4] == CHUNK_MAGIC:
+            _, compressed_size, _, _, first_tick, last_tick, first_time, _ = TRACE_CHUNK.unpack_from(data, offset)
+            if offset + TRACE_CHUNK.size + compressed_size > len(data): #chunk cut off by a crash
+                break
+            index.append((offset, first_tick, last_tick, first_time))
+            offset += TRACE_CHUNK.size + compressed_size
+        return index
+
+    def get_scenario(self):
+
+        """
+        Function: returns the recorded roads
+
+        Parameters: None
+
+        Returns:
+
+            scenario:
+                type: Scenario
+        """
+        return self.__scenario
+
+    def get_chunk_count(self):
+
+        """
+        Function: returns number of chunks in the trace
+
+        Parameters: None
+
+        Returns:
+
+            chunk_count:
+                type: int
+        """
+        return len(self.__chunk_offsets)
+
+    def get_tick_range(self):
+
+        """
+        Function: returns first and last recorded tick
+
+        Parameters: None
+
+        Returns:
+
+            tick_range:
+                type: tuple(int, int) or None for an empty trace
+        """
+        if not self.__chunk_offsets:
+            return None
+        return self.__first_ticks[0], self.__last_ticks[-1]
+
+    def __chunk(self, number):
+
+        """
+        Function: returns decoded ticks of chunk number, decompressing it only if it is not cached
+
+        Parameters:
+
+            number:
+                type: int
+
+        Returns:
+
+            ticks:
+                type: list[dict]
+        """
+
+        ticks = self.__cache.pop(number, None)
+        if ticks is None:
+            offset = self.__chunk_offsets[number]
+            compressed_size = TRACE_CHUNK.unpack_from(self.__data, offset)[1]
+            body = self.__data[offset + TRACE_CHUNK.size:offset + TRACE_CHUNK.size + compressed_size]
+            ticks = decode_chunk(zlib.decompress(body), self.__road_count)
+            if len(self.__cache) >= CHUNK_CACHE_SIZE:
+                del self.__cache[next(iter(self.__cache))]
+        self.__cache[number] = ticks
+        return ticks
+
+    def get_tick(self, tick):
+
+        """
+        Function: returns the last recorded tick at or before tick
+
+        Parameters:
+
+            tick:
+                type: int
+
+        Returns:
+
+            record:
+                type: dict with keys tick, time, collisions, events and offsets, or None before the first tick
+        """
+
+        number = bisect.bisect_right(self.__first_ticks, tick) - 1
+        if number < 0:
+            return None
+        ticks = self.__chunk(number)
+        position = bisect.bisect_right([record['tick'] for record in ticks], tick) - 1
+        return ticks[position]
+
+    def find_time(self, seconds):
+
+        """
+        Function: returns the last recorded tick at or before simulated time seconds
+
+        Parameters:
+
+            seconds:
+                type: float
+
+        Returns:
+
+            record:
+                type: dict or None before the first tick
+        """
+
+        number = bisect.bisect_right(self.__first_times, seconds) - 1
+        if number < 0:
+            return None
+        ticks = self.__chunk(number)
+        position = bisect.bisect_right([record['time'] for record in ticks], seconds) - 1
+        return ticks[position]
+
+    def iter_ticks(self, first_tick, last_tick):
+
+        """
+        Function: yields recorded ticks after first_tick up to and including last_tick
+
+        Parameters:
+
+            first_tick:
+                type: int
+
+            last_tick:
+                type: int
+
+        Returns:
+
+            ticks:
+                type: generator of dict
+        """
+
+        number = max(bisect.bisect_right(self.__first_ticks, first_tick) - 1, 0)
+        while number < len(self.__chunk_offsets) and self.__first_ticks[number] <= last_tick:
+            for record in self.__chunk(number):
+                if first_tick < record['tick'] <= last_tick:
+                    yield record
+            number += 1
+
+    def close(self):
+
+        """
+        Function: unmaps and closes the trace file
+
+        Parameters: None
+
+        Returns: None
+        """
+        self.__cache.clear()
+        self.__data.close()
+        self.__file.close()
+
+
+class ReplayRoad:
+
+    def __init__(self, road) -> None:
+        self.__road = road
+        self.__pool = [] #Car objects reused from frame to frame
+        self.__cars = []
+
+    def get_road(self):
+
+        """
+        Function: returns the RoadNetwork being replayed
+
+        Parameters: None
+
+        Returns:
+
+            road:
+                type: RoadNetwork
+        """
+        return self.__road
+
+    def get_cars(self):
+
+        """
+        Function: returns cars of the current frame, which is all the renderer reads from a road
+
+        Parameters: None
+
+        Returns:
+
+            cars:
+                type: list[Car]
+        """
+        return self.__cars
+
+    def set_offsets(self, offsets):
+
+        """
+        Function: places one car at each recorded offset along the road's path
+
+        Parameters:
+
+            offsets:
+                type: list[int]
+
+        Returns: None
+        """
+
+        path = self.__road.get_path()
+        while len(self.__pool) < len(offsets):
+            car = Car()
+            car.set_path(path)
+            self.__pool.append(car)
+        for car, offset in zip(self.__pool, offsets):
+            car.set_offset(offset)
+        self.__cars = self.__pool[:len(offsets)]
+
+
+class Replay:
+
+    def __init__(self, reader, screen=None) -> None:
+        import pygame as pyg
+        from renderer import Renderer
+
+        self.__pyg = pyg
+        self.__reader = reader
+        self.__roads = reader.get_scenario().build_roads()
+        self.__replay_roads = [ReplayRoad(road) for road in self.__roads]
+        if screen is None:
+            width, height = reader.get_scenario().get_size()
+            screen = pyg.display.set_mode((max(width*BLOCK_SIZE, WIDTH), max(height*BLOCK_SIZE, HEIGHT)))
+        self.__renderer = Renderer(screen)
+        self.__current = None #tick shown on screen
+
+    def get_current(self):
+
+        """
+        Function: returns tick shown on screen
+
+        Parameters: None
+
+        Returns:
+
+            record:
+                type: dict or None before the first frame
+        """
+        return self.__current
+
+    def show(self, record, blocks_to_color=()):
+
+        """
+        Function: draws the cars of record and crash blocks through the renderer's dirty rectangle path
+
+        Parameters:
+
+            record:
+                type: dict
+
+            blocks_to_color:
+                default: ()
+                type: iterable[tuple]
+
+        Returns: None
+        """
+
+        for replay_road, offsets in zip(self.__replay_roads, record['offsets']):
+            replay_road.set_offsets(offsets)
+        self.__renderer.render_frame(self.__replay_roads, list(blocks_to_color), record['collisions'])
+        self.__current = record
+
+    def seek(self, seconds):
+
+        """
+        Function: jumps to simulated time seconds
+
+        Parameters:
+
+            seconds:
+                type: float
+
+        Returns: None
+        """
+
+        record = self.__reader.find_time(seconds)
+        if record is None:
+            tick_range = self.__reader.get_tick_range()
+            record = tick_range and self.__reader.get_tick(tick_range[0])
+        if record:
+            self.show(record)
+
+    def advance_to(self, seconds):
+
+        """
+        Function: plays forward to simulated time seconds, keeping crashes of the ticks skipped on the way
+
+        Parameters:
+
+            seconds:
+                type: float
+
+        Returns: None
+        """
+
+        record = self.__reader.find_time(seconds)
+        if record is None or self.__current is None or record['tick'] <= self.__current['tick']:
+            return
+
+        paths = [road.get_path() for road in self.__roads]
+        blocks_to_color = [paths[road][offset] for passed in self.__reader.iter_ticks(self.__current['tick'], record['tick'])
+                           for kind, road, offset in passed['events'] if kind == EVENT_COLLISION]
+        self.show(record, blocks_to_color)
+
+    def run(self, speed=1.0, start=0.0, max_frames=None):
+
+        """
+        Function: plays the trace at speed times real time. p pauses, left and right seek 5 seconds, up and down double or halve speed
+
+        Parameters:
+
+            speed:
+                default: 1.0
+                type: float
+
+            start:
+                default: 0.0
+                type: float (simulated seconds)
+
+            max_frames:
+                default: None
+                type: int (stop after this many frames)
+
+        Returns: None
+        """
+
+        pyg = self.__pyg
+        renderer = self.__renderer
+        renderer.draw_grid()
+        renderer.draw_legend()
+        renderer.draw_roads(self.__roads)
+        renderer.draw_background()
+
+        clock = pyg.time.Clock()
+        position = start
+        paused = False
+        frame = 0
+        self.seek(position)
+
+        while max_frames is None or frame < max_frames:
+            for event in pyg.event.get():
+                if event.type == pyg.QUIT:
+                    return
+                if event.type != pyg.KEYDOWN:
+                    continue
+                if event.key == pyg.K_p:
+                    paused = not paused
+                elif event.key in (pyg.K_LEFT, pyg.K_RIGHT):
+                    position = max(0.0, position + (5 if event.key == pyg.K_RIGHT else -5))
+                    self.seek(position)
+                elif event.key == pyg.K_UP:
+                    speed *= 2
+                elif event.key == pyg.K_DOWN:
+                    speed /= 2
+
+            if not paused:
+                position += speed / FRAME_RATE
+                self.advance_to(position)
+
+            frame += 1
+            clock.tick(FRAME_RATE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replay a recorded trace. p pauses, left/right seek, up/down change speed')
+    parser.add_argument('trace')
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--start', type=float, default=0.0, help='simulated second to start from')
+    args = parser.parse_args()
+
+    import pygame
+    pygame.init()
+    pygame.display.set_caption("Traffic Flow Simulator replay")
+    with TraceReader(args.trace) as reader:
+        Replay(reader).run(args.speed, args.start)
+    pygame.quit()
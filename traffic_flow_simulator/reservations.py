@@ -0,0 +1,250 @@
+import bisect
+
+RESERVATION_DEPTH = 3 #shared blocks in a row a car books at once before it enters them
+RESERVATION_HOLD = 2 #block move times each booked block stays booked, so a car running slightly late still finds it free
+
+
+class ReservationManager:
+
+    def __init__(self, cells, clock, depth=RESERVATION_DEPTH, hold=RESERVATION_HOLD) -> None:
+        self.__clock = clock
+        self.__depth = depth
+        self.__hold = hold
+        self.__tables = {cell: ([], [], []) for cell in cells} #shared block -> (starts, ends, cars) of bookings that never overlap, by start
+        self.__heads = dict.fromkeys(cells, 0) #shared block -> first booking of its table that has not run out
+        self.__booked = {} #Car -> {block: (start, end)} of the bookings it made last
+        self.__granted = 0
+        self.__refused = 0
+
+    def get_table(self, cell):
+
+        """
+        Function: returns bookings of a shared block
+
+        Parameters:
+
+            cell:
+                type: tuple
+
+        Returns:
+
+            bookings:
+                type: list[tuple(float, float, Car)] of (start, end, car) in time order
+        """
+        starts, ends, cars = self.__tables[cell]
+        head = self.__heads[cell]
+        return list(zip(starts[head:], ends[head:], cars[head:]))
+
+    def get_stats(self):
+
+        """
+        Function: returns how many requests to enter shared blocks were granted and refused
+
+        Parameters: None
+
+        Returns:
+
+            stats:
+                type: dict with keys granted, refused and bookings
+        """
+        return {'granted': self.__granted, 'refused': self.__refused,
+                'bookings': sum(len(table[0]) - self.__heads[cell] for cell, table in self.__tables.items())}
+
+    def request(self, car, road):
+
+        """
+        Function: lets car move if the block in front of it is not shared, or its own booking of it has not run out. Otherwise books
+                  the shared blocks ahead (up to depth of them) for the time the car needs to cross them. Each table is sorted by start,
+                  so one bisection finds the only booking that can overlap and admission costs O(log k) per block.
+                  Cars with no following distance never ask and keep crashing
+
+        Parameters:
+
+            car:
+                type: Car object (able to move and not blocked by look ahead)
+
+            road:
+                type: RoadNetwork
+
+        Returns:
+
+            retry_time:
+                type: float or None if car may move now
+        """
+
+        path = road.get_path()
+        offset = car.get_offset() + 1
+        tables = self.__tables
+        if path[offset] not in tables:
+            self.__booked.pop(car, None)
+            return None
+        now = self.__clock.now()
+        booked = self.__booked.get(car)
+        if booked is not None:
+            booking = booked.get(path[offset])
+            if booking is not None and now < booking[1]:
+                return None
+            if booking is not None: #held up until its slot ran out, the rest of its plan is stale and another car may hold the block now
+                self.__cancel(car, now)
+
+        velocity = car.get_velocity()
+        cells = []
+        while offset < len(path) and len(cells) < self.__depth and path[offset] in tables:
+            cells.append(path[offset])
+            offset += 1
+
+        #block i is booked from when the car enters it to hold move times later, [now + i*velocity, now + (i+hold)*velocity)
+        for i, cell in enumerate(cells):
+            starts, ends, _ = tables[cell]
+            head = self.__expire(cell, now)
+            lead = i * velocity
+            position = bisect.bisect_right(ends, now + lead, head)
+            #compared as clear times, so a retry at the returned time always finds the block clear of that booking
+            while position > head and ends[position - 1] - lead > now:
+                position -= 1
+            while position < len(ends) and ends[position] - lead <= now:
+                position += 1
+            #bookings never overlap, so the first one still busy after the car would enter is the only one that can overlap its slot
+            if position < len(starts) and starts[position] < now + lead + self.__hold * velocity:
+                self.__refused += 1
+                retry_time = ends[position] - lead
+                self.__clock.schedule(retry_time)
+                return retry_time
+
+        bookings = {}
+        for i, cell in enumerate(cells):
+            starts, ends, cars = tables[cell]
+            start = now + i * velocity
+            position = bisect.bisect_right(starts, start, self.__heads[cell])
+            starts.insert(position, start)
+            ends.insert(position, start + self.__hold * velocity)
+            cars.insert(position, car)
+            bookings[cell] = (start, ends[position])
+        self.__booked[car] = bookings
+        self.__granted += 1
+        return None
+
+    def __expire(self, cell, now):
+
+        """
+        Function: moves the head of a table past bookings that ran out, dropping them from the front once they are half of it,
+                  so expiry costs O(1) per booking
+
+        Parameters:
+
+            cell:
+                type: tuple
+
+            now:
+                type: float
+
+        Returns:
+
+            head:
+                type: int (first booking still running)
+        """
+        starts, ends, cars = self.__tables[cell]
+        head = self.__heads[cell]
+        expired = bisect.bisect_right(ends, now, head)
+        if expired == head:
+            return head
+        for car in cars[head:expired]:
+            self.__forget(car, now)
+        if 2 * expired >= len(starts):
+            del starts[:expired], ends[:expired], cars[:expired]
+            expired = 0
+        self.__heads[cell] = expired
+        return expired
+
+    def __cancel(self, car, now):
+
+        """
+        Function: takes back the bookings of car that have not run out
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            now:
+                type: float
+
+        Returns: None
+        """
+        for cell, (start, end) in self.__booked.pop(car).items():
+            if end <= now:
+                continue
+            starts, ends, cars = self.__tables[cell]
+            position = bisect.bisect_left(starts, start, self.__heads[cell])
+            if position < len(cars) and cars[position] is car:
+                del starts[position], ends[position], cars[position]
+
+    def __forget(self, car, now):
+
+        """
+        Function: drops the record of booked blocks of a car whose bookings have all run out, including cars that crashed
+
+        Parameters:
+
+            car:
+                type: Car object or None for a car that had left before a snapshot was restored
+
+            now:
+                type: float
+
+        Returns: None
+        """
+        booked = self.__booked.get(car)
+        if booked is not None and all(end <= now for _, end in booked.values()):
+            del self.__booked[car]
+
+    def get_state(self, car_numbers):
+
+        """
+        Function: returns every running booking and the record of booked blocks as plain lists, for snapshots
+
+        Parameters:
+
+            car_numbers:
+                type: dict{Car: int} of cars on the roads to their place in the snapshot, cars missing from it are saved as -1
+
+        Returns:
+
+            state:
+                type: dict
+        """
+        tables = []
+        for cell, (starts, ends, cars) in self.__tables.items():
+            head = self.__heads[cell]
+            if head < len(starts):
+                tables.append([list(cell), starts[head:], ends[head:], [car_numbers.get(car, -1) for car in cars[head:]]])
+        return {'granted': self.__granted, 'refused': self.__refused, 'tables': tables,
+                'booked': [[car_numbers[car], [[list(cell), start, end] for cell, (start, end) in bookings.items()]]
+                           for car, bookings in self.__booked.items() if car in car_numbers]}
+
+    def set_state(self, state, cars):
+
+        """
+        Function: puts bookings back where get_state found them
+
+        Parameters:
+
+            state:
+                type: dict
+
+            cars:
+                type: list[Car] in snapshot order
+
+        Returns: None
+        """
+        self.__granted = state['granted']
+        self.__refused = state['refused']
+        self.__tables = {cell: ([], [], []) for cell in self.__tables}
+        self.__heads = dict.fromkeys(self.__tables, 0)
+        for cell, starts, ends, numbers in state['tables']:
+            self.__tables[tuple(cell)] = (starts, ends, [cars[number] if number >= 0 else None for number in numbers])
+        self.__booked = {cars[number]: {tuple(cell): (start, end) for cell, start, end in bookings} for number, bookings in state['booked']}
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
@@ -1,16 +1,157 @@
+from clock import *
+from logs import *
+from occupancy import *
+
+class CarQueue:
+
+    def __init__(self, cars=None) -> None:
+        self.__first = None #car furthest along the path
+        self.__last = None
+        self.__length = 0
+        for car in cars or []:
+            self.append(car)
+
+    def __iter__(self):
+
+        """
+        Function: yields Car objects in path order by following the follower links, the car furthest along first
+
+        Parameters: None
+
+        Returns:
+
+            cars:
+                type: generator[Car]
+        """
+        car = self.__first
+        while car is not None:
+            yield car
+            car = car.get_follower()
+
+    def __len__(self):
+        return self.__length
+
+    def get_first(self):
+
+        """
+        Function: returns Car object furthest along the road
+
+        Parameters: None
+
+        Returns:
+
+            first:
+                type: Car object or None if the road is empty
+        """
+        return self.__first
+
+    def get_last(self):
+
+        """
+        Function: returns Car object closest to the start of the road
+
+        Parameters: None
+
+        Returns:
+
+            last:
+                type: Car object or None if the road is empty
+        """
+        return self.__last
+
+    def append(self, car):
+
+        """
+        Function: links Car object behind the last car
+
+        Parameters:
+
+            car:
+                type: Car object
+
+        Returns: None
+        """
+        self.insert_after(self.__last, car)
+
+    def insert_after(self, leader, car):
+
+        """
+        Function: links Car object directly behind leader in O(1)
+
+        Parameters:
+
+            leader:
+                type: Car object already in the queue, or None to put car first
+
+            car:
+                type: Car object
+
+        Returns: None
+        """
+        follower = self.__first if leader is None else leader.get_follower()
+        car.set_leader(leader)
+        car.set_follower(follower)
+        if leader is None:
+            self.__first = car
+        else:
+            leader.set_follower(car)
+        if follower is None:
+            self.__last = car
+        else:
+            follower.set_leader(car)
+        self.__length += 1
+
+    def remove(self, car):
+
+        """
+        Function: unlinks Car object from anywhere in the queue in O(1) and hands its leader to the car behind it
+
+        Parameters:
+
+            car:
+                type: Car object in the queue
+
+        Returns: None
+        """
+        leader = car.get_leader()
+        follower = car.get_follower()
+        if leader is None:
+            self.__first = follower
+        else:
+            leader.set_follower(follower)
+        if follower is None:
+            self.__last = leader
+        else:
+            follower.set_leader(leader)
+        car.set_leader(None)
+        car.set_follower(None)
+        self.__length -= 1
 
 class RoadNetwork:
 
-    def __init__(self, speed_limit=30, stop_sign=None, stop_duration=3, path=None, name=None, start=None, end=None, cars=None, intersect_roads=None) -> None:
+    def __init__(self, speed_limit=30, stop_sign=None, stop_duration=3, path=None, name=None, start=None, end=None, cars=None, intersect_roads=None, clock=None, occupancy=None,
+                 stop_rule='stop') -> None:
         self.__speed_limit = speed_limit
         self.__stop_sign = stop_sign or []
         self.__name = name
         self.__path = path
+        self.__path_index = {} #position -> offset along path, first occurrence wins like list.index
+        for i, pos in enumerate(path or []):
+            self.__path_index.setdefault(pos, i)
         self.__start = start
         self.__end = end
-        self.__cars = cars or []
+        self.__cars = CarQueue(cars) #path order, first car is furthest along, linked through each car's leader and follower
+        self.__watch = None #per offset, 1 where a car of another road or a ghost can appear, see set_shared_cells
+        self.__turning = [] #routed cars that reached the block where they leave for their next road
+        self.__stop_offsets = frozenset() #offsets of path with a stop sign, set by StopController
+        self.__stopping = [] #cars that reached a stop offset, picked up by StopController.stop_cars
         self.__stop_duration = stop_duration
+        self.__stop_rule = stop_rule #one of STOP_RULES for every stop sign of the road
         self.__intersect_roads = intersect_roads or []
+        self.__clock = clock or WallClock()
+        self.__occupancy = occupancy or OccupancyGrid() #shared between roads by Simulation so look ahead sees intersecting roads
+        for car in self.__cars:
+            self.__occupancy.add(car, self, car.get_current_pos())
     
 
     def get_intersections(self):
@@ -54,6 +195,23 @@ class RoadNetwork:
         """
         return self.__path
     
+    def get_offset(self, pos):
+
+        """
+        Function: returns index of pos within path using the precomputed position to offset map
+
+        Parameters:
+
+            pos:
+                type: tuple
+
+        Returns:
+
+            offset
+                type: int or None if pos is not on path
+        """
+        return self.__path_index.get(pos)
+
     def get_start(self):
 
         """
@@ -85,14 +243,14 @@ class RoadNetwork:
     def get_cars(self):
 
         """
-        Function: returns list of Car objects present in current RoadNetwork object
+        Function: returns Car objects present in current RoadNetwork object in path order, the car furthest along first
 
         Parameters: None
 
         Returns: 
         
             cars
-                type: list[Car]
+                type: CarQueue
         """
         return self.__cars
     
@@ -138,21 +296,256 @@ class RoadNetwork:
         """
         return self.__stop_duration
 
-    def add_car(self, car):
+    def get_stop_rule(self):
+
+        """
+        Function: returns how cars are let go at the road's stop signs
+
+        Parameters: None
+
+        Returns:
+
+            stop_rule:
+                type: str (one of STOP_RULES)
+        """
+        return self.__stop_rule
+
+    def set_stop_offsets(self, offsets):
+
+        """
+        Function: assigns offsets of the path that have a stop sign, so cars reaching one are noted as they move instead of found by a scan
+
+        Parameters:
+
+            offsets:
+                type: iterable[int]
+
+        Returns: None
+        """
+        self.__stop_offsets = frozenset(offsets)
+
+    def pop_stopping_cars(self):
+
+        """
+        Function: returns cars that reached a stop sign since the last call and forgets them
+
+        Parameters: None
+
+        Returns:
+
+            stopping_cars:
+                type: list[Car]
+        """
+        stopping_cars = self.__stopping
+        self.__stopping = []
+        return stopping_cars
+
+    def get_clock(self):
+
+        """
+        Function: returns clock shared by the RoadNetwork and its Car objects
+
+        Parameters: None
+
+        Returns:
+
+            clock:
+                type: WallClock or VirtualClock
+        """
+        return self.__clock
+
+    def set_clock(self, clock):
+
+        """
+        Function: assigns clock of RoadNetwork object and its Car objects to clock
+
+        Parameters:
+
+            clock:
+                type: WallClock or VirtualClock
+
+        Returns: None
+        """
+        self.__clock = clock
+        for car in self.__cars:
+            car.set_clock(clock)
+
+    def get_occupancy(self):
+
+        """
+        Function: returns occupancy grid that records which blocks cars are in
+
+        Parameters: None
+
+        Returns:
+
+            occupancy:
+                type: OccupancyGrid
+        """
+        return self.__occupancy
+
+    def set_occupancy(self, occupancy):
+
+        """
+        Function: assigns occupancy grid of RoadNetwork object to occupancy and registers its Car objects in it
+
+        Parameters:
+
+            occupancy:
+                type: OccupancyGrid
 
+        Returns: None
         """
-        Function: appends Car object to cars list and sets Car object's path to RoadNetwork's path
+        for car in self.__cars:
+            self.__occupancy.remove(car, self, car.get_current_pos())
+            occupancy.add(car, self, car.get_current_pos())
+        self.__occupancy = occupancy
+
+    def is_entry_free(self):
+
+        """
+        Function: returns whether a car can be added at the start of the road, from the last car of the queue alone
+
+        Parameters: None
+
+        Returns:
+
+            True:
+                if no car of this road is on the start block
+            
+            False:
+                if the last car is still on it
+        """
+        last = self.__cars.get_last()
+        return last is None or last.get_current_pos() != self.__start
+
+    def set_shared_cells(self, cells):
+
+        """
+        Function: marks which blocks of the path cars of other roads (or other regions' ghosts) can occupy, so look ahead only
+                  checks those blocks and the leader instead of every block in front of a car
+
+        Parameters:
+
+            cells:
+                type: set[tuple]
+
+        Returns: None
+        """
+
+        path = self.get_path()
+        if len(self.__path_index) < len(path): #a road crossing itself can meet its own cars anywhere
+            self.__watch = bytearray([1]) * len(path)
+        else:
+            self.__watch = bytearray(pos in cells for pos in path)
+
+    def add_car(self, car, offset=None):
+
+        """
+        Function: appends Car object behind the last car of the road and sets Car object's path, clock and leader
 
         Parameters:
 
             car
                 type: Car object
+
+            offset
+                default: None (start of road)
+                type: int
         
         Returns: None
         """
-        car.set_current_pos(self.get_start())
         car.set_path(self.get_path())
+        car.set_offset(self.__path_index[self.get_start()] if offset is None else offset)
+        car.set_clock(self.__clock)
+        car.start_time = self.__clock.now()
+        car.set_spawn_time(car.start_time)
+        self.__clock.schedule(car.start_time + car.get_velocity())
         self.__cars.append(car)
+        self.__occupancy.add(car, self, car.get_current_pos())
+        if car.get_turn_offset() == car.get_offset():
+            self.__turning.append(car)
+        if car.get_offset() in self.__stop_offsets:
+            self.__stopping.append(car)
+
+    def enter_car(self, car, offset):
+
+        """
+        Function: puts a car that turned off another road into its place in path order at offset, at this road's speed limit
+
+        Parameters:
+
+            car
+                type: Car object (already taken off its previous road)
+
+            offset
+                type: int
+
+        Returns: None
+        """
+
+        car.set_path(self.__path)
+        car.set_offset(offset)
+        car.set_velocity(self.__speed_limit)
+        self.__clock.schedule(car.start_time + car.get_velocity())
+
+        leader = self.__cars.get_last()
+        while leader is not None and leader.get_offset() < offset: #cars usually turn in near the back of the queue
+            leader = leader.get_leader()
+        self.__cars.insert_after(leader, car)
+        self.__occupancy.add(car, self, car.get_current_pos())
+        if car.get_turn_offset() == offset:
+            self.__turning.append(car)
+        if offset in self.__stop_offsets:
+            self.__stopping.append(car)
+
+    def pop_turning_cars(self):
+
+        """
+        Function: returns routed cars that reached their turn since the last call and forgets them
+
+        Parameters: None
+
+        Returns:
+
+            turning_cars:
+                type: list[Car]
+        """
+        turning_cars = self.__turning
+        self.__turning = []
+        return turning_cars
+
+    def move_car(self, car):
+
+        """
+        Function: moves Car object one grid position along path if able and not stopped, updates the occupancy grid
+                  and notes cars reaching their turn or a stop sign
+
+        Parameters:
+
+            car
+                type: Car object
+
+        Returns:
+
+            True:
+                if Car moved
+
+            False:
+                if Car did not move
+        """
+        if car.get_stop_state(): #let go by StopController
+            return False
+        pos = car.get_current_pos()
+        if car.move():
+            self.__occupancy.move(car, self, pos, car.get_current_pos())
+            offset = car.get_offset()
+            if car.get_turn_offset() == offset:
+                self.__turning.append(car)
+            if offset in self.__stop_offsets:
+                self.__stopping.append(car)
+            return True
+        return False
 
     def has_stop_sign(self):
         
@@ -168,38 +561,28 @@ class RoadNetwork:
         """
         return self.__stop_sign
     
-    def temp_stop_cars(self):
-
-        """
-        Function: stops Car objects in cars list if Car object at stop sign
-
-        Parameters: None
-
-        Returns: None
-        """ 
-
-        if self.has_stop_sign():
-        
-            cars = self.get_cars()
-            for car in cars:
-                if car.get_current_pos() in self.get_stop_sign_pos() and not car.get_stop_state():
-                    car.set_stop_state(True)
-        
     def remove_any_end_cars(self):
 
         """
-        Function: removes car in cars list if car at end position
+        Function: removes cars at end position, which can only be the first cars of the road
 
         Parameters: None
 
-        Returns: None
+        Returns:
+
+            removed_cars:
+                type: list[Car]
         """
-        cars = self.get_cars()
-        for car in cars:
-            if car.get_current_pos() == self.get_end():
-                self.remove_car(car)
+        removed_cars = []
+        cars = self.__cars
+        end = self.get_end()
+        while cars.get_first() is not None and cars.get_first().get_current_pos() == end:
+            car = cars.get_first()
+            self.remove_car(car)
+            removed_cars.append(car)
+        return removed_cars
     
-    def detect_cars(self, current_pos, distance, intersect_roads=None): # function for a car to keep a following distance by finding any cars in certain distance
+    def detect_cars(self, current_pos, distance, intersect_roads=None, car=None): # function for a car to keep a following distance by finding any cars in certain distance
 
         """
         Function: checks for distance amount of grid blocks in front of Car object for Car objects.
@@ -214,7 +597,11 @@ class RoadNetwork:
             
             intersect_roads:
                 default: None
-                type: list[RoadNetwork]
+                type: list[RoadNetwork] (unused, kept for compatibility since the shared occupancy grid covers intersecting roads)
+
+            car:
+                default: None (check every block)
+                type: Car object at current_pos, whose leader stands in for the blocks only this road uses
 
         Returns: 
 
@@ -226,32 +613,105 @@ class RoadNetwork:
 
         """
 
-        path = self.get_path()
-        current_pos_ind = path.index(current_pos)
-        pos_in_distance = []
+        path = self.__path
+        current_pos_ind = self.__path_index[current_pos]
+        last_pos_ind = min(current_pos_ind + distance + 1, len(path) - 1)
+        occupancy = self.__occupancy
+        watch = self.__watch
 
-        for i in range(1, distance+2):
-            if (i + current_pos_ind) <= len(path)-1:      
-                pos_in_distance.append(path[current_pos_ind+i])
-        
-        if not intersect_roads:
-            intersect_roads = self.__intersect_roads
-            for road in intersect_roads:
-                cars = road.get_cars()
-                for car in cars:
-                    if car.get_current_pos() in pos_in_distance:
-                        return True        
-        
-        for car in self.get_cars():
-            if car.get_current_pos() in pos_in_distance:
+        if watch is None or car is None:
+            # the occupancy grid is shared by every road, so this also sees cars of intersecting roads
+            for i in range(current_pos_ind + 1, last_pos_ind + 1):
+                if occupancy.is_occupied(path[i]):
+                    return True
+            return False
+
+        leader = car.get_leader()
+        if leader is not None and current_pos_ind < leader.get_offset() <= last_pos_ind:
+            return True
+        for i in range(current_pos_ind + 1, last_pos_ind + 1): #only blocks other roads cross can hold anyone but the leader
+            if watch[i] and occupancy.is_occupied(path[i]):
                 return True
-            
         return False
 
+    def get_blocking_pos(self, current_pos, distance, car=None):
+
+        """
+        Function: returns nearest occupied grid block within distance blocks in front of current_pos, the block detect_cars stops for
+
+        Parameters:
+
+            current_pos:
+                type: tuple
+
+            distance:
+                type: int
+
+            car:
+                default: None
+                type: Car object at current_pos
+
+        Returns:
+
+            pos:
+                type: tuple or None if no block ahead is occupied
+        """
+        offset = self.__blocking_offset(current_pos, distance, car)
+        return None if offset is None else self.__path[offset]
+
+    def __blocking_offset(self, current_pos, distance, car):
+
+        """
+        Function: returns offset of the nearest occupied block within distance blocks in front of current_pos. Once shared cells are set
+                  and car is given, blocks only this road uses are covered by car's leader, so the occupancy grid is only asked
+                  about blocks other roads cross
+
+        Parameters:
+
+            current_pos:
+                type: tuple
+
+            distance:
+                type: int
+
+            car:
+                type: Car object or None
+
+        Returns:
+
+            offset:
+                type: int or None
+        """
+
+        path = self.__path
+        first_pos_ind = self.__path_index[current_pos] + 1
+        last_pos_ind = min(first_pos_ind + distance, len(path) - 1)
+        occupancy = self.__occupancy
+        watch = self.__watch
+
+        if watch is None or car is None:
+            for i in range(first_pos_ind, last_pos_ind + 1):
+                if occupancy.is_occupied(path[i]):
+                    return i
+            return None
+
+        leader = car.get_leader()
+        found = None
+        if leader is not None:
+            leader_ind = leader.get_offset()
+            if first_pos_ind <= leader_ind <= last_pos_ind:
+                found = leader_ind
+                last_pos_ind = leader_ind - 1 #only crossing traffic can be nearer than the leader
+        for i in range(first_pos_ind, last_pos_ind + 1):
+            if watch[i] and occupancy.is_occupied(path[i]):
+                return i
+        return found
+
     def remove_car(self, car_obj):
 
         """
-        Function: removes Car object from cars list
+        Function: removes Car object from anywhere in cars queue in O(1), whether it reached the end, turned or crashed, and hands its
+                  leader to the car behind it
 
         Parameters: 
 
@@ -261,8 +721,8 @@ class RoadNetwork:
         Returns: None
         """
 
-        cars = self.get_cars()
-        cars.remove(car_obj)
+        self.__cars.remove(car_obj)
+        self.__occupancy.remove(car_obj, self, car_obj.get_current_pos())
 
     def check_for_collisions(self):
 
@@ -285,7 +745,7 @@ class RoadNetwork:
                 continue
             else:
                 for car, road in collision:
-                    print(f'Removing car at pos {car.get_current_pos()} on road {road.get_name()}')
+                    emit(CarRemovedEvent, car.get_current_pos(), road.get_name())
                     road.remove_car(car)
                     blocks_to_color.append(car.get_current_pos())
         return blocks_to_color
@@ -295,7 +755,7 @@ class RoadNetwork:
     def _check_for_collisions(self):
 
         """
-        Function: finds collisions (when two Car objects have same current position) within the RoadNework and other RoadNetworks in intersect_roads
+        Function: finds collisions (when two Car objects have same current position) between the RoadNework's cars and any car in the occupancy grid
 
         Parameters: None
 
@@ -306,26 +766,18 @@ class RoadNetwork:
         """
         
         collisions = {}
+        occupancy = self.__occupancy
 
-        intersecting_roads = self.get_intersections()
-        self_cars = self.get_cars()
-        for car in self_cars:
-            if car.get_current_pos() in collisions:
-                collisions[car.get_current_pos()].add((car, self))
-                print(f"Collision at {car.get_current_pos()}")
-            else:
-                collisions[car.get_current_pos()] = set([(car, self)])
-        
-        for road in intersecting_roads:
-            for car in road.get_cars():
-                if car.get_current_pos() in collisions:
-                    collisions[car.get_current_pos()].add((car, road))
-                    print(f"Collision at {car.get_current_pos()}")
+        for car in self.get_cars():
+            pos = car.get_current_pos()
+            if pos in collisions:
+                continue
+            occupants = occupancy.get_occupants(pos)
+            if len(occupants) > 1:
+                collisions[pos] = list(occupants)
+                emit(CollisionEvent, pos)
 
-        
         return collisions
-        
-        
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+import heapq
+from collections import OrderedDict
+
+ROUTE_CACHE_SIZE = 4096 #origin-destination pairs kept by RoutePlanner
+ROUTE_TURN_COST = 0.5 #seconds added per turn so routes do not hop between roads that run side by side
+
+
+class RoutePlanner:
+
+    def __init__(self, roads, index, cache_size=ROUTE_CACHE_SIZE, turn_cost=ROUTE_TURN_COST) -> None:
+        self.__roads = roads
+        self.__index = index
+        self.__cache_size = cache_size
+        self.__turn_cost = turn_cost
+        self.__costs = [road.get_speed_limit() for road in roads] #seconds per block of every road, None while closed
+        self.__closed = set()
+        self.__cache = OrderedDict() #(origin, destination) -> route, least recently used first
+        self.__routes_using = {} #road index -> cache keys of routes that drive on it
+        self.__hits = 0
+        self.__misses = 0
+
+        #junction offsets of every road: its start, its end and every block it shares with another road
+        self.__junctions = []
+        self.__junction_positions = []
+        for road_index, road in enumerate(roads):
+            junctions = sorted({0, len(road.get_path()) - 1, *index.get_shared_offsets(road_index)})
+            self.__junctions.append(junctions)
+            self.__junction_positions.append({offset: i for i, offset in enumerate(junctions)})
+
+    def get_cache_stats(self):
+
+        """
+        Function: returns how often get_route was answered from the cache
+
+        Parameters: None
+
+        Returns:
+
+            stats:
+                type: dict with keys hits, misses and size
+        """
+        return {'hits': self.__hits, 'misses': self.__misses, 'size': len(self.__cache)}
+
+    def get_route(self, origin, destination):
+
+        """
+        Function: returns the fastest route from the start of road origin to the end of road destination, searched once per pair
+                  and then served from the least recently used cache
+
+        Parameters:
+
+            origin:
+                type: int (road index)
+
+            destination:
+                type: int (road index)
+
+        Returns:
+
+            route:
+                type: tuple[tuple(int, int, int)] of (road index, entry offset, exit offset) legs, or None if destination cannot be reached
+        """
+
+        key = (origin, destination)
+        cache = self.__cache
+        if key in cache:
+            self.__hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+
+        self.__misses += 1
+        route = self.__search(origin, destination)
+        cache[key] = route
+        for road_index in {leg[0] for leg in route or ()}:
+            self.__routes_using.setdefault(road_index, set()).add(key)
+        if len(cache) > self.__cache_size:
+            old_key, old_route = cache.popitem(last=False)
+            self.__forget(old_key, old_route)
+        return route
+
+    def __forget(self, key, route):
+
+        """
+        Function: drops key from the per road record of cached routes
+
+        Parameters:
+
+            key:
+                type: tuple(int, int)
+
+            route:
+                type: tuple or None
+
+        Returns: None
+        """
+        for road_index in {leg[0] for leg in route or ()}:
+            self.__routes_using[road_index].discard(key)
+
+    def __search(self, origin, destination):
+
+        """
+        Function: runs Dijkstra's algorithm over the junctions of the network. Driving along a road costs its seconds per block,
+                  moving onto another road at a shared block costs turn_cost
+
+        Parameters:
+
+            origin:
+                type: int
+
+            destination:
+                type: int
+
+        Returns:
+
+            route:
+                type: tuple or None
+        """
+
+        costs = self.__costs
+        if costs[origin] is None or costs[destination] is None:
+            return None
+
+        roads = self.__roads
+        target = (destination, len(roads[destination].get_path()) - 1)
+        start = (origin, 0)
+        distances = {start: 0.0}
+        previous = {}
+        heap = [(0.0, origin, 0)]
+
+        while heap:
+            distance, road_index, offset = heapq.heappop(heap)
+            state = (road_index, offset)
+            if distance > distances[state]:
+                continue
+            if state == target:
+                break
+
+            junctions = self.__junctions[road_index]
+            position = self.__junction_positions[road_index][offset]
+            steps = [] #(next state, cost)
+            if position + 1 < len(junctions):
+                steps.append(((road_index, junctions[position + 1]), (junctions[position + 1] - offset) * costs[road_index]))
+            for other_index, other_offset in self.__index.get_roads_at(roads[road_index].get_path()[offset]):
+                if other_index == road_index or costs[other_index] is None:
+                    continue
+                if other_offset < len(roads[other_index].get_path()) - 1 or other_index == destination:
+                    steps.append(((other_index, other_offset), self.__turn_cost))
+
+            for next_state, cost in steps:
+                next_distance = distance + cost
+                if next_distance < distances.get(next_state, float('inf')):
+                    distances[next_state] = next_distance
+                    previous[next_state] = state
+                    heapq.heappush(heap, (next_distance,) + next_state)
+
+        if target not in distances:
+            return None
+
+        states = [target]
+        while states[-1] != start:
+            states.append(previous[states[-1]])
+        states.reverse()
+
+        legs = [[origin, 0, 0]]
+        for road_index, offset in states[1:]:
+            if road_index == legs[-1][0]:
+                legs[-1][2] = offset
+            else:
+                if len(legs) > 1 and legs[-1][1] == legs[-1][2]: #a road only crossed at one block is skipped
+                    legs.pop()
+                legs.append([road_index, offset, offset])
+        return tuple(map(tuple, legs))
+
+    def close_road(self, road_index):
+
+        """
+        Function: keeps new routes off road_index, for example after a crash blocks it
+
+        Parameters:
+
+            road_index:
+                type: int
+
+        Returns: None
+        """
+        self.__closed.add(road_index)
+        self.invalidate_road(road_index)
+
+    def open_road(self, road_index):
+
+        """
+        Function: lets routes use road_index again
+
+        Parameters:
+
+            road_index:
+                type: int
+
+        Returns: None
+        """
+        self.__closed.discard(road_index)
+        self.invalidate_road(road_index)
+
+    def invalidate_road(self, road_index):
+
+        """
+        Function: rereads speed limit and closure of road_index. A road that got slower or closed only drops the cached routes driving on it,
+                  a road that got faster or opened can shorten any route so the whole cache is dropped
+
+        Parameters:
+
+            road_index:
+                type: int
+
+        Returns: None
+        """
+
+        old_cost = self.__costs[road_index]
+        new_cost = None if road_index in self.__closed else self.__roads[road_index].get_speed_limit()
+        self.__costs[road_index] = new_cost
+        if new_cost == old_cost:
+            return
+
+        if new_cost is None or (old_cost is not None and new_cost > old_cost):
+            for key in list(self.__routes_using.get(road_index, ())):
+                self.__forget(key, self.__cache.pop(key))
+        else:
+            self.__cache.clear()
+            self.__routes_using.clear()
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
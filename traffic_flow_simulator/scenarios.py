@@ -0,0 +1,604 @@
+import array
+import json
+import os
+import struct
+import sys
+from road_network import *
+from constants import *
+from simulation import *
+from event_simulation import *
+
+try:
+    import tomllib
+except ImportError: #python < 3.11 can still load json and binary scenarios
+    tomllib = None
+
+DEFAULT_SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenario_files', 'default.json')
+SCENARIO_CACHE_DIR = '.scenario_cache'
+
+BINARY_MAGIC = b'TFSB'
+BINARY_VERSION = 4 #bumped with every format change, 2 added demand, 3 arrivals and 4 stop rules, older files are rejected
+BINARY_HEADER = struct.Struct('<4sHHddddqIII') #magic, version, has_seed, spawn_rate, percentage_of_slowed_cars, duration, dt, seed, width, height, road_count
+BINARY_ROAD = struct.Struct('<ddII') #speed_limit, stop_duration, path_len, stop_count
+BINARY_DEMAND = struct.Struct('<IId') #origin road index, destination road index, weight, after the roads and a uint32 count
+#road settings beyond BINARY_ROAD follow the demand as a uint32 length and json of road index -> {arrivals, stop_rule}
+
+
+class Scenario:
+
+    def __init__(self, roads=None, name=None, width=WIDTH//BLOCK_SIZE, height=HEIGHT//BLOCK_SIZE, spawn_rate=CAR_SPAWN_RATE,
+                 percentage_of_slowed_cars=0.3, duration=None, dt=SIMULATION_DT, seed=None, demand=None) -> None:
+        self.__roads = roads or [] #list of road definitions, see add_road
+        self.__demand = demand or [] #list of origin-destination pairs, see add_demand
+        self.__name = name
+        self.__width = width
+        self.__height = height
+        self.__spawn_rate = spawn_rate
+        self.__percentage_of_slowed_cars = percentage_of_slowed_cars
+        self.__duration = duration
+        self.__dt = dt
+        self.__seed = seed
+
+    def get_roads(self):
+
+        """
+        Function: returns road definitions of the scenario
+
+        Parameters: None
+
+        Returns:
+
+            roads:
+                type: list[dict] with keys name, speed_limit, stop_duration, path and stop_signs
+        """
+        return self.__roads
+
+    def get_demand(self):
+
+        """
+        Function: returns origin-destination demand of the scenario
+
+        Parameters: None
+
+        Returns:
+
+            demand:
+                type: list[dict] with keys origin, destination (road indices) and weight
+        """
+        return self.__demand
+
+    def get_name(self):
+
+        """
+        Function: returns name of the scenario
+
+        Parameters: None
+
+        Returns:
+
+            name:
+                type: str
+        """
+        return self.__name
+
+    def get_size(self):
+
+        """
+        Function: returns width and height of the scenario in grid blocks
+
+        Parameters: None
+
+        Returns:
+
+            size:
+                type: tuple(int, int)
+        """
+        return self.__width, self.__height
+
+    def get_spawn_rate(self):
+
+        """
+        Function: returns seconds between spawns
+
+        Parameters: None
+
+        Returns:
+
+            spawn_rate:
+                type: float
+        """
+        return self.__spawn_rate
+
+    def get_percentage_of_slowed_cars(self):
+
+        """
+        Function: returns fraction of spawned cars that keep no following distance
+
+        Parameters: None
+
+        Returns:
+
+            percentage_of_slowed_cars:
+                type: float
+        """
+        return self.__percentage_of_slowed_cars
+
+    def get_duration(self):
+
+        """
+        Function: returns simulated seconds a run of the scenario lasts
+
+        Parameters: None
+
+        Returns:
+
+            duration:
+                type: float or None if the scenario runs until stopped
+        """
+        return self.__duration
+
+    def get_dt(self):
+
+        """
+        Function: returns fixed timestep of the scenario
+
+        Parameters: None
+
+        Returns:
+
+            dt:
+                type: float
+        """
+        return self.__dt
+
+    def get_seed(self):
+
+        """
+        Function: returns seed of the scenario
+
+        Parameters: None
+
+        Returns:
+
+            seed:
+                type: int or None
+        """
+        return self.__seed
+
+    def add_road(self, name, path, speed_limit=0.1, stop_signs=None, stop_duration=3, arrivals=None, stop_rule='stop'):
+
+        """
+        Function: appends a road definition to the scenario
+
+        Parameters:
+
+            name:
+                type: str
+
+            path:
+                type: list[tuple]
+
+            speed_limit:
+                default: 0.1
+                type: float
+
+            stop_signs:
+                default: None
+                type: list[tuple]
+
+            stop_duration:
+                default: 3
+                type: float
+
+            arrivals:
+                default: None (cars come from the scenario's spawn_rate)
+                type: dict (see arrival_process), vehicles arriving at the start of the road
+
+            stop_rule:
+                default: 'stop'
+                type: str (one of STOP_RULES, how cars at the road's stop signs are let go)
+
+        Returns: None
+        """
+        if arrivals is not None and arrivals.get('process') not in ARRIVAL_PROCESSES:
+            raise ValueError(f"Road {name} arrival process must be one of {', '.join(ARRIVAL_PROCESSES)}")
+        if stop_rule not in STOP_RULES:
+            raise ValueError(f"Road {name} stop rule must be one of {', '.join(STOP_RULES)}")
+        self.__roads.append({'name': name, 'speed_limit': speed_limit, 'stop_duration': stop_duration,
+                             'path': [tuple(pos) for pos in path], 'stop_signs': [tuple(pos) for pos in stop_signs or []], 'arrivals': arrivals,
+                             'stop_rule': stop_rule})
+
+    def get_arrivals(self):
+
+        """
+        Function: returns arrival process settings of every road that has one
+
+        Parameters: None
+
+        Returns:
+
+            arrivals:
+                type: dict{int: dict} of road index -> arrival process settings
+        """
+        return {i: road['arrivals'] for i, road in enumerate(self.__roads) if road.get('arrivals')}
+
+    def add_demand(self, origin, destination, weight=1):
+
+        """
+        Function: appends an origin-destination pair, drawn by weight when a car spawns. Cars then drive from the start of the origin road
+                  to the end of the destination road, turning at shared blocks
+
+        Parameters:
+
+            origin:
+                type: int (road index) or str (road name)
+
+            destination:
+                type: int or str
+
+            weight:
+                default: 1
+                type: float
+
+        Returns: None
+        """
+        names = [road['name'] for road in self.__roads]
+        ends = []
+        for end in (origin, destination):
+            if isinstance(end, str):
+                if end not in names:
+                    raise ValueError(f"Demand names unknown road {end}")
+                end = names.index(end)
+            elif not 0 <= end < len(names):
+                raise ValueError(f"Demand names road {end} but the scenario has {len(names)} roads")
+            ends.append(end)
+        self.__demand.append({'origin': ends[0], 'destination': ends[1], 'weight': weight})
+
+    def build_roads(self, speed_limit_scale=1, stop_duration=None):
+
+        """
+        Function: builds fresh RoadNetwork objects from the road definitions
+
+        Parameters:
+
+            speed_limit_scale:
+                default: 1
+                type: float (multiplies every road's seconds per block)
+
+            stop_duration:
+                default: None (each road's own)
+                type: float
+
+        Returns:
+
+            roads:
+                type: list[RoadNetwork]
+        """
+        roads = []
+        for road in self.__roads:
+            path = road['path']
+            roads.append(RoadNetwork(speed_limit=road['speed_limit'] * speed_limit_scale, stop_sign=list(road['stop_signs']),
+                                     stop_duration=road['stop_duration'] if stop_duration is None else stop_duration,
+                                     path=path, name=road['name'], start=path[0], end=path[-1], stop_rule=road.get('stop_rule', 'stop')))
+        return roads
+
+    def build_simulation(self, **overrides):
+
+        """
+        Function: builds a Simulation over fresh roads using the scenario settings
+
+        Parameters:
+
+            overrides:
+                type: keyword arguments passed to Simulation in place of the scenario settings, speed_limit_scale and stop_duration go to build_roads
+                      and event_driven=True builds an EventSimulation
+
+        Returns:
+
+            simulation:
+                type: Simulation or EventSimulation
+        """
+        settings = {'dt': self.__dt, 'spawn_rate': self.__spawn_rate, 'percentage_of_slowed_cars': self.__percentage_of_slowed_cars, 'seed': self.__seed,
+                    'demand': [(pair['origin'], pair['destination'], pair['weight']) for pair in self.__demand], 'arrivals': self.get_arrivals()}
+        settings.update(overrides)
+        roads = self.build_roads(settings.pop('speed_limit_scale', 1), settings.pop('stop_duration', None))
+        simulation_class = EventSimulation if settings.pop('event_driven', False) else Simulation
+        return simulation_class(roads, **settings)
+
+    def to_dict(self):
+
+        """
+        Function: returns the scenario as plain data for json
+
+        Parameters: None
+
+        Returns:
+
+            data:
+                type: dict
+        """
+        roads = []
+        for road in self.__roads:
+            roads.append({'name': road['name'], 'speed_limit': road['speed_limit'], 'stop_duration': road['stop_duration'],
+                          'path': [list(pos) for pos in road['path']], 'stop_signs': [list(pos) for pos in road['stop_signs']]})
+            if road.get('arrivals'):
+                roads[-1]['arrivals'] = dict(road['arrivals'])
+            if road.get('stop_rule', 'stop') != 'stop':
+                roads[-1]['stop_rule'] = road['stop_rule']
+        return {'name': self.__name, 'width': self.__width, 'height': self.__height, 'spawn_rate': self.__spawn_rate,
+                'percentage_of_slowed_cars': self.__percentage_of_slowed_cars, 'duration': self.__duration, 'dt': self.__dt, 'seed': self.__seed,
+                'roads': roads, 'demand': [dict(pair) for pair in self.__demand]}
+
+
+def scenario_from_dict(data):
+
+    """
+    Function: builds a Scenario from data read out of a json or toml file
+
+    Parameters:
+
+        data:
+            type: dict
+
+    Returns:
+
+        scenario:
+            type: Scenario
+    """
+    scenario = Scenario(name=data.get('name'), width=data.get('width', WIDTH//BLOCK_SIZE), height=data.get('height', HEIGHT//BLOCK_SIZE),
+                        spawn_rate=data.get('spawn_rate', CAR_SPAWN_RATE), percentage_of_slowed_cars=data.get('percentage_of_slowed_cars', 0.3),
+                        duration=data.get('duration'), dt=data.get('dt', SIMULATION_DT), seed=data.get('seed'))
+    for road in data.get('roads', []):
+        if not road.get('path'):
+            raise ValueError(f"Road {road.get('name')} has no path")
+        scenario.add_road(road.get('name'), road['path'], road.get('speed_limit', 0.1), road.get('stop_signs'), road.get('stop_duration', 3),
+                          road.get('arrivals'), road.get('stop_rule', 'stop'))
+    for pair in data.get('demand', []):
+        scenario.add_demand(pair['origin'], pair['destination'], pair.get('weight', 1))
+    return scenario
+
+
+def encode_binary(scenario):
+
+    """
+    Function: returns scenario in the compact binary format (little endian header, int32 coordinates, stop signs as path offsets)
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+    Returns:
+
+        data:
+            type: bytes
+    """
+    seed = scenario.get_seed()
+    width, height = scenario.get_size()
+    chunks = [BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, seed is not None, scenario.get_spawn_rate(), scenario.get_percentage_of_slowed_cars(),
+                                 scenario.get_duration() or 0.0, scenario.get_dt(), seed or 0, width, height, len(scenario.get_roads()))]
+    name = (scenario.get_name() or '').encode('utf-8')
+    chunks.append(struct.pack('<H', len(name)) + name)
+
+    for road in scenario.get_roads():
+        path = road['path']
+        path_index = {}
+        for i, pos in enumerate(path):
+            path_index.setdefault(pos, i)
+        name = (road['name'] or '').encode('utf-8')
+        chunks.append(struct.pack('<H', len(name)) + name)
+        chunks.append(BINARY_ROAD.pack(road['speed_limit'], road['stop_duration'], len(path), len(road['stop_signs'])))
+        coordinates = array.array('i', [coordinate for pos in path for coordinate in pos])
+        stop_offsets = array.array('I', [path_index[pos] for pos in road['stop_signs']])
+        if sys.byteorder == 'big': #file is always little endian
+            coordinates.byteswap()
+            stop_offsets.byteswap()
+        chunks.append(coordinates.tobytes())
+        chunks.append(stop_offsets.tobytes())
+
+    road_settings = {}
+    for i, road in enumerate(scenario.get_roads()):
+        settings = {key: road[key] for key in ('arrivals', 'stop_rule') if road.get(key) and road[key] != 'stop'}
+        if settings:
+            road_settings[i] = settings
+    chunks.append(struct.pack('<I', len(scenario.get_demand())))
+    chunks.extend(BINARY_DEMAND.pack(pair['origin'], pair['destination'], pair['weight']) for pair in scenario.get_demand())
+    encoded = json.dumps(road_settings).encode('utf-8')
+    chunks.append(struct.pack('<I', len(encoded)) + encoded)
+
+    return b''.join(chunks)
+
+
+def write_binary(scenario, file_path):
+
+    """
+    Function: writes scenario to file_path in the compact binary format
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        file_path:
+            type: str
+
+    Returns: None
+    """
+    with open(file_path, 'wb') as file:
+        file.write(encode_binary(scenario))
+
+
+def read_binary(file_path):
+
+    """
+    Function: reads a scenario written by write_binary
+
+    Parameters:
+
+        file_path:
+            type: str
+
+    Returns:
+
+        scenario:
+            type: Scenario
+    """
+    with open(file_path, 'rb') as file:
+        return decode_binary(file.read(), file_path)
+
+
+def decode_binary(data, source='data'):
+
+    """
+    Function: returns scenario from bytes written by encode_binary
+
+    Parameters:
+
+        data:
+            type: bytes
+
+        source:
+            default: 'data'
+            type: str (named in the error for data that is not a scenario)
+
+    Returns:
+
+        scenario:
+            type: Scenario
+    """
+    magic, version, has_seed, spawn_rate, percentage_of_slowed_cars, duration, dt, seed, width, height, road_count = BINARY_HEADER.unpack_from(data, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f"{source} is not a version {BINARY_VERSION} binary scenario")
+
+    offset = BINARY_HEADER.size
+    name_len, = struct.unpack_from('<H', data, offset)
+    name = data[offset+2:offset+2+name_len].decode('utf-8')
+    offset += 2 + name_len
+
+    scenario = Scenario(name=name or None, width=width, height=height, spawn_rate=spawn_rate, percentage_of_slowed_cars=percentage_of_slowed_cars,
+                        duration=duration or None, dt=dt, seed=seed if has_seed else None)
+    roads = scenario.get_roads()
+    for _ in range(road_count):
+        name_len, = struct.unpack_from('<H', data, offset)
+        road_name = data[offset+2:offset+2+name_len].decode('utf-8')
+        offset += 2 + name_len
+        speed_limit, stop_duration, path_len, stop_count = BINARY_ROAD.unpack_from(data, offset)
+        offset += BINARY_ROAD.size
+
+        coordinates = array.array('i')
+        coordinates.frombytes(data[offset:offset + 8*path_len])
+        if sys.byteorder == 'big':
+            coordinates.byteswap()
+        offset += 8*path_len
+        stop_offsets = array.array('I')
+        stop_offsets.frombytes(data[offset:offset + 4*stop_count])
+        if sys.byteorder == 'big':
+            stop_offsets.byteswap()
+        offset += 4*stop_count
+
+        path = list(zip(coordinates[0::2], coordinates[1::2]))
+        roads.append({'name': road_name, 'speed_limit': speed_limit, 'stop_duration': stop_duration, 'path': path, 'stop_signs': [path[i] for i in stop_offsets],
+                      'arrivals': None, 'stop_rule': 'stop'})
+
+    demand_count, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    for _ in range(demand_count):
+        scenario.add_demand(*BINARY_DEMAND.unpack_from(data, offset))
+        offset += BINARY_DEMAND.size
+    settings_len, = struct.unpack_from('<I', data, offset)
+    for road_index, settings in json.loads(data[offset+4:offset+4+settings_len].decode('utf-8')).items():
+        roads[int(road_index)].update(settings)
+
+    return scenario
+
+
+def save_scenario(scenario, file_path):
+
+    """
+    Function: writes scenario as json or, for a .tfsb file, in the binary format
+
+    Parameters:
+
+        scenario:
+            type: Scenario
+
+        file_path:
+            type: str
+
+    Returns: None
+    """
+    if file_path.endswith('.tfsb'):
+        write_binary(scenario, file_path)
+    else:
+        with open(file_path, 'w') as file:
+            json.dump(scenario.to_dict(), file, separators=(',', ':'))
+
+
+def load_scenario(file_path, use_cache=True):
+
+    """
+    Function: loads a json, toml or binary (.tfsb) scenario. Text scenarios are compiled to a binary copy in SCENARIO_CACHE_DIR next to
+              the file, named after BINARY_VERSION and given the source's modification time, and later loads read that copy
+              while both still match
+
+    Parameters:
+
+        file_path:
+            type: str
+
+        use_cache:
+            default: True
+            type: boolean
+
+    Returns:
+
+        scenario:
+            type: Scenario
+    """
+    if file_path.endswith('.tfsb'):
+        return read_binary(file_path)
+
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(file_path)), SCENARIO_CACHE_DIR, f"{os.path.basename(file_path)}.v{BINARY_VERSION}.tfsb")
+    source_mtime = os.stat(file_path).st_mtime_ns
+    if use_cache and os.path.exists(cache_path) and os.stat(cache_path).st_mtime_ns == source_mtime:
+        try:
+            return read_binary(cache_path)
+        except (ValueError, struct.error): #damaged copy, compiled again below
+            pass
+
+    if file_path.endswith('.toml'):
+        if tomllib is None:
+            raise ImportError("Loading toml scenarios requires python 3.11 or newer")
+        with open(file_path, 'rb') as file:
+            scenario = scenario_from_dict(tomllib.load(file))
+    else:
+        with open(file_path) as file:
+            scenario = scenario_from_dict(json.load(file))
+
+    if use_cache:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            write_binary(scenario, cache_path)
+            os.utime(cache_path, ns=(source_mtime, source_mtime)) #a source edited or swapped for an older copy no longer matches
+        except OSError: #read only location, load from source next time as well
+            pass
+    return scenario
+
+
+def build_default_roads():
+
+    """
+    Function: builds the default eight road layout used by the simulator
+
+    Parameters: None
+
+    Returns:
+
+        roads:
+            type: list[RoadNetwork]
+    """
+    return load_scenario(DEFAULT_SCENARIO).build_roads()
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
@@ -0,0 +1,779 @@
+import time
+from road_network import *
+from constants import *
+from car import *
+from clock import *
+from spawner import *
+from occupancy import *
+from instrumentation import *
+from intersections import *
+from routing import *
+from stop_control import *
+from reservations import *
+
+class Simulation:
+
+    def __init__(self, roads=None, dt=SIMULATION_DT, spawn_rate=CAR_SPAWN_RATE, percentage_of_slowed_cars=0.3, clock=None, seed=None, instrumentation=None,
+                 demand=None, arrivals=None, reservations=False) -> None:
+        self.__roads = roads or []
+        self.__dt = dt
+        self.__ticks = 0
+        self.__clock = clock or VirtualClock()
+        self.__collisions = 0
+        self.__completed_trips = 0
+        self.__total_travel_time = 0.0
+        self.__occupancy = OccupancyGrid()
+        self.__instrumentation = instrumentation #None keeps the step loop free of timing calls
+        self.__recorder = None #None keeps the step loop free of recording calls
+
+        for road in self.__roads:
+            road.set_clock(self.__clock)
+            road.set_occupancy(self.__occupancy)
+        self.check_for_intersections(self.__roads)
+        self.__stop_controller = StopController(self.__roads, self.__intersection_index, self.__clock)
+        #with reservations cars book shared blocks before entering them, cars with no following distance still crash
+        self.__reservations = ReservationManager(self.__intersection_index.get_conflict_cells(), self.__clock) if reservations else None
+
+        #demand of (origin, destination, weight) road index pairs spawns cars that follow routes across roads
+        self.__route_planner = RoutePlanner(self.__roads, self.__intersection_index) if demand else None
+        #arrivals of road index -> arrival process settings spawn onto each of those roads on its own schedule instead of spawn_rate
+        self.__spawner = Spawner(self.__clock, spawn_rate, percentage_of_slowed_cars, seed, demand, self.__route_planner, arrivals)
+
+    def get_roads(self):
+
+        """
+        Function: returns list of roads stepped by the simulation
+
+        Parameters: None
+
+        Returns:
+
+            roads:
+                type: list[RoadNetwork]
+        """
+        return self.__roads
+
+    def get_dt(self):
+
+        """
+        Function: returns fixed timestep of the simulation in seconds
+
+        Parameters: None
+
+        Returns:
+
+            dt:
+                type: float
+        """
+        return self.__dt
+
+    def get_time(self):
+
+        """
+        Function: returns current time of the simulation clock
+
+        Parameters: None
+
+        Returns:
+
+            time:
+                type: float
+        """
+        return self.__clock.now()
+
+    def get_clock(self):
+
+        """
+        Function: returns clock shared by the simulation, its roads, cars and spawner
+
+        Parameters: None
+
+        Returns:
+
+            clock:
+                type: VirtualClock or WallClock
+        """
+        return self.__clock
+
+    def get_occupancy(self):
+
+        """
+        Function: returns occupancy grid shared by every road of the simulation
+
+        Parameters: None
+
+        Returns:
+
+            occupancy:
+                type: OccupancyGrid
+        """
+        return self.__occupancy
+
+    def get_intersection_index(self):
+
+        """
+        Function: returns index of blocks shared between the roads of the simulation
+
+        Parameters: None
+
+        Returns:
+
+            intersection_index:
+                type: IntersectionIndex
+        """
+        return self.__intersection_index
+
+    def get_route_planner(self):
+
+        """
+        Function: returns route planner of the simulation's origin-destination demand
+
+        Parameters: None
+
+        Returns:
+
+            route_planner:
+                type: RoutePlanner or None without demand
+        """
+        return self.__route_planner
+
+    def get_stop_controller(self):
+
+        """
+        Function: returns StopController that holds cars at stop signs
+
+        Parameters: None
+
+        Returns:
+
+            stop_controller:
+                type: StopController
+        """
+        return self.__stop_controller
+
+    def get_reservations(self):
+
+        """
+        Function: returns ReservationManager that books shared blocks for cars about to enter them
+
+        Parameters: None
+
+        Returns:
+
+            reservations:
+                type: ReservationManager or None without reservations
+        """
+        return self.__reservations
+
+    def get_spawner(self):
+
+        """
+        Function: returns Spawner that places cars onto the roads
+
+        Parameters: None
+
+        Returns:
+
+            spawner:
+                type: Spawner
+        """
+        return self.__spawner
+
+    def get_instrumentation(self):
+
+        """
+        Function: returns instrumentation recording phase timers, counters and frame times
+
+        Parameters: None
+
+        Returns:
+
+            instrumentation:
+                type: Instrumentation or None if disabled
+        """
+        return self.__instrumentation
+
+    def set_instrumentation(self, instrumentation):
+
+        """
+        Function: enables instrumentation of the step loop, or disables it when None
+
+        Parameters:
+
+            instrumentation:
+                type: Instrumentation or None
+
+        Returns: None
+        """
+        self.__instrumentation = instrumentation
+
+    def get_recorder(self):
+
+        """
+        Function: returns recorder writing a trace of car positions and events
+
+        Parameters: None
+
+        Returns:
+
+            recorder:
+                type: Recorder or None if disabled
+        """
+        return self.__recorder
+
+    def set_recorder(self, recorder):
+
+        """
+        Function: enables recording of every step to a trace, or disables it when None
+
+        Parameters:
+
+            recorder:
+                type: Recorder or None
+
+        Returns: None
+        """
+        self.__recorder = recorder
+
+    def get_ticks(self):
+
+        """
+        Function: returns number of steps taken by the simulation
+
+        Parameters: None
+
+        Returns:
+
+            ticks:
+                type: int
+        """
+        return self.__ticks
+
+    def get_collisions(self):
+
+        """
+        Function: returns number of collisions that have occured
+
+        Parameters: None
+
+        Returns:
+
+            collisions:
+                type: int
+        """
+        return self.__collisions
+
+    def get_completed_trips(self):
+
+        """
+        Function: returns number of cars that reached the end of their road
+
+        Parameters: None
+
+        Returns:
+
+            completed_trips:
+                type: int
+        """
+        return self.__completed_trips
+
+    def get_mean_travel_time(self):
+
+        """
+        Function: returns mean seconds between a car entering the network and reaching the end of its road
+
+        Parameters: None
+
+        Returns:
+
+            mean_travel_time:
+                type: float or None if no car finished yet
+        """
+        if not self.__completed_trips:
+            return None
+        return self.__total_travel_time / self.__completed_trips
+
+    def get_total_travel_time(self):
+
+        """
+        Function: returns summed travel time of every completed trip
+
+        Parameters: None
+
+        Returns:
+
+            total_travel_time:
+                type: float
+        """
+        return self.__total_travel_time
+
+    def set_counters(self, ticks, collisions, completed_trips, total_travel_time):
+
+        """
+        Function: assigns step, collision and trip counters, used when restoring a snapshot
+
+        Parameters:
+
+            ticks:
+                type: int
+
+            collisions:
+                type: int
+
+            completed_trips:
+                type: int
+
+            total_travel_time:
+                type: float
+
+        Returns: None
+        """
+        self.__ticks = ticks
+        self.__collisions = collisions
+        self.__completed_trips = completed_trips
+        self.__total_travel_time = total_travel_time
+
+    def check_for_intersections(self, list_of_roads):
+
+        """
+        Function: indexes blocks shared between roads, adds each intersecting road once to every road's intersect roads list
+                  and tells every road which of its blocks other roads cross
+
+        Parameters:
+
+            list_of_roads:
+                type: list[RoadNetwork]
+
+        Returns:
+
+            intersection_index:
+                type: IntersectionIndex
+        """
+
+        self.__intersection_index = IntersectionIndex([road.get_path() for road in list_of_roads])
+        conflict_cells = self.__intersection_index.get_conflict_cells()
+
+        for i, road in enumerate(list_of_roads):
+            intersect_roads = road.get_intersections()
+            known = set(map(id, intersect_roads))
+            for j in self.__intersection_index.get_neighbours(i):
+                if id(list_of_roads[j]) not in known:
+                    intersect_roads.append(list_of_roads[j])
+            road.set_shared_cells(conflict_cells)
+
+        return self.__intersection_index
+
+    def spawn_cars(self):
+
+        """
+        Function: lets the spawner place cars onto the roads
+
+        Parameters: None
+
+        Returns:
+
+            cars:
+                type: list[Car] placed this step
+        """
+
+        cars = self.__spawner.spawn_cars(self.__roads)
+        if self.__recorder is not None:
+            for car in cars:
+                self.__recorder.event(EVENT_SPAWN, self._road_of(car), car)
+        return cars
+
+    def move_cars(self):
+
+        """
+        Function: moves every car that is not blocked by a car within its following distance
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+        """
+
+        vacated_blocks = []
+        reservations = self.__reservations
+
+        for road in self.__roads:
+            for car in road.get_cars():
+                if car.get_stop_state(): #waiting for StopController to let it go
+                    continue
+                pos = car.get_current_pos()
+                if not road.detect_cars(pos, car.get_following_distance(), car=car):
+                    if reservations is not None and self._is_waiting_for_slot(car, road):
+                        continue
+                    if road.move_car(car):
+                        vacated_blocks.append((pos, road))
+
+        return vacated_blocks
+
+    def _move_cars_instrumented(self):
+
+        """
+        Function: move_cars that times look ahead and movement separately and counts moved and blocked cars
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+        """
+
+        instrumentation = self.__instrumentation
+        perf_counter = time.perf_counter
+        vacated_blocks = []
+        look_ahead = movement = 0.0
+        moves = blocked = 0
+        reservations = self.__reservations
+
+        for road in self.__roads:
+            for car in road.get_cars():
+                if car.get_stop_state():
+                    continue
+                pos = car.get_current_pos()
+                start = perf_counter()
+                is_blocked = road.detect_cars(pos, car.get_following_distance(), car=car)
+                middle = perf_counter()
+                look_ahead += middle - start
+                if is_blocked:
+                    if car.can_move(): #only count cars that were due to move
+                        blocked += 1
+                    continue
+                if reservations is not None and self._is_waiting_for_slot(car, road):
+                    blocked += 1
+                    continue
+                if road.move_car(car):
+                    vacated_blocks.append((pos, road))
+                    moves += 1
+                movement += perf_counter() - middle
+
+        instrumentation.add_time('look_ahead', look_ahead)
+        instrumentation.add_time('movement', movement)
+        instrumentation.count('car_moves', moves)
+        instrumentation.count('blocked_moves', blocked)
+        return vacated_blocks
+
+    def _is_waiting_for_slot(self, car, road):
+
+        """
+        Function: returns whether car, free to move, has to wait because the shared blocks in front of it are booked.
+                  Cars with no following distance do not book and crash as before
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork
+
+        Returns:
+
+            True:
+                if car has to wait
+
+            False:
+                if car may move
+        """
+        if car.get_following_distance() == NO_FOLLOWING_DISTANCE or not car.can_move():
+            return False
+        return self.__reservations.request(car, road) is not None
+
+    def turn_cars(self):
+
+        """
+        Function: moves routed cars that reached the shared block ending a leg of their route onto the road of the next leg
+
+        Parameters: None
+
+        Returns:
+
+            turned:
+                type: list[tuple(Car, RoadNetwork)] each car with the road it turned onto
+        """
+
+        turned = []
+        roads = self.__roads
+        for road in roads:
+            for car in road.pop_turning_cars():
+                road.remove_car(car)
+                road_index, offset, _ = car.next_leg()
+                roads[road_index].enter_car(car, offset)
+                turned.append((car, roads[road_index]))
+        return turned
+
+    def check_for_collisions(self):
+
+        """
+        Function: finds every block holding more than one car in one pass over the occupancy grid, removes those cars
+                  and counts one collision per block
+
+        Parameters: None
+
+        Returns:
+
+            blocks_to_color:
+                type: list[tuple]
+        """
+
+        occupancy = self.__occupancy
+        conflicts = occupancy.get_conflicts()
+        if not conflicts:
+            return []
+
+        blocks_to_color = []
+        for pos in sorted(conflicts): #sorted so removal and logging order do not depend on set order
+            emit(CollisionEvent, pos)
+            for car, road in list(occupancy.get_occupants(pos)):
+                emit(CarRemovedEvent, pos, road.get_name())
+                if self.__recorder is not None:
+                    self.__recorder.event(EVENT_COLLISION, road, car)
+                road.remove_car(car)
+                blocks_to_color.append(pos)
+            self.__collisions += 1
+
+        return blocks_to_color
+
+    def remove_end_cars(self):
+
+        """
+        Function: removes cars that reached the end of their road and records their travel time
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        for road in self.__roads:
+            for car in road.remove_any_end_cars():
+                self._record_trip(car)
+                if self.__recorder is not None:
+                    self.__recorder.event(EVENT_END, road, car)
+
+    def _road_of(self, car):
+
+        """
+        Function: returns road of a newly spawned car from the occupancy grid
+
+        Parameters:
+
+            car:
+                type: Car object
+
+        Returns:
+
+            road:
+                type: RoadNetwork
+        """
+
+        for occupant, road in self.__occupancy.get_occupants(car.get_current_pos()):
+            if occupant is car:
+                return road
+        raise ValueError('car is not on any road')
+
+    def _record_trip(self, car):
+
+        """
+        Function: counts a car that reached the end of its road and adds its travel time
+
+        Parameters:
+
+            car:
+                type: Car object
+
+        Returns: None
+        """
+
+        self.__completed_trips += 1
+        self.__total_travel_time += self.__clock.now() - car.get_spawn_time()
+
+    def stop_cars(self):
+
+        """
+        Function: stops cars that reached a stop sign this step
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        stopped_cars = self.__stop_controller.stop_cars()
+        if self.__recorder is not None:
+            for car, road in stopped_cars:
+                self.__recorder.event(EVENT_STOP, road, car)
+
+    def release_cars(self):
+
+        """
+        Function: lets go of cars at stop signs whose rule allows them to go, before anything moves this step
+
+        Parameters: None
+
+        Returns:
+
+            released:
+                type: list[tuple(Car, RoadNetwork)]
+        """
+        return self.__stop_controller.release_cars()
+
+    def _step_network(self):
+
+        """
+        Function: runs every phase of a step at the current clock time
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+
+            blocks_to_color:
+                type: list[tuple]
+        """
+
+        self.__ticks += 1
+
+        if self.__instrumentation is not None:
+            vacated_blocks, blocks_to_color = self._step_network_instrumented()
+        else:
+            self.release_cars()
+            self.spawn_cars()
+            vacated_blocks = self.move_cars()
+            if self.__route_planner is not None:
+                self.turn_cars()
+            blocks_to_color = self.check_for_collisions()
+            self.remove_end_cars()
+            self.stop_cars()
+
+        if self.__recorder is not None:
+            self.__recorder.record_tick(self)
+
+        return vacated_blocks, blocks_to_color
+
+    def _step_network_instrumented(self):
+
+        """
+        Function: _step_network that records time per phase, collisions and the frame time
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+
+            blocks_to_color:
+                type: list[tuple]
+        """
+
+        instrumentation = self.__instrumentation
+        perf_counter = time.perf_counter
+        collisions = self.__collisions
+
+        frame_start = perf_counter()
+        self.release_cars()
+        released = perf_counter()
+        self.spawn_cars()
+        spawned = perf_counter()
+        vacated_blocks = self._move_cars_instrumented()
+        if self.__route_planner is not None:
+            turn_start = perf_counter()
+            self.turn_cars()
+            instrumentation.add_time('movement', perf_counter() - turn_start)
+        moved = perf_counter()
+        blocks_to_color = self.check_for_collisions()
+        collided = perf_counter()
+        self.remove_end_cars()
+        cleaned = perf_counter()
+        self.stop_cars()
+        stopped = perf_counter()
+
+        instrumentation.add_time('spawn', spawned - released)
+        instrumentation.add_time('collisions', collided - moved)
+        instrumentation.add_time('end_of_road', cleaned - collided)
+        instrumentation.add_time('stop_signs', stopped - cleaned + released - frame_start)
+        instrumentation.count('collisions', self.__collisions - collisions)
+        instrumentation.observe_frame(stopped - frame_start)
+
+        return vacated_blocks, blocks_to_color
+
+    def step(self):
+
+        """
+        Function: advances the whole network by one fixed timestep (dt)
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+
+            blocks_to_color:
+                type: list[tuple]
+        """
+
+        if isinstance(self.__clock, VirtualClock):
+            self.__clock.advance(self.__dt)
+        return self._step_network()
+
+    def step_to_next_event(self):
+
+        """
+        Function: jumps the virtual clock straight to the next scheduled move, stop release or spawn and steps the network there
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: list[tuple(tuple, RoadNetwork)]
+
+            blocks_to_color:
+                type: list[tuple]
+        """
+
+        if not self.__clock.advance_to_next_event(): # nothing scheduled, fall back to a fixed step
+            self.__clock.advance(self.__dt)
+        return self._step_network()
+
+    def run(self, duration, jump_to_events=False):
+
+        """
+        Function: steps the simulation until duration seconds of simulated time have passed
+
+        Parameters:
+
+            duration:
+                type: float
+
+            jump_to_events:
+                default: False
+                type: boolean (skip idle time between scheduled events, needs a VirtualClock)
+
+        Returns: None
+        """
+
+        if jump_to_events:
+            end_time = self.__clock.now() + duration
+            while True:
+                event_time = self.__clock.next_event_time()
+                if event_time is None or event_time > end_time:
+                    break
+                self.step_to_next_event()
+            self.__clock.set_time(end_time)
+            return
+
+        end_tick = self.__ticks + int(round(duration / self.__dt))
+        while self.__ticks < end_tick:
+            self.step()
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
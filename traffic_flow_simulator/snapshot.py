@@ -0,0 +1,307 @@
+import array
+import json
+import struct
+import sys
+from scenarios import *
+
+SNAPSHOT_MAGIC = b'TFSS'
+SNAPSHOT_VERSION = 5
+#magic, version, event_driven, has_gauss, dt, time, total_travel_time, spawn_rate, percentage_of_slowed_cars, last_spawn_time, gauss_next,
+#ticks, collisions, completed_trips, roads length, rng state length, clock event count, car count
+SNAPSHOT_HEADER = struct.Struct('<4sHBBdddddddqqqIIII')
+CAR_FIELDS = (('road', 'I'), ('offset', 'I'), ('velocity', 'd'), ('start_time', 'd'), ('spawn_time', 'd'), ('following_distance', 'i'), ('stopped', 'B'),
+              ('origin', 'i'), ('destination', 'i'), ('leg', 'I')) #origin and destination are -1 for cars without a route
+#roads with arrival processes or reservations add a uint32 length and json of the spawner's arrival state and the reservation bookings after the cars
+
+
+def _pack(typecode, values):
+
+    """
+    Function: returns values as little endian bytes
+
+    Parameters:
+
+        typecode:
+            type: str (array typecode)
+
+        values:
+            type: iterable
+
+    Returns:
+
+        data:
+            type: bytes
+    """
+    values = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(typecode, data, offset, count):
+
+    """
+    Function: reads count little endian values of typecode from data at offset
+
+    Parameters:
+
+        typecode:
+            type: str
+
+        data:
+            type: bytes
+
+        offset:
+            type: int
+
+        count:
+            type: int
+
+    Returns:
+
+        values:
+            type: array.array
+
+        offset:
+            type: int (just after the values)
+    """
+    values = array.array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
+
+
+def encode_snapshot(simulation):
+
+    """
+    Function: returns full state of a simulation on a VirtualClock: roads, every car, pending clock events, spawner random state,
+              reservation bookings, virtual time and counters. Instrumentation and recorders are not part of the state
+
+    Parameters:
+
+        simulation:
+            type: Simulation or EventSimulation
+
+    Returns:
+
+        data:
+            type: bytes
+    """
+
+    clock = simulation.get_clock()
+    if not isinstance(clock, VirtualClock):
+        raise ValueError('only simulations on a VirtualClock can be snapshotted')
+
+    roads = simulation.get_roads()
+    spawner = simulation.get_spawner()
+    scenario = Scenario([{'name': road.get_name() or '', 'speed_limit': road.get_speed_limit(), 'stop_duration': road.get_stop_duration(),
+                          'path': road.get_path(), 'stop_signs': list(road.get_stop_sign_pos()),
+                          'stop_rule': road.get_stop_rule(), 'arrivals': spawner.get_arrival_specs().get(i)}
+                         for i, road in enumerate(roads)])
+    for origin, destination, weight in spawner.get_demand():
+        scenario.add_demand(origin, destination, weight)
+    road_data = encode_binary(scenario)
+    rng_version, rng_state, gauss_next = spawner.get_rng().getstate()
+    events = clock.get_events()
+
+    cars = {name: [] for name, _ in CAR_FIELDS}
+    car_numbers = {} #Car -> place in the snapshot, for the cars of reservation bookings
+    for road_index, road in enumerate(roads):
+        for car in road.get_cars(): #list order decides who moves first, so it is kept
+            car_numbers[car] = len(cars['road'])
+            cars['road'].append(road_index)
+            cars['offset'].append(car.get_offset())
+            cars['velocity'].append(car.get_velocity())
+            cars['start_time'].append(car.start_time)
+            cars['spawn_time'].append(car.get_spawn_time())
+            cars['following_distance'].append(car.get_following_distance())
+            cars['stopped'].append(bool(car.get_stop_state()))
+            route = car.get_route() #routes are searched again on restore, the planner finds the same one
+            cars['origin'].append(route[0][0] if route else -1)
+            cars['destination'].append(route[-1][0] if route else -1)
+            cars['leg'].append(car.get_leg())
+
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, isinstance(simulation, EventSimulation), gauss_next is not None,
+                                  simulation.get_dt(), clock.now(), simulation.get_total_travel_time(), spawner.get_spawn_rate(),
+                                  spawner.get_percentage_of_slowed_cars(), spawner.get_last_spawn_time(), gauss_next or 0.0,
+                                  simulation.get_ticks(), simulation.get_collisions(), simulation.get_completed_trips(),
+                                  len(road_data), len(rng_state), len(events), len(cars['road']))
+    chunks = [header, road_data, struct.pack('<I', rng_version), _pack('I', rng_state), _pack('d', events)]
+    chunks.extend(_pack(typecode, cars[name]) for name, typecode in CAR_FIELDS)
+    extra_state = {}
+    if spawner.get_arrival_specs():
+        extra_state['arrivals'] = spawner.get_arrival_state()
+    if simulation.get_reservations() is not None:
+        extra_state['reservations'] = simulation.get_reservations().get_state(car_numbers)
+    if extra_state:
+        extra_state = json.dumps(extra_state).encode('utf-8')
+        chunks.append(struct.pack('<I', len(extra_state)) + extra_state)
+    return b''.join(chunks)
+
+
+def decode_snapshot(data, seed=None, spawn_rate=None, percentage_of_slowed_cars=None):
+
+    """
+    Function: rebuilds a simulation from encode_snapshot bytes. Passing seed, spawn_rate or percentage_of_slowed_cars starts a
+              what-if branch that differs from the saved run from this point on
+
+    Parameters:
+
+        data:
+            type: bytes
+
+        seed:
+            default: None (keep the saved random state)
+            type: int
+
+        spawn_rate:
+            default: None (keep the saved rate)
+            type: float
+
+        percentage_of_slowed_cars:
+            default: None (keep the saved share)
+            type: float
+
+    Returns:
+
+        simulation:
+            type: Simulation or EventSimulation
+    """
+
+    (magic, version, event_driven, has_gauss, dt, now, total_travel_time, saved_spawn_rate, saved_percentage, last_spawn_time, gauss_next,
+     ticks, collisions, completed_trips, road_length, rng_length, event_count, car_count) = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"not a version {SNAPSHOT_VERSION} snapshot")
+
+    offset = SNAPSHOT_HEADER.size
+    scenario = decode_binary(bytes(data[offset:offset + road_length]), 'snapshot')
+    roads = scenario.build_roads()
+    offset += road_length
+    rng_version, = struct.unpack_from('<I', data, offset)
+    rng_state, offset = _unpack('I', data, offset + 4, rng_length)
+    events, offset = _unpack('d', data, offset, event_count)
+    cars = {}
+    for name, typecode in CAR_FIELDS:
+        cars[name], offset = _unpack(typecode, data, offset, car_count)
+    extra_state = {}
+    if offset < len(data):
+        extra_length, = struct.unpack_from('<I', data, offset)
+        extra_state = json.loads(bytes(data[offset+4:offset+4+extra_length]).decode('utf-8'))
+
+    #cars go onto the roads before the simulation exists, so nothing is scheduled for them and EventSimulation queues them as found
+    routed = []
+    car_list = []
+    for i in range(car_count):
+        road = roads[cars['road'][i]]
+        car = Car(velocity=cars['velocity'][i], following_distance=cars['following_distance'][i])
+        car_list.append(car)
+        if cars['origin'][i] >= 0:
+            routed.append((car, cars['origin'][i], cars['destination'][i], cars['leg'][i]))
+        road.add_car(car, cars['offset'][i])
+        car.start_time = cars['start_time'][i]
+        car.set_spawn_time(cars['spawn_time'][i])
+        car.set_stop_state(bool(cars['stopped'][i]))
+
+    clock = VirtualClock(now)
+    simulation_class = EventSimulation if event_driven else Simulation
+    simulation = simulation_class(roads, dt, saved_spawn_rate if spawn_rate is None else spawn_rate,
+                                  saved_percentage if percentage_of_slowed_cars is None else percentage_of_slowed_cars, clock, seed,
+                                  demand=[(pair['origin'], pair['destination'], pair['weight']) for pair in scenario.get_demand()],
+                                  arrivals=scenario.get_arrivals(), reservations='reservations' in extra_state)
+    for car, origin, destination, leg in routed:
+        car.set_route(simulation.get_route_planner().get_route(origin, destination), leg)
+    clock.set_events(events) #drops the spawn the new Spawner scheduled
+    simulation.set_counters(ticks, collisions, completed_trips, total_travel_time)
+    spawner = simulation.get_spawner()
+    spawner.set_last_spawn_time(last_spawn_time)
+    if seed is None:
+        spawner.get_rng().setstate((rng_version, tuple(rng_state), gauss_next if has_gauss else None))
+    if 'arrivals' in extra_state:
+        if seed is None:
+            spawner.set_arrival_state(extra_state['arrivals'])
+        else: #vehicles already waiting still enter, later arrivals come from the new seed
+            spawner.set_backlog(extra_state['arrivals']['backlog'])
+            spawner.schedule_arrivals()
+    if 'reservations' in extra_state: #bookings hold in every branch, cars already promised a slot keep it
+        simulation.get_reservations().set_state(extra_state['reservations'], car_list)
+    if spawn_rate is not None:
+        clock.schedule(last_spawn_time + spawn_rate)
+    return simulation
+
+
+def save_snapshot(simulation, file_path):
+
+    """
+    Function: writes full state of simulation to file_path
+
+    Parameters:
+
+        simulation:
+            type: Simulation or EventSimulation
+
+        file_path:
+            type: str
+
+    Returns: None
+    """
+    data = encode_snapshot(simulation)
+    with open(file_path, 'wb') as file:
+        file.write(data)
+
+
+def load_snapshot(file_path, **branch):
+
+    """
+    Function: restores a simulation written by save_snapshot
+
+    Parameters:
+
+        file_path:
+            type: str
+
+        branch:
+            type: keyword arguments seed, spawn_rate and percentage_of_slowed_cars passed to decode_snapshot
+
+    Returns:
+
+        simulation:
+            type: Simulation or EventSimulation
+    """
+    with open(file_path, 'rb') as file:
+        return decode_snapshot(file.read(), **branch)
+
+
+def fork(simulation, count, seeds=None, **branch):
+
+    """
+    Function: returns count independent copies of a (warmed up) simulation. Copies given different seeds diverge from here on,
+              copies without seeds repeat the original exactly
+
+    Parameters:
+
+        simulation:
+            type: Simulation or EventSimulation
+
+        count:
+            type: int
+
+        seeds:
+            default: None
+            type: list[int] one per copy
+
+        branch:
+            type: keyword arguments spawn_rate and percentage_of_slowed_cars given to every copy
+
+    Returns:
+
+        simulations:
+            type: list[Simulation or EventSimulation]
+    """
+    data = encode_snapshot(simulation)
+    return [decode_snapshot(data, seeds[i] if seeds else None, **branch) for i in range(count)]
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
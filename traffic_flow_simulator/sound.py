@@ -0,0 +1,95 @@
+import os
+from logs import *
+
+CRASH_SOUND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sounds', 'crash-6711.mp3')
+SOUND_CHANNELS = 4 #crash cues that can overlap before the oldest is cut off
+
+
+class CrashSound:
+
+    def __init__(self, file_path=CRASH_SOUND, channels=SOUND_CHANNELS, enabled=None) -> None:
+        self.__sound = None
+        self.__channels = []
+        self.__next_channel = 0
+        self.__cues = 0
+
+        if enabled is None: #headless runs have no display and usually no audio device
+            enabled = os.environ.get('SDL_VIDEODRIVER') != 'dummy' and os.environ.get('SDL_AUDIODRIVER') != 'dummy'
+        if not enabled:
+            return
+        if not file_path:
+            LOGGER.warning("File path not provided")
+            return
+
+        import pygame as pyg
+        try:
+            if not pyg.mixer.get_init():
+                pyg.mixer.init()
+            self.__sound = pyg.mixer.Sound(file_path) #decoded once, every cue replays the buffer
+        except (pyg.error, FileNotFoundError) as error:
+            LOGGER.warning("Crash sound disabled: %s", error)
+            return
+
+        if pyg.mixer.get_num_channels() < channels:
+            pyg.mixer.set_num_channels(channels)
+        pyg.mixer.set_reserved(channels) #keeps other sounds off the pool
+        self.__channels = [pyg.mixer.Channel(i) for i in range(channels)]
+
+    def is_enabled(self):
+
+        """
+        Function: returns whether cues are actually played
+
+        Parameters: None
+
+        Returns:
+
+            enabled:
+                type: boolean
+        """
+        return self.__sound is not None
+
+    def get_cues(self):
+
+        """
+        Function: returns number of crash cues played
+
+        Parameters: None
+
+        Returns:
+
+            cues:
+                type: int
+        """
+        return self.__cues
+
+    def play(self, crashes=1):
+
+        """
+        Function: plays one crash cue for all crashes of a step or frame, louder the more cars crashed,
+                  on a free channel of the pool or else on the one that started longest ago
+
+        Parameters:
+
+            crashes:
+                default: 1
+                type: int
+
+        Returns: None
+        """
+
+        if self.__sound is None or crashes <= 0:
+            return
+
+        channels = self.__channels
+        channel = next((channel for channel in channels if not channel.get_busy()), None)
+        if channel is None:
+            channel = channels[self.__next_channel]
+            self.__next_channel = (self.__next_channel + 1) % len(channels)
+        channel.set_volume(min(1.0, 0.5 + 0.1*crashes))
+        channel.play(self.__sound)
+        self.__cues += 1
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
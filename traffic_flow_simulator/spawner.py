@@ -0,0 +1,397 @@
+import bisect
+import heapq
+import itertools
+import random
+from collections import deque
+from constants import *
+from car import *
+from arrivals import *
+
+class Spawner:
+
+    def __init__(self, clock=None, spawn_rate=CAR_SPAWN_RATE, percentage_of_slowed_cars=0.3, seed=None, demand=None, route_planner=None,
+                 arrivals=None) -> None:
+        self.__clock = clock or WallClock()
+        self.__spawn_rate = spawn_rate
+        self.__percentage_of_slowed_cars = percentage_of_slowed_cars
+        self.__rng = random.Random(seed)
+        self.__demand = demand or [] #(origin road index, destination road index, weight), empty spawns on random roads
+
+        #demand grouped by origin with cumulative weights, a pair is drawn from all of it or from one origin's span
+        grouped = sorted(self.__demand, key=lambda entry: entry[0])
+        self.__demand_pairs = [(origin, destination) for origin, destination, _ in grouped]
+        self.__demand_weights = list(itertools.accumulate(weight for _, _, weight in grouped))
+        self.__origin_spans = {} #origin road index -> (first, end) positions of its pairs
+        for position, (origin, _) in enumerate(self.__demand_pairs):
+            first, _ = self.__origin_spans.get(origin, (position, position))
+            self.__origin_spans[origin] = (first, position + 1)
+        self.__route_planner = route_planner
+        self.__last_spawn_time = self.__clock.now()
+
+        #per road arrival processes replace the single spawn_rate process over random roads
+        self.__arrival_specs = dict(arrivals or {})
+        self.__arrivals = {} #road index -> ArrivalProcess
+        self.__pending = {} #road index -> drawn arrival times not queued yet
+        self.__last_arrivals = {} #road index -> last drawn arrival time
+        self.__next_arrivals = [] #min heap of (arrival time, road index), one entry per road
+        self.__backlog = {} #road index -> vehicles that arrived while the start of the road was taken
+
+        if not self.__arrival_specs:
+            self.__clock.schedule(self.__last_spawn_time + self.__spawn_rate)
+        for road_index, spec in sorted(self.__arrival_specs.items()):
+            self.__arrivals[road_index] = arrival_process(spec, None if seed is None else f"{seed}:{road_index}")
+            self.__pending[road_index] = deque()
+            self.__last_arrivals[road_index] = self.__last_spawn_time
+            self.__queue_next_arrival(road_index)
+
+    def get_clock(self):
+
+        """
+        Function: returns clock that the Spawner reads time from
+
+        Parameters: None
+
+        Returns:
+
+            clock:
+                type: WallClock or VirtualClock
+        """
+        return self.__clock
+
+    def get_rng(self):
+
+        """
+        Function: returns seeded random number generator used to pick roads and slowed cars
+
+        Parameters: None
+
+        Returns:
+
+            rng:
+                type: random.Random
+        """
+        return self.__rng
+
+    def get_spawn_rate(self):
+
+        """
+        Function: returns seconds between spawns
+
+        Parameters: None
+
+        Returns:
+
+            spawn_rate:
+                type: float
+        """
+        return self.__spawn_rate
+
+    def get_percentage_of_slowed_cars(self):
+
+        """
+        Function: returns fraction of spawned cars that keep no following distance
+
+        Parameters: None
+
+        Returns:
+
+            percentage_of_slowed_cars:
+                type: float
+        """
+        return self.__percentage_of_slowed_cars
+
+    def get_demand(self):
+
+        """
+        Function: returns origin-destination demand cars are spawned from
+
+        Parameters: None
+
+        Returns:
+
+            demand:
+                type: list[tuple(int, int, float)] of (origin road index, destination road index, weight)
+        """
+        return self.__demand
+
+    def get_arrival_specs(self):
+
+        """
+        Function: returns arrival process settings of each road that has one
+
+        Parameters: None
+
+        Returns:
+
+            arrivals:
+                type: dict{int: dict}
+        """
+        return self.__arrival_specs
+
+    def get_backlog(self):
+
+        """
+        Function: returns vehicles waiting to enter each road because its start block was taken when they arrived
+
+        Parameters: None
+
+        Returns:
+
+            backlog:
+                type: dict{int: int}
+        """
+        return self.__backlog
+
+    def get_last_spawn_time(self):
+
+        """
+        Function: returns time of the last spawn attempt
+
+        Parameters: None
+
+        Returns:
+
+            last_spawn_time:
+                type: float
+        """
+        return self.__last_spawn_time
+
+    def set_last_spawn_time(self, last_spawn_time):
+
+        """
+        Function: assigns time of the last spawn attempt, used when restoring a snapshot
+
+        Parameters:
+
+            last_spawn_time:
+                type: float
+
+        Returns: None
+        """
+        self.__last_spawn_time = last_spawn_time
+
+    def spawn_cars(self, list_of_roads):
+
+        """
+        Function: places cars at starting postitions of roads based upon rate (spawn_rate), or when their road's arrival process says
+                  a vehicle arrives. Also, randomly assigns no following distance to cars for collisions to occur.
+                  With demand, an origin-destination pair is drawn by weight and the car follows the cached route between them
+
+        Parameters:
+
+            list_of_roads:
+                type: list[RoadNetwork]
+
+        Returns:
+
+            cars:
+                type: list[Car] placed this call
+        """
+
+        if self.__arrivals:
+            return self.__spawn_arrivals(list_of_roads)
+
+        cars = []
+        now = self.__clock.now()
+        if list_of_roads and now >= self.__last_spawn_time + self.__spawn_rate:
+
+            is_slowed_reaction_time = self.__rng.randint(1, 100)
+            route = None
+            if self.__demand:
+                origin, destination = self.__draw_pair(0, len(self.__demand_pairs))
+                road = list_of_roads[origin]
+                route = self.__route_planner.get_route(origin, destination)
+            else:
+                road = self.__rng.choice(list_of_roads)
+            if (route or not self.__demand) and road.is_entry_free():
+                cars.append(self.__place_car(road, is_slowed_reaction_time, route))
+
+            self.__last_spawn_time = now
+            self.__clock.schedule(now + self.__spawn_rate)
+
+        return cars
+
+    def __spawn_arrivals(self, list_of_roads):
+
+        """
+        Function: queues every vehicle whose arrival time has come at the entry of its road and lets one car per free entry onto the road
+
+        Parameters:
+
+            list_of_roads:
+                type: list[RoadNetwork]
+
+        Returns:
+
+            cars:
+                type: list[Car]
+        """
+
+        now = self.__clock.now()
+        next_arrivals = self.__next_arrivals
+        backlog = self.__backlog
+        while next_arrivals and next_arrivals[0][0] <= now:
+            _, road_index = heapq.heappop(next_arrivals)
+            backlog[road_index] = backlog.get(road_index, 0) + 1
+            self.__queue_next_arrival(road_index)
+
+        cars = []
+        for road_index in list(backlog):
+            road = list_of_roads[road_index]
+            if not road.is_entry_free():
+                continue
+            route = None
+            span = self.__origin_spans.get(road_index)
+            is_slowed_reaction_time = self.__rng.randint(1, 100)
+            if span:
+                _, destination = self.__draw_pair(*span)
+                route = self.__route_planner.get_route(road_index, destination)
+            if route or not span: #like random spawning, a pair without a route places no car
+                cars.append(self.__place_car(road, is_slowed_reaction_time, route))
+            backlog[road_index] -= 1
+            if not backlog[road_index]:
+                del backlog[road_index]
+        return cars
+
+    def __draw_pair(self, first, end):
+
+        """
+        Function: draws an origin-destination pair by weight from positions first to end of the demand table
+
+        Parameters:
+
+            first:
+                type: int
+
+            end:
+                type: int
+
+        Returns:
+
+            pair:
+                type: tuple(int, int) of (origin road index, destination road index)
+        """
+        weights = self.__demand_weights
+        low = weights[first - 1] if first else 0
+        position = bisect.bisect(weights, low + self.__rng.random() * (weights[end - 1] - low), first, end - 1)
+        return self.__demand_pairs[position]
+
+    def __queue_next_arrival(self, road_index):
+
+        """
+        Function: takes the next drawn arrival time of road_index, drawing a new batch when they run out, and schedules it on the clock
+
+        Parameters:
+
+            road_index:
+                type: int
+
+        Returns: None
+        """
+
+        pending = self.__pending[road_index]
+        if not pending:
+            pending.extend(self.__arrivals[road_index].next_batch(self.__last_arrivals[road_index], ARRIVAL_BATCH))
+            if not pending: #process without any vehicles
+                return
+            self.__last_arrivals[road_index] = pending[-1]
+        time = pending.popleft()
+        heapq.heappush(self.__next_arrivals, (time, road_index))
+        self.__clock.schedule(time)
+
+    def __place_car(self, road, is_slowed_reaction_time, route):
+
+        """
+        Function: adds a new car to the start of road
+
+        Parameters:
+
+            road:
+                type: RoadNetwork
+
+            is_slowed_reaction_time:
+                type: int (1 to 100, cars at or under percentage_of_slowed_cars keep no following distance)
+
+            route:
+                type: tuple or None
+
+        Returns:
+
+            car:
+                type: Car object
+        """
+
+        if is_slowed_reaction_time <= self.__percentage_of_slowed_cars*100:
+            car = Car(velocity=road.get_speed_limit(), following_distance=NO_FOLLOWING_DISTANCE, clock=self.__clock)
+        else:
+            car = Car(velocity=road.get_speed_limit(), clock=self.__clock)
+        car.set_route(route)
+        road.add_car(car)
+        return car
+
+    def get_arrival_state(self):
+
+        """
+        Function: returns where every arrival process is, for snapshots
+
+        Parameters: None
+
+        Returns:
+
+            state:
+                type: dict of plain lists and numbers
+        """
+        return {'next': [list(entry) for entry in self.__next_arrivals], 'backlog': [[i, n] for i, n in self.__backlog.items()],
+                'roads': [[road_index, process.get_state(), list(self.__pending[road_index]), self.__last_arrivals[road_index]]
+                          for road_index, process in self.__arrivals.items()]}
+
+    def set_backlog(self, backlog):
+
+        """
+        Function: sets vehicles waiting to enter each road
+
+        Parameters:
+
+            backlog:
+                type: dict{int: int}
+
+        Returns: None
+        """
+        self.__backlog = dict(backlog)
+
+    def schedule_arrivals(self):
+
+        """
+        Function: puts the next arrival of every road on the clock again, after the clock's events were replaced
+
+        Parameters: None
+
+        Returns: None
+        """
+        for time, _ in self.__next_arrivals:
+            self.__clock.schedule(time)
+
+    def set_arrival_state(self, state):
+
+        """
+        Function: puts every arrival process back where get_arrival_state found it. Clock events are restored separately
+
+        Parameters:
+
+            state:
+                type: dict
+
+        Returns: None
+        """
+
+        self.__next_arrivals = [tuple(entry) for entry in state['next']]
+        heapq.heapify(self.__next_arrivals)
+        self.set_backlog(state['backlog'])
+        for road_index, process_state, pending, last_arrival in state['roads']:
+            self.__arrivals[road_index].set_state(process_state)
+            self.__pending[road_index] = deque(pending)
+            self.__last_arrivals[road_index] = last_arrival
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
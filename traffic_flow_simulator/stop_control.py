@@ -0,0 +1,357 @@
+import heapq
+from collections import deque
+from constants import *
+
+
+class StopController:
+
+    def __init__(self, roads, index, clock, yield_distance=YIELD_DISTANCE) -> None:
+        self.__roads = roads
+        self.__clock = clock
+        self.__yield_distance = yield_distance
+        self.__sign_roads = [] #(road index, RoadNetwork) of roads with stop signs, the only ones stop_cars looks at
+        self.__queues = {} #sign (road index, offset) -> cars stopped at it, first to arrive first
+        self.__rules = {} #sign -> one of STOP_RULES
+        self.__guarded = {} #sign -> block right after the sign that the rule keeps clear
+        self.__groups = {} #guarded block -> all way stop signs in front of it
+        self.__priority = {} #yield sign -> (RoadNetwork, offset of the guarded block) of every other road through its guarded block
+        self.__releases = [] #min heap of (time, road index, offset) when the first car at a sign has stopped long enough
+        self.__held = {} #sign -> first car that stopped long enough but waits for its all way or yield turn
+
+        for road_index, road in enumerate(roads):
+            stop_signs = set(road.get_stop_sign_pos())
+            if not stop_signs:
+                continue
+            path = road.get_path()
+            offsets = [offset for offset, pos in enumerate(path) if pos in stop_signs]
+            road.set_stop_offsets(offsets)
+            self.__sign_roads.append((road_index, road))
+
+            for offset in offsets:
+                sign = (road_index, offset)
+                guarded = path[offset + 1] if offset + 1 < len(path) else None
+                rule = road.get_stop_rule() if guarded is not None else 'stop' #nothing to give way to at the end of a road
+                self.__queues[sign] = deque()
+                self.__rules[sign] = rule
+                self.__guarded[sign] = guarded
+                if rule == 'all_way':
+                    self.__groups.setdefault(guarded, []).append(sign)
+                elif rule == 'yield':
+                    self.__priority[sign] = [(roads[other_index], other_offset) for other_index, other_offset in index.get_roads_at(guarded)
+                                             if other_index != road_index]
+
+            #cars already waiting, for example in a restored snapshot, queue in the order they stopped
+            waiting = [car for car in road.get_cars() if car.get_stop_state() and (road_index, car.get_offset()) in self.__queues]
+            for car in sorted(waiting, key=lambda car: car.start_time):
+                self.__queues[(road_index, car.get_offset())].append(car)
+            road.pop_stopping_cars()
+
+        for sign, queue in self.__queues.items():
+            if queue:
+                self.__schedule_release(sign, queue[0])
+
+    def get_queues(self):
+
+        """
+        Function: returns cars waiting at each stop sign
+
+        Parameters: None
+
+        Returns:
+
+            queues:
+                type: dict{tuple(int, int): deque[Car]} of (road index, offset) -> cars in the order they stopped
+        """
+        return self.__queues
+
+    def get_rule(self, road_index, offset):
+
+        """
+        Function: returns rule of the stop sign at offset of road road_index
+
+        Parameters:
+
+            road_index:
+                type: int
+
+            offset:
+                type: int
+
+        Returns:
+
+            rule:
+                type: str (one of STOP_RULES)
+        """
+        return self.__rules[(road_index, offset)]
+
+    def get_waiting(self):
+
+        """
+        Function: returns number of cars stopped at any stop sign
+
+        Parameters: None
+
+        Returns:
+
+            waiting:
+                type: int
+        """
+        return sum(len(queue) for queue in self.__queues.values())
+
+    def stop_cars(self):
+
+        """
+        Function: stops cars that reached a stop sign since the last call and queues them at it. Only cars the roads noted
+                  on arrival are looked at, not every car on roads with stop signs
+
+        Parameters: None
+
+        Returns:
+
+            stopped_cars:
+                type: list[tuple(Car, RoadNetwork)]
+        """
+
+        stopped_cars = []
+        for road_index, road in self.__sign_roads:
+            for car in road.pop_stopping_cars():
+                if car.get_stop_state() or not self.__is_on_road(car, road): #crashed or turned off the road this step
+                    continue
+                sign = (road_index, car.get_offset())
+                is_first = self.__first_car(sign) is None
+                car.set_stop_state(True)
+                self.__queues[sign].append(car)
+                if is_first:
+                    self.__schedule_release(sign, car)
+                stopped_cars.append((car, road))
+        return stopped_cars
+
+    def release_cars(self):
+
+        """
+        Function: lets go of cars that stopped long enough. At a stop sign the first car goes once it stopped for the road's stop duration,
+                  at an all way stop the car that arrived first among the signs of a crossing goes once the crossing is clear,
+                  and at a yield sign the car goes as soon as no car of another road is about to enter the block it merges into
+
+        Parameters: None
+
+        Returns:
+
+            released:
+                type: list[tuple(Car, RoadNetwork)] (cars free to move again, they still keep their following distance)
+        """
+
+        now = self.__clock.now()
+        released = []
+        releases = self.__releases
+        while releases and releases[0][0] <= now:
+            _, road_index, offset = heapq.heappop(releases)
+            sign = (road_index, offset)
+            car = self.__first_car(sign)
+            if car is None:
+                continue
+            if car.start_time + self.__wait(sign) > now: #the car it was scheduled for crashed, this one stopped later
+                self.__schedule_release(sign, car)
+                continue
+            if self.__rules[sign] == 'stop':
+                released.append(self.__release(sign))
+            else:
+                self.__held[sign] = car
+
+        if not self.__held:
+            return released
+
+        finished_groups = set()
+        for sign in sorted(self.__held):
+            if sign not in self.__held: #let go of by an earlier sign of its all way group
+                continue
+            if self.__first_car(sign) is not self.__held[sign]:
+                del self.__held[sign]
+                if self.__queues[sign]:
+                    self.__schedule_release(sign, self.__queues[sign][0])
+                continue
+
+            guarded = self.__guarded[sign]
+            occupancy = self.__roads[sign[0]].get_occupancy()
+            if occupancy.is_occupied(guarded):
+                continue
+            if self.__rules[sign] == 'yield':
+                if not self.__priority_traffic(sign, occupancy):
+                    del self.__held[sign]
+                    released.append(self.__release(sign))
+            elif guarded not in finished_groups:
+                finished_groups.add(guarded)
+                turn = self.__all_way_turn(guarded, occupancy)
+                if turn is not None:
+                    del self.__held[turn]
+                    released.append(self.__release(turn))
+        return released
+
+    def __all_way_turn(self, guarded, occupancy):
+
+        """
+        Function: returns the sign of an all way stop whose held car arrived first, or None while a car let go of earlier
+                  is still on its sign
+
+        Parameters:
+
+            guarded:
+                type: tuple (block the signs of the group lead onto)
+
+            occupancy:
+                type: OccupancyGrid
+
+        Returns:
+
+            sign:
+                type: tuple(int, int) or None
+        """
+
+        turn = None
+        for sign in self.__groups[guarded]:
+            road = self.__roads[sign[0]]
+            for car, occupant_road in occupancy.get_occupants(road.get_path()[sign[1]]):
+                if occupant_road is road and not car.get_stop_state():
+                    return None
+            car = self.__held.get(sign)
+            if car is not None and (turn is None or (car.start_time, sign) < (self.__held[turn].start_time, turn)):
+                turn = sign
+        return turn
+
+    def __priority_traffic(self, sign, occupancy):
+
+        """
+        Function: returns whether a car of another road is within yield_distance blocks before the block a yield sign merges into
+
+        Parameters:
+
+            sign:
+                type: tuple(int, int)
+
+            occupancy:
+                type: OccupancyGrid
+
+        Returns:
+
+            True:
+                if the yielding car has to keep waiting
+
+            False:
+                if the merge is clear
+        """
+
+        for road, offset in self.__priority[sign]:
+            path = road.get_path()
+            for pos in path[max(0, offset - self.__yield_distance):offset]:
+                if any(occupant_road is road for _, occupant_road in occupancy.get_occupants(pos)):
+                    return True
+        return False
+
+    def __first_car(self, sign):
+
+        """
+        Function: returns first car still waiting at sign, dropping cars that crashed while they waited
+
+        Parameters:
+
+            sign:
+                type: tuple(int, int)
+
+        Returns:
+
+            car:
+                type: Car object or None if no car waits
+        """
+
+        queue = self.__queues[sign]
+        road = self.__roads[sign[0]]
+        while queue and not self.__is_on_road(queue[0], road):
+            queue.popleft()
+        return queue[0] if queue else None
+
+    def __release(self, sign):
+
+        """
+        Function: lets the first car at sign go and starts the stop of the car behind it
+
+        Parameters:
+
+            sign:
+                type: tuple(int, int)
+
+        Returns:
+
+            released:
+                type: tuple(Car, RoadNetwork)
+        """
+
+        queue = self.__queues[sign]
+        car = queue.popleft()
+        car.set_stop_state(False)
+        if queue:
+            self.__schedule_release(sign, queue[0])
+        return car, self.__roads[sign[0]]
+
+    def __schedule_release(self, sign, car):
+
+        """
+        Function: schedules when car, now first at sign, has stopped long enough. Yielding cars only have to wait for a gap
+
+        Parameters:
+
+            sign:
+                type: tuple(int, int)
+
+            car:
+                type: Car object
+
+        Returns: None
+        """
+
+        release_time = max(car.start_time + self.__wait(sign), self.__clock.now())
+        heapq.heappush(self.__releases, (release_time,) + sign)
+        self.__clock.schedule(release_time)
+
+    def __wait(self, sign):
+
+        """
+        Function: returns seconds a car stays stopped at sign before its rule is looked at
+
+        Parameters:
+
+            sign:
+                type: tuple(int, int)
+
+        Returns:
+
+            wait:
+                type: float
+        """
+        return 0 if self.__rules[sign] == 'yield' else self.__roads[sign[0]].get_stop_duration() or 0
+
+    def __is_on_road(self, car, road):
+
+        """
+        Function: returns whether car is still on road, since cars that crashed keep their place in the queues until looked at
+
+        Parameters:
+
+            car:
+                type: Car object
+
+            road:
+                type: RoadNetwork
+
+        Returns:
+
+            True:
+                if car is still on road
+
+            False:
+                if car was removed
+        """
+        return (car, road) in road.get_occupancy().get_occupants(car.get_current_pos())
+
+
+if __name__ == "__main__":
+    print("File is not meant run")
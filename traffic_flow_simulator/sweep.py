@@ -0,0 +1,367 @@
+import argparse
+import itertools
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from snapshot import *
+
+SWEEP_PARAMETERS = ('spawn_rate', 'percentage_of_slowed_cars', 'speed_limit_scale', 'stop_duration')
+BRANCH_PARAMETERS = ('spawn_rate', 'percentage_of_slowed_cars') #parameters that can change after a shared warm up
+
+_worker_scenario = None #scenario loaded once per worker process
+_worker_snapshot = None #warmed up state every run starts from, if any
+
+
+def expand_grid(parameters):
+
+    """
+    Function: returns every combination of the swept parameter values
+
+    Parameters:
+
+        parameters:
+            type: dict{str: list}
+
+    Returns:
+
+        combinations:
+            type: list[dict]
+    """
+
+    names = sorted(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameters[name] for name in names))]
+
+
+def run_key(params, seed):
+
+    """
+    Function: returns a stable key identifying one run, used to skip finished runs when resuming
+
+    Parameters:
+
+        params:
+            type: dict
+
+        seed:
+            type: int
+
+    Returns:
+
+        key:
+            type: str
+    """
+    return json.dumps({'params': params, 'seed': seed}, sort_keys=True)
+
+
+def _init_worker(scenario_path, snapshot=None):
+
+    """
+    Function: loads the scenario once in each worker process
+
+    Parameters:
+
+        scenario_path:
+            type: str
+
+        snapshot:
+            default: None
+            type: bytes (warmed up state from warm_up)
+
+    Returns: None
+    """
+    global _worker_scenario, _worker_snapshot
+    _worker_scenario = load_scenario(scenario_path)
+    _worker_snapshot = snapshot
+
+
+def warm_up(scenario_path, seconds, seed=None, event_driven=False, reservations=False):
+
+    """
+    Function: runs the scenario once for seconds and returns its state, so runs of a sweep branch off it instead of each
+              simulating the warm up again
+
+    Parameters:
+
+        scenario_path:
+            type: str
+
+        seconds:
+            type: float
+
+        seed:
+            default: None (scenario seed)
+            type: int
+
+        event_driven:
+            default: False
+            type: boolean
+
+        reservations:
+            default: False
+            type: boolean (cars book shared blocks, the bookings are part of the snapshot)
+
+    Returns:
+
+        snapshot:
+            type: bytes
+    """
+
+    overrides = {'event_driven': event_driven, 'reservations': reservations}
+    if seed is not None:
+        overrides['seed'] = seed
+    simulation = load_scenario(scenario_path).build_simulation(**overrides)
+    simulation.run(seconds, jump_to_events=True)
+    return encode_snapshot(simulation)
+
+
+def run_one(params, seed, duration, jump_to_events=True, event_driven=False, reservations=False):
+
+    """
+    Function: runs one headless simulation of the worker's scenario, or of a branch off its warm up, with its own seeded random number generator.
+              Metrics only count what happened after the warm up
+
+    Parameters:
+
+        params:
+            type: dict (keys from SWEEP_PARAMETERS)
+
+        seed:
+            type: int
+
+        duration:
+            type: float
+
+        jump_to_events:
+            default: True
+            type: boolean
+
+        event_driven:
+            default: False
+            type: boolean (step with EventSimulation)
+
+        reservations:
+            default: False
+            type: boolean (cars book shared blocks, a warm up keeps its own setting)
+
+    Returns:
+
+        result:
+            type: dict
+    """
+
+    wall_start = time.perf_counter()
+    if _worker_snapshot is None:
+        simulation = _worker_scenario.build_simulation(seed=seed, event_driven=event_driven, reservations=reservations, **params)
+    else:
+        simulation = decode_snapshot(_worker_snapshot, seed=seed, **params)
+    collisions, trips, travel_time = simulation.get_collisions(), simulation.get_completed_trips(), simulation.get_total_travel_time()
+    simulation.run(duration, jump_to_events=jump_to_events) #workers log nothing, so collisions cost no stdout writes
+
+    trips = simulation.get_completed_trips() - trips
+    return {'params': params, 'seed': seed, 'duration': duration, 'collisions': simulation.get_collisions() - collisions,
+            'completed_trips': trips, 'throughput': trips / duration,
+            'mean_travel_time': (simulation.get_total_travel_time() - travel_time) / trips if trips else None,
+            'wall_seconds': time.perf_counter() - wall_start}
+
+
+def read_finished(output_path):
+
+    """
+    Function: returns keys of runs already written to output_path, ignoring a half written last line after a crash
+
+    Parameters:
+
+        output_path:
+            type: str
+
+    Returns:
+
+        finished:
+            type: set[str]
+    """
+
+    finished = set()
+    if not os.path.exists(output_path):
+        return finished
+    with open(output_path) as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            finished.add(run_key(result['params'], result['seed']))
+    return finished
+
+
+def aggregate(output_path):
+
+    """
+    Function: groups results by parameters and returns mean and standard deviation of each metric across seeds
+
+    Parameters:
+
+        output_path:
+            type: str
+
+    Returns:
+
+        summary:
+            type: list[dict]
+    """
+
+    groups = {}
+    with open(output_path) as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            groups.setdefault(json.dumps(result['params'], sort_keys=True), []).append(result)
+
+    summary = []
+    for key, results in sorted(groups.items()):
+        row = {'params': json.loads(key), 'runs': len(results)}
+        for metric in ('collisions', 'throughput', 'mean_travel_time'):
+            values = [result[metric] for result in results if result[metric] is not None]
+            row[metric] = statistics.fmean(values) if values else None
+            row[metric + '_stdev'] = statistics.stdev(values) if len(values) > 1 else 0.0
+        summary.append(row)
+    return summary
+
+
+def run_sweep(scenario_path, parameters, seeds, duration, output_path, workers=None, jump_to_events=True, event_driven=False, snapshot=None,
+              reservations=False):
+
+    """
+    Function: runs every parameter combination for every seed across a process pool, appending each result to output_path as soon as it
+              arrives. Runs already in output_path are skipped, so rerunning after a crash resumes the sweep
+
+    Parameters:
+
+        scenario_path:
+            type: str
+
+        parameters:
+            type: dict{str: list}
+
+        seeds:
+            type: iterable[int]
+
+        duration:
+            type: float
+
+        output_path:
+            type: str (json lines)
+
+        workers:
+            default: None (one per core)
+            type: int
+
+        jump_to_events:
+            default: True
+            type: boolean
+
+        event_driven:
+            default: False
+            type: boolean (step with EventSimulation)
+
+        snapshot:
+            default: None
+            type: bytes (warm up every run branches off, see warm_up. Only BRANCH_PARAMETERS can be swept with it, others raise ValueError)
+
+        reservations:
+            default: False
+            type: boolean (cars book shared blocks before entering them)
+
+    Returns:
+
+        summary:
+            type: list[dict]
+    """
+
+    if snapshot is not None and any(name not in BRANCH_PARAMETERS for name in parameters):
+        raise ValueError(f"only {', '.join(BRANCH_PARAMETERS)} can be swept after a warm up")
+
+    finished = read_finished(output_path)
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, 'rb+') as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b'\n': #end the half written line of a crash so the next result starts on its own line
+                file.write(b'\n')
+    tasks = [(params, seed) for params in expand_grid(parameters) for seed in seeds if run_key(params, seed) not in finished]
+    print(f"{len(finished)} runs already finished, {len(tasks)} to go")
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(scenario_path, snapshot)) as pool, \
+            open(output_path, 'a') as output:
+        futures = {pool.submit(run_one, params, seed, duration, jump_to_events, event_driven, reservations): (params, seed) for params, seed in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception as error: #leave the run out of the output so a resumed sweep retries it
+                print(f"Run {futures[future]} failed: {error!r}")
+                continue
+            output.write(json.dumps(result) + '\n')
+            output.flush() #a crash loses at most the runs still in flight
+            if done % 100 == 0 or done == len(futures):
+                print(f"{done}/{len(futures)} runs finished")
+
+    return aggregate(output_path)
+
+
+def parse_parameter(text):
+
+    """
+    Function: parses name=value1,value2 into a parameter name and list of floats
+
+    Parameters:
+
+        text:
+            type: str
+
+    Returns:
+
+        parameter:
+            type: tuple(str, list[float])
+    """
+
+    name, _, values = text.partition('=')
+    if name not in SWEEP_PARAMETERS:
+        raise argparse.ArgumentTypeError(f"{name} is not one of {', '.join(SWEEP_PARAMETERS)}")
+    return name, [float(value) for value in values.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sweep scenario parameters across seeds on every core')
+    parser.add_argument('scenario')
+    parser.add_argument('--param', type=parse_parameter, action='append', default=[], help='e.g. spawn_rate=0.5,1,2')
+    parser.add_argument('--seeds', type=int, default=10)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--duration', type=float, default=None, help='simulated seconds, defaults to the scenario duration')
+    parser.add_argument('--output', default='sweep_results.jsonl')
+    parser.add_argument('--summary', default=None, help='json file for the aggregated metrics')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--fixed-step', action='store_true', help='step by dt instead of jumping between scheduled events')
+    parser.add_argument('--event-driven', action='store_true', help='only look at cars that are due to move')
+    parser.add_argument('--reservations', action='store_true', help='cars book shared blocks before entering them instead of crashing there')
+    parser.add_argument('--warmup', type=float, default=0, help='simulate this many seconds once and branch every run off that state')
+    args = parser.parse_args()
+
+    duration = args.duration or load_scenario(args.scenario).get_duration()
+    if not duration:
+        parser.error('the scenario has no duration, pass --duration')
+
+    snapshot = None
+    if args.warmup:
+        if any(name not in BRANCH_PARAMETERS for name, _ in args.param): #checked again by run_sweep, but before the warm up is spent
+            parser.error(f"only {', '.join(BRANCH_PARAMETERS)} can be swept after a warm up")
+        snapshot = warm_up(args.scenario, args.warmup, event_driven=args.event_driven, reservations=args.reservations)
+
+    summary = run_sweep(args.scenario, dict(args.param), range(args.first_seed, args.first_seed + args.seeds), duration, args.output,
+                        args.workers, not args.fixed_step, args.event_driven, snapshot, args.reservations)
+    for row in summary:
+        print(row)
+    if args.summary:
+        with open(args.summary, 'w') as file:
+            json.dump(summary, file, indent=2)
@@ -0,0 +1,668 @@
+from constants import *
+from clock import *
+
+try:
+    import numpy as np
+except ImportError: #numpy is only needed for the vectorized backend
+    np = None
+
+class CarView:
+
+    def __init__(self, simulation, car_id) -> None:
+        self.__simulation = simulation
+        self.__car_id = car_id
+
+    def _slot(self):
+
+        """
+        Function: returns current array slot of the viewed car
+
+        Parameters: None
+
+        Returns:
+
+            slot:
+                type: int or None if the car was removed
+        """
+        return self.__simulation._find_slot(self.__car_id)
+
+    def get_id(self):
+
+        """
+        Function: returns id of the viewed car
+
+        Parameters: None
+
+        Returns:
+
+            car_id:
+                type: int
+        """
+        return self.__car_id
+
+    def is_alive(self):
+
+        """
+        Function: returns whether the viewed car is still on the network
+
+        Parameters: None
+
+        Returns:
+
+            alive:
+                type: boolean
+        """
+        return self._slot() is not None
+
+    def get_velocity(self):
+
+        """
+        Function: returns velocity of the viewed car
+
+        Parameters: None
+
+        Returns:
+
+            velocity:
+                type: float
+        """
+        return float(self.__simulation._get_field('velocity', self._slot()))
+
+    def get_path(self):
+
+        """
+        Function: returns path that the viewed car follows
+
+        Parameters: None
+
+        Returns:
+
+            path:
+                type: list[tuple]
+        """
+        road = self.__simulation._get_field('road', self._slot())
+        return self.__simulation.get_roads()[road].get_path()
+
+    def get_offset(self):
+
+        """
+        Function: returns index of the viewed car's current position within its path
+
+        Parameters: None
+
+        Returns:
+
+            offset:
+                type: int
+        """
+        return int(self.__simulation._get_field('offset', self._slot()))
+
+    def get_current_pos(self):
+
+        """
+        Function: returns current position of the viewed car
+
+        Parameters: None
+
+        Returns:
+
+            current_pos:
+                type: tuple
+        """
+        return self.get_path()[self.get_offset()]
+
+    def get_stop_state(self):
+
+        """
+        Function: returns if the viewed car is stopped
+
+        Parameters: None
+
+        Returns:
+
+            stop_state:
+                type: boolean
+        """
+        return bool(self.__simulation._get_field('stopped', self._slot()))
+
+    def get_following_distance(self):
+
+        """
+        Function: returns following distance of the viewed car
+
+        Parameters: None
+
+        Returns:
+
+            following_distance:
+                type: int
+        """
+        return int(self.__simulation._get_field('following_distance', self._slot()))
+
+
+class VectorizedSimulation:
+
+    FIELDS = (('car_id', 'int64'), ('road', 'int32'), ('offset', 'int32'), ('velocity', 'float64'),
+              ('start_time', 'float64'), ('stopped', 'bool'), ('following_distance', 'int32'))
+
+    def __init__(self, roads=None, dt=SIMULATION_DT, spawn_rate=CAR_SPAWN_RATE, percentage_of_slowed_cars=0.3, seed=None, capacity=1024) -> None:
+        if np is None:
+            raise ImportError("VectorizedSimulation requires numpy")
+
+        self.__roads = roads or []
+        self.__dt = dt
+        self.__ticks = 0
+        self.__clock = VirtualClock()
+        self.__spawn_rate = spawn_rate
+        self.__percentage_of_slowed_cars = percentage_of_slowed_cars
+        self.__last_spawn_time = self.__clock.now()
+        self.__rng = np.random.default_rng(seed)
+        self.__collisions = 0
+        self.__next_car_id = 0
+
+        # every road path is concatenated into one array of cell ids, road i owns path_cells[road_base[i]:road_base[i]+road_len[i]]
+        cell_ids = {}
+        path_cells = []
+        stop_mask = []
+        road_base = []
+        road_len = []
+        for road in self.__roads:
+            path = road.get_path()
+            stop_signs = road.get_stop_sign_pos()
+            road_base.append(len(path_cells))
+            road_len.append(len(path))
+            for pos in path:
+                path_cells.append(cell_ids.setdefault(pos, len(cell_ids)))
+                stop_mask.append(pos in stop_signs)
+
+        self.__cell_xy = np.array(list(cell_ids.keys()) or np.empty((0, 2)), dtype=np.int32).reshape(-1, 2)
+        self.__path_cells = np.array(path_cells, dtype=np.int64)
+        self.__stop_mask = np.array(stop_mask, dtype=bool)
+        self.__road_base = np.array(road_base, dtype=np.int64)
+        self.__road_len = np.array(road_len, dtype=np.int64)
+        self.__road_start = np.array([road.get_offset(road.get_start()) or 0 for road in self.__roads], dtype=np.int64)
+        self.__road_speed = np.array([road.get_speed_limit() for road in self.__roads], dtype=np.float64)
+        self.__road_stop_duration = np.array([road.get_stop_duration() or 0 for road in self.__roads], dtype=np.float64)
+        self.__on_start = np.zeros(len(self.__roads), dtype=np.int64) #cars on the start block of each road, kept as cars come and go
+
+        self.__size = 0
+        self.__arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.FIELDS}
+
+    def get_roads(self):
+
+        """
+        Function: returns list of roads stepped by the simulation
+
+        Parameters: None
+
+        Returns:
+
+            roads:
+                type: list[RoadNetwork]
+        """
+        return self.__roads
+
+    def get_dt(self):
+
+        """
+        Function: returns fixed timestep of the simulation in seconds
+
+        Parameters: None
+
+        Returns:
+
+            dt:
+                type: float
+        """
+        return self.__dt
+
+    def get_time(self):
+
+        """
+        Function: returns current simulated time
+
+        Parameters: None
+
+        Returns:
+
+            time:
+                type: float
+        """
+        return self.__clock.now()
+
+    def get_clock(self):
+
+        """
+        Function: returns virtual clock of the simulation
+
+        Parameters: None
+
+        Returns:
+
+            clock:
+                type: VirtualClock
+        """
+        return self.__clock
+
+    def get_ticks(self):
+
+        """
+        Function: returns number of steps taken by the simulation
+
+        Parameters: None
+
+        Returns:
+
+            ticks:
+                type: int
+        """
+        return self.__ticks
+
+    def get_collisions(self):
+
+        """
+        Function: returns number of collisions that have occured, one per block where cars collided
+
+        Parameters: None
+
+        Returns:
+
+            collisions:
+                type: int
+        """
+        return self.__collisions
+
+    def get_car_count(self):
+
+        """
+        Function: returns number of cars on the network
+
+        Parameters: None
+
+        Returns:
+
+            car_count:
+                type: int
+        """
+        return self.__size
+
+    def get_array(self, name):
+
+        """
+        Function: returns live state array of every car on the network
+
+        Parameters:
+
+            name:
+                type: str (one of car_id, road, offset, velocity, start_time, stopped, following_distance)
+
+        Returns:
+
+            array:
+                type: numpy.ndarray (view, valid until the next step)
+        """
+        return self.__arrays[name][:self.__size]
+
+    def get_cars(self, road_index=None):
+
+        """
+        Function: returns Car like views of the cars on the network or on one road
+
+        Parameters:
+
+            road_index:
+                default: None (every road)
+                type: int
+
+        Returns:
+
+            cars:
+                type: list[CarView]
+        """
+        car_ids = self.get_array('car_id')
+        if road_index is not None:
+            car_ids = car_ids[self.get_array('road') == road_index]
+        return [CarView(self, int(car_id)) for car_id in car_ids]
+
+    def _find_slot(self, car_id):
+
+        """
+        Function: returns array slot holding car_id, slots stay sorted by id because cars are appended and compacted in order
+
+        Parameters:
+
+            car_id:
+                type: int
+
+        Returns:
+
+            slot:
+                type: int or None if the car was removed
+        """
+        car_ids = self.get_array('car_id')
+        slot = int(np.searchsorted(car_ids, car_id))
+        if slot < self.__size and car_ids[slot] == car_id:
+            return slot
+        return None
+
+    def _get_field(self, name, slot):
+
+        """
+        Function: returns value of one field of the car in slot
+
+        Parameters:
+
+            name:
+                type: str
+
+            slot:
+                type: int
+
+        Returns:
+
+            value:
+                type: numpy scalar
+        """
+        if slot is None:
+            raise LookupError("Car is no longer on the network")
+        return self.__arrays[name][slot]
+
+    def _ensure_capacity(self, extra):
+
+        """
+        Function: grows the state arrays so extra more cars fit
+
+        Parameters:
+
+            extra:
+                type: int
+
+        Returns: None
+        """
+        needed = self.__size + extra
+        capacity = len(self.__arrays['car_id'])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, array in self.__arrays.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.__size] = array[:self.__size]
+            self.__arrays[name] = grown
+
+    def add_cars(self, road_indices, following_distance=2):
+
+        """
+        Function: places a batch of cars at the starting positions of roads
+
+        Parameters:
+
+            road_indices:
+                type: sequence[int]
+
+            following_distance:
+                default: 2
+                type: int or sequence[int]
+
+        Returns:
+
+            car_ids:
+                type: numpy.ndarray
+        """
+        road_indices = np.asarray(road_indices, dtype=np.int32)
+        count = len(road_indices)
+        self._ensure_capacity(count)
+
+        start, end = self.__size, self.__size + count
+        car_ids = np.arange(self.__next_car_id, self.__next_car_id + count, dtype=np.int64)
+        arrays = self.__arrays
+        arrays['car_id'][start:end] = car_ids
+        arrays['road'][start:end] = road_indices
+        arrays['offset'][start:end] = self.__road_start[road_indices]
+        arrays['velocity'][start:end] = self.__road_speed[road_indices]
+        arrays['start_time'][start:end] = self.__clock.now()
+        arrays['stopped'][start:end] = False
+        arrays['following_distance'][start:end] = following_distance
+
+        self.__on_start += np.bincount(road_indices, minlength=len(self.__roads))
+        self.__next_car_id += count
+        self.__size = end
+        return car_ids
+
+    def remove_cars(self, mask):
+
+        """
+        Function: removes every car whose entry in mask is True, keeping the remaining cars in order
+
+        Parameters:
+
+            mask:
+                type: numpy.ndarray[bool]
+
+        Returns: None
+        """
+        keep = ~mask
+        kept = int(keep.sum())
+        if kept == self.__size:
+            return
+        self.__on_start -= self._start_counts(mask)
+        for name, array in self.__arrays.items():
+            array[:kept] = array[:self.__size][keep]
+        self.__size = kept
+
+    def _start_counts(self, mask):
+
+        """
+        Function: returns how many of the cars in mask are on the start block of each road
+
+        Parameters:
+
+            mask:
+                type: numpy.ndarray[bool]
+
+        Returns:
+
+            counts:
+                type: numpy.ndarray[int] one per road
+        """
+        road = self.get_array('road')
+        leaving = mask & (self.get_array('offset') == self.__road_start[road])
+        return np.bincount(road[leaving], minlength=len(self.__roads))
+
+    def _cells(self):
+
+        """
+        Function: returns cell id of every car's current position
+
+        Parameters: None
+
+        Returns:
+
+            cells:
+                type: numpy.ndarray
+        """
+        return self.__path_cells[self.__road_base[self.get_array('road')] + self.get_array('offset')]
+
+    def spawn_cars(self):
+
+        """
+        Function: places a car at the start of a random road every spawn_rate seconds if the start is free, read from a per road count.
+                  Also, randomly assigns no following distance to cars for collisions to occur
+
+        Parameters: None
+
+        Returns: None
+        """
+
+        now = self.__clock.now()
+        if self.__roads and now >= self.__last_spawn_time + self.__spawn_rate:
+
+            is_slowed_reaction_time = int(self.__rng.integers(1, 101))
+            road_index = int(self.__rng.integers(len(self.__roads)))
+            if not self.__on_start[road_index]:
+                if is_slowed_reaction_time <= self.__percentage_of_slowed_cars*100:
+                    self.add_cars([road_index], NO_FOLLOWING_DISTANCE)
+                else:
+                    self.add_cars([road_index])
+
+            self.__last_spawn_time = now
+
+    def move_cars(self):
+
+        """
+        Function: moves every due car that is not blocked within its following distance in one batch.
+                  Look ahead uses positions from the start of the step, so a follower waits one step longer than in Simulation,
+                  and of cars heading into the same block only the first in road order moves, as in Simulation
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: numpy.ndarray (n x 2 grid positions)
+        """
+
+        if not self.__size:
+            return self.__cell_xy[:0]
+
+        now = self.__clock.now()
+        road = self.get_array('road')
+        offset = self.get_array('offset')
+        start_time = self.get_array('start_time')
+        stopped = self.get_array('stopped')
+        following_distance = self.get_array('following_distance')
+        base = self.__road_base[road]
+        last = self.__road_len[road] - 1
+
+        cells = self.__path_cells[base + offset]
+        occupied = np.bincount(cells, minlength=len(self.__cell_xy)) > 0
+
+        due = (now >= start_time + self.get_array('velocity')) & (offset < last)
+        due &= ~stopped | (now >= start_time + self.__road_stop_duration[road])
+
+        blocked = np.zeros(self.__size, dtype=bool)
+        for i in range(1, int(following_distance.max(initial=0)) + 2):
+            ahead = offset + i
+            in_range = (ahead <= last) & (following_distance + 1 >= i)
+            ahead_cells = self.__path_cells[base + np.minimum(ahead, last)]
+            blocked |= in_range & occupied[ahead_cells]
+
+        moving = due & ~blocked
+
+        #movers that see the same free block all head into it, Simulation lets the first in road order (furthest along first) go
+        #and holds every later one that keeps a following distance, while cars with no following distance go anyway and crash
+        movers = np.flatnonzero(moving)
+        targets = self.__path_cells[base[movers] + offset[movers] + 1]
+        order = np.lexsort((-offset[movers], road[movers], targets))
+        movers, targets = movers[order], targets[order]
+        later = np.zeros(len(movers), dtype=bool)
+        later[1:] = targets[1:] == targets[:-1]
+        moving[movers[later & (following_distance[movers] != NO_FOLLOWING_DISTANCE)]] = False
+
+        vacated_blocks = self.__cell_xy[cells[moving]]
+        self.__on_start -= self._start_counts(moving) #offsets only grow, so no car moves onto a start block
+        offset[moving] += 1
+        start_time[moving] = now
+        stopped[moving] = False
+        return vacated_blocks
+
+    def check_for_collisions(self):
+
+        """
+        Function: removes every car sharing a block with another car and counts one collision per block
+
+        Parameters: None
+
+        Returns:
+
+            blocks_to_color:
+                type: numpy.ndarray (n x 2 grid positions)
+        """
+
+        if not self.__size:
+            return self.__cell_xy[:0]
+
+        cells = self._cells()
+        counts = np.bincount(cells, minlength=len(self.__cell_xy))
+        crashed = counts[cells] > 1
+        if not crashed.any():
+            return self.__cell_xy[:0]
+
+        crash_cells = np.flatnonzero(counts > 1)
+        self.__collisions += len(crash_cells)
+        self.remove_cars(crashed)
+        return self.__cell_xy[crash_cells]
+
+    def remove_end_cars(self):
+
+        """
+        Function: removes cars that reached the end of their road
+
+        Parameters: None
+
+        Returns: None
+        """
+        if self.__size:
+            self.remove_cars(self.get_array('offset') == self.__road_len[self.get_array('road')] - 1)
+
+    def stop_cars(self):
+
+        """
+        Function: stops cars that are at a stop sign
+
+        Parameters: None
+
+        Returns: None
+        """
+        if self.__size:
+            stopped = self.get_array('stopped')
+            at_stop_sign = self.__stop_mask[self.__road_base[self.get_array('road')] + self.get_array('offset')]
+            stopped |= at_stop_sign
+
+    def step(self):
+
+        """
+        Function: advances the whole network by one fixed timestep (dt)
+
+        Parameters: None
+
+        Returns:
+
+            vacated_blocks:
+                type: numpy.ndarray (n x 2 grid positions)
+
+            blocks_to_color:
+                type: numpy.ndarray (n x 2 grid positions)
+        """
+
+        self.__clock.advance(self.__dt)
+        self.__ticks += 1
+
+        self.spawn_cars()
+        vacated_blocks = self.move_cars()
+        blocks_to_color = self.check_for_collisions()
+        self.remove_end_cars()
+        self.stop_cars()
+
+        return vacated_blocks, blocks_to_color
+
+    def run(self, duration):
+
+        """
+        Function: steps the simulation until duration seconds of simulated time have passed
+
+        Parameters:
+
+            duration:
+                type: float
+
+        Returns: None
+        """
+
+        end_tick = self.__ticks + int(round(duration / self.__dt))
+        while self.__ticks < end_tick:
+            self.step()
+
+
+if __name__ == "__main__":
+    print("File is not meant run")